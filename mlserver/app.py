@@ -7,58 +7,273 @@ Endpoints:
     body: { "reviews": ["text1", "text2", ...] }
 
  - POST /analyze-file
-    body: { "s3_key": "uploads/xxx.csv" }
+    body: { "s3_key": "uploads/xxx.csv", "format": null, "stream": false, "output": "json" | "ndjson", "async": false }
+
+ - POST /jobs, GET /jobs/<id>, GET /jobs/<id>/results?offset=&limit=
+    body: { "s3_key": "uploads/xxx.csv", "format": null }
+    background analysis of an S3 file with progress and paginated results
+
+ - GET /results/<result_id>?cursor=&limit=
+    full result set of an /analyze-file call made with "store": true
+
+ - GET /metrics
+    Prometheus text: per-stage latency histograms, row and fallback counters
+
+ - GET /health (process is up), GET /ready (model loaded and warmed up)
 
 Notes:
+ - Importing this module is cheap: the model is loaded and one warmup
+   inference is run on a background thread (GET /ready turns 200 when done,
+   /analyze and /analyze-file wait up to WARMUP_WAIT_SECONDS for it), and
+   pandas/pyarrow/boto3/joblib are only imported by the code paths that use
+   them (python -m benchmarks.imports reports import times)
  - Expects trained model at model/review_model.pkl (joblib pipeline)
- - Uses boto3 to read CSV from S3 in /analyze-file
+ - Prefers the compiled scorer model/review_model.npz when present and
+   exported from that pipeline (train_model, scored with NumPy only)
+ - Versioned models live in model/registry/<version>/ (CURRENT names the
+   active one); POST /admin/reload-model (needs MODEL_ADMIN_TOKEN) or
+   MODEL_WATCH_INTERVAL swaps them without a restart, and every response
+   carries "model_version"
+ - Reads uploads from S3 in /analyze-file (CSV, JSONL, Parquet, Arrow) through
+   one pooled client per process (utils.s3); AWS_S3_ENDPOINT_URL points it at
+   a local S3 stand-in
  - Uses utils.* modules for preprocessing, sentiment, keywords
+ - "keywords" are the KEYWORDS_TOP_K best terms of each review, taken from
+   the tf-idf matrix built for prediction: by tf-idf weight, or with
+   KEYWORDS_MODE=contribution the terms that pushed it towards its label
+ - asgi.py serves the same endpoints under uvicorn and micro-batches
+   concurrent /analyze calls
+ - "timings": true in a request body (or ?timings=1) adds a per-stage
+   breakdown to /analyze and /analyze-file responses
+ - Every row gets a near-duplicate "cluster_id" and "duplicate_count"
+   (MinHash/LSH, utils.dedup); uploads share an index persisted at
+   DEDUP_INDEX_PATH (a snapshot, plus a SQLite change log beside it that
+   is folded into the snapshot in the background), so templated reviews
+   are caught across files, and file summaries list the largest clusters
+ - "output": "columnar" returns one array per field ("fields", default
+   label,probability,sentiment; "text" echoes reviews back) instead of a
+   dict per row; "encoding": "msgpack" (or Accept: application/x-msgpack)
+   sends MessagePack instead of JSON
 """
 
 import os
 import io
+import json
+import base64
+import hmac
+import threading
+import time
+from collections import Counter
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
 
-import joblib
-import boto3
-import pandas as pd
-from flask import Flask, request, jsonify
+import numpy as np
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 
-from utils.preprocess import clean_text
-from utils.sentiment import get_sentiment_score
-from utils.keywords import extract_keywords
+from utils.preprocess import ProcessedText, process_batch
+from utils.sentiment import get_sentiment_scores
+from utils.keywords import KEYWORD_MODES, KeywordVocab, TermWeights, keywords_from_tokens, top_terms
+from utils.readers import FORMATS, detect_format, format_from_name, iter_text_chunks, needs_random_access, to_seekable
+from utils.s3 import S3Accessor
+from utils.cache import create_result_cache, file_fingerprint, make_cache_key
+from utils.jobs import JobRunner, JobStore, progress as job_progress
+from utils.dedup import DedupParams, DuplicateIndex, minhash_signatures
+from utils.encoding import MSGPACK_MIMETYPE, RESULT_FIELDS, pack_msgpack, parse_fields, to_columnar, wants_msgpack
+from utils import metrics
+from model.registry import LoadedModel, ModelRegistry, load_artifact
 
 # Config via env
 MODEL_PATH = Path("model/review_model.pkl")
+SCORER_PATH = Path(os.getenv("MODEL_SCORER_PATH", "model/review_model.npz"))
+# set USE_COMPILED_SCORER=0 to force the joblib pipeline
+USE_COMPILED_SCORER = os.getenv("USE_COMPILED_SCORER", "1") != "0"
+# versioned models: <dir>/<version>/review_model.{npz,pkl} plus a CURRENT pointer
+MODEL_REGISTRY_DIR = Path(os.getenv("MODEL_REGISTRY_DIR", "model/registry"))
+# memory-map model arrays so forked workers share pages (MODEL_MMAP=0 to copy)
+MODEL_MMAP = os.getenv("MODEL_MMAP", "1") != "0"
+# seconds between checks of the registry's CURRENT pointer (0 = no watcher)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", 0))
+# POST /admin/reload-model is disabled unless this is set, and then requires header X-Admin-Token
+MODEL_ADMIN_TOKEN = os.getenv("MODEL_ADMIN_TOKEN")
 AWS_REGION = os.getenv("AWS_REGION", "ap-south-1")
 AWS_BUCKET = os.getenv("AWS_S3_BUCKET")  # required for analyze-file
+# custom S3 endpoint (MinIO, moto server, ...) for local testing
+AWS_S3_ENDPOINT_URL = os.getenv("AWS_S3_ENDPOINT_URL") or None
+# pooled connections per process, and parallel ranged GETs for big whole-object downloads
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 32))
+S3_PARALLEL_THRESHOLD = int(os.getenv("S3_PARALLEL_THRESHOLD", 64 << 20))
+S3_PART_SIZE = int(os.getenv("S3_PART_SIZE", 8 << 20))
+S3_DOWNLOAD_WORKERS = int(os.getenv("S3_DOWNLOAD_WORKERS", 8))
+# downloads larger than this are mapped from a temp file instead of anonymous memory
+S3_MEMORY_LIMIT = int(os.getenv("S3_MEMORY_LIMIT", 256 << 20))
 # threshold for suspicious by probability (you can tweak)
 SUSPICIOUS_THRESHOLD = float(os.getenv("SUSPICIOUS_THRESHOLD", 0.5))
+# keywords per review: "tfidf" (highest tf-idf terms) or "contribution" (terms behind the label), and how many
+KEYWORDS_MODE = os.getenv("KEYWORDS_MODE", "tfidf")
+if KEYWORDS_MODE not in KEYWORD_MODES:
+    print(f"Warning: unknown KEYWORDS_MODE {KEYWORDS_MODE!r}, using 'tfidf'")
+    KEYWORDS_MODE = "tfidf"
+KEYWORDS_TOP_K = max(1, int(os.getenv("KEYWORDS_TOP_K", 5)))
+# number of cleaned reviews passed to a single predict_proba call
+PREDICT_BATCH_SIZE = max(1, int(os.getenv("PREDICT_BATCH_SIZE", 1024)))
+# streaming /analyze-file: rows per analyzed chunk and bytes per S3 read
+STREAM_CHUNK_ROWS = max(1, int(os.getenv("STREAM_CHUNK_ROWS", 5000)))
+S3_READ_CHUNK_BYTES = max(1, int(os.getenv("S3_READ_CHUNK_BYTES", 1 << 20)))
+# max per-row results returned in a JSON /analyze-file response
+RESULTS_CAP = 500
+# result cache: "memory" (per process), "sqlite" (shared file) or "off"
+RESULT_CACHE = os.getenv("RESULT_CACHE", "memory")
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 100_000))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", 3600))
+RESULT_CACHE_PATH = Path(os.getenv("RESULT_CACHE_PATH", "cache/results.sqlite"))
+# sentiment entries are keyed on the raw text under this tag (bump when utils.sentiment changes)
+SENTIMENT_FINGERPRINT = "sentiment:1"
+# near-duplicate clusters: on/off, persisted index (its change log is the same path with .sqlite),
+# min estimated Jaccard, clusters in summaries
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") != "0"
+DEDUP_INDEX_PATH = Path(os.getenv("DEDUP_INDEX_PATH", "cache/dedup_index.npz"))
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.5))
+DEDUP_TOP_CLUSTERS = int(os.getenv("DEDUP_TOP_CLUSTERS", 10))
+# the persisted index keeps at most this many clusters, each dropped after this long without new members (0 = no limit)
+DEDUP_MAX_CLUSTERS = int(os.getenv("DEDUP_MAX_CLUSTERS", 200_000))
+DEDUP_TTL_SECONDS = float(os.getenv("DEDUP_TTL_SECONDS", 30 * 24 * 3600))
+# async file jobs: SQLite state file, pool processes per worker, and max queued+running
+# jobs over all workers sharing JOB_DB_PATH
+JOB_DB_PATH = Path(os.getenv("JOB_DB_PATH", "cache/jobs.sqlite"))
+JOB_WORKERS = max(1, int(os.getenv("JOB_WORKERS", 2)))
+JOB_QUEUE_SIZE = max(1, int(os.getenv("JOB_QUEUE_SIZE", 16)))
+JOB_START_METHOD = os.getenv("JOB_START_METHOD", "spawn")
+# resume queued/interrupted jobs when a server process handles its first request
+JOB_RESUME_ON_START = os.getenv("JOB_RESUME_ON_START", "1") != "0"
+JOB_RESULTS_PAGE_MAX = 1000
+# stored result sets and finished jobs are deleted after this many seconds
+RESULTS_RETENTION_SECONDS = float(os.getenv("RESULTS_RETENTION_SECONDS", 7 * 24 * 3600))
+# ML_PROFILE=1 runs a sampling profiler; collapsed stacks at GET /debug/profile
+ML_PROFILE = os.getenv("ML_PROFILE", "0") == "1"
+ML_PROFILE_INTERVAL_MS = float(os.getenv("ML_PROFILE_INTERVAL_MS", 10))
+# load the model and run a warmup inference in the background at import
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "1") != "0"
+# how long /analyze and /analyze-file wait for a running warmup before answering 503
+WARMUP_WAIT_SECONDS = float(os.getenv("WARMUP_WAIT_SECONDS", 30))
 
 app = Flask(__name__)
 
-# Global model variable (pipeline)
-model = None
+# Active model (replaced atomically on reload; see current_model)
+_active_model: Optional[LoadedModel] = None
+_model_lock = threading.Lock()
+_watcher_pid: Optional[int] = None
 
-def load_model() -> None:
-    """Load the joblib pipeline if available."""
-    global model
+registry = ModelRegistry(MODEL_REGISTRY_DIR)
+result_cache = create_result_cache(RESULT_CACHE, RESULT_CACHE_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_PATH)
+storage = S3Accessor(
+    region=AWS_REGION,
+    endpoint_url=AWS_S3_ENDPOINT_URL,
+    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+    parallel_threshold=S3_PARALLEL_THRESHOLD,
+    part_size=S3_PART_SIZE,
+    max_workers=S3_DOWNLOAD_WORKERS,
+    memory_limit=S3_MEMORY_LIMIT,
+)
+
+def _load_handle(version: Optional[str] = None) -> LoadedModel:
+    """
+    Fully load a model version (default: the registry's current version, or
+    the legacy MODEL_PATH/SCORER_PATH files when the registry is empty).
+    """
+    version = version or registry.current_version()
+    if version is not None:
+        scorer_path, pipeline_path = registry.paths(version)
+    else:
+        scorer_path, pipeline_path = SCORER_PATH, MODEL_PATH
+    with metrics.stage("load_model"):
+        model, source = load_artifact(scorer_path, pipeline_path, prefer_scorer=USE_COMPILED_SCORER, mmap=MODEL_MMAP)
+
+    artifact = file_fingerprint(source) if source is not None else "none"
+    if version is None:
+        version = f"local-{artifact[:8]}" if source is not None else "none"
+    suspicious_index = 1
     if model is not None:
-        return
-    if MODEL_PATH.exists():
         try:
-            model = joblib.load(MODEL_PATH)
-            print("Loaded model from", MODEL_PATH)
+            suspicious_index = _detect_suspicious_index(model)
+        except Exception:
+            suspicious_index = 1
+    return LoadedModel(
+        version=version,
+        model=model,
+        # identifies the model artifact (and threshold, keyword settings) inside cache keys
+        fingerprint=f"{artifact}:{SUSPICIOUS_THRESHOLD}:{KEYWORDS_MODE}:{KEYWORDS_TOP_K}",
+        source=source,
+        suspicious_index=suspicious_index,
+        keywords=_keyword_vocab(model),
+    )
+
+def _keyword_vocab(model) -> Optional[KeywordVocab]:
+    """Term per feature column, or None when the model has no vocabulary (hashing pipeline, no model)."""
+    if model is None:
+        return None
+    try:
+        if hasattr(model, "feature_names"):
+            return KeywordVocab.build(model.feature_names())
+        if "tfidf" in getattr(model, "named_steps", {}):
+            return KeywordVocab.build(model.named_steps["tfidf"].get_feature_names_out().tolist())
+    except Exception as e:
+        print("Warning: keyword vocabulary unavailable, using token keywords:", e)
+    return None
+
+def load_model() -> None:
+    """Load the active model once per process (and start the registry watcher)."""
+    global _active_model
+    if _active_model is None:
+        with _model_lock:
+            if _active_model is None:
+                _active_model = _load_handle()
+    _ensure_model_watcher()
+
+def current_model() -> LoadedModel:
+    """The model new requests should use; callers keep it for the whole request."""
+    load_model()
+    return _active_model
+
+def reload_model(version: Optional[str] = None) -> LoadedModel:
+    """
+    Load `version` (default: the registry's current one) and swap it in.
+    The new model is loaded before the swap, so in-flight requests finish on
+    the model they started with and a broken artifact never replaces a working one.
+    """
+    global _active_model
+    # only published versions: the name comes from a request and the artifacts get unpickled
+    if version is not None and version not in registry.versions():
+        raise ValueError(f"Unknown model version: {version}")
+    new = _load_handle(version)
+    old = _active_model
+    if new.model is None and old is not None and old.model is not None:
+        raise RuntimeError(f"Model version {new.version} could not be loaded")
+    if version is not None:
+        # persist the choice so other workers and restarts follow it
+        registry.activate(version)
+    with _model_lock:
+        _active_model = new
+    print(f"Active model version: {new.version}")
+    return new
+
+def _watch_registry() -> None:
+    """Poll the registry's CURRENT pointer and hot-reload when it changes."""
+    while True:
+        time.sleep(MODEL_WATCH_INTERVAL)
+        try:
+            version = registry.current_version()
+            if version is not None and _active_model is not None and version != _active_model.version:
+                reload_model()
         except Exception as e:
-            print("Failed to load model:", e)
-            model = None
-    else:
-        print("Model file not found at", MODEL_PATH, "- running in fallback/dummy mode")
-        model = None
+            print("Model watcher error:", e)
 
-# Call once on startup
-load_model()
+def _ensure_model_watcher() -> None:
+    # threads do not survive fork, so start one per worker process
+    global _watcher_pid
+    if MODEL_WATCH_INTERVAL <= 0 or _watcher_pid == os.getpid():
+        return
+    _watcher_pid = os.getpid()
+    threading.Thread(target=_watch_registry, name="model-watcher", daemon=True).start()
 
 def _detect_suspicious_index(pipeline) -> int:
     """
@@ -95,58 +310,426 @@ def _detect_suspicious_index(pipeline) -> int:
     # default fallback
     return 1
 
-def analyze_batch(texts: List[str]) -> List[dict]:
+def _fallback_label(sentiment: float) -> str:
+    """Dummy rule used when the model is missing or fails on a row."""
+    return "suspicious" if sentiment < -0.2 else "genuine"
+
+def _model_features(model, docs: List[ProcessedText]) -> Tuple[Any, Optional[TermWeights]]:
     """
-    Analyze a list of raw review texts and return structured results.
-    Each result contains: text, sentiment, label, probability, keywords
+    predict_proba on processed reviews, plus the tf-idf matrix it was computed
+    from (None when the model does not expose one), reused for keywords.
     """
-    load_model()
-    results = []
+    if hasattr(model, "tfidf_tokens"):
+        # clean_text tokens of 2+ chars are exactly the vectorizer's tokens
+        rows, cols, values, n_docs = model.tfidf_tokens([[t for t in d.tokens if len(t) > 1] for d in docs])
+        weights = TermWeights(rows, cols, values, model.term_contributions(cols, values), n_docs)
+        return model.predict_proba_tfidf(rows, cols, values, n_docs), weights
 
-    # determine suspicious class index once per batch (if model present)
-    suspicious_index = None
-    if model is not None:
+    cleaned = [d.cleaned for d in docs]
+    steps = getattr(model, "named_steps", {})
+    if "tfidf" in steps:
+        X = model[:-1].transform(cleaned).tocoo()
+        clf = model[-1]
+        coef = getattr(clf, "coef_", None)
+        if coef is not None and coef.shape[0] == 1:
+            contributions = X.data * coef[0][X.col]
+        else:
+            contributions = np.zeros_like(X.data)
+        weights = TermWeights(X.row.astype(np.int64), X.col.astype(np.int64), X.data, contributions, len(docs))
+        return clf.predict_proba(X.tocsr()), weights
+    return model.predict_proba(cleaned), None
+
+def _predict_chunk(model, docs: List[ProcessedText], suspicious_index: int) -> Tuple[List[Optional[float]], Optional[TermWeights]]:
+    """
+    Return P(suspicious) for a chunk of processed texts with one predict_proba
+    call, and the chunk's tf-idf entries for keyword extraction.
+    If the vectorized call fails, fall back to scoring row by row so a single
+    bad row only loses its own probability (None); no term weights then.
+    """
+    try:
+        proba_all, weights = _model_features(model, docs)
+        n_classes = proba_all.shape[1]
+        idx = suspicious_index
+        # clamp index safety
+        if idx < 0 or idx >= n_classes:
+            idx = 1 if n_classes > 1 else 0
+        return [float(p) for p in proba_all[:, idx]], weights
+    except Exception as e:
+        print("Batch prediction error, retrying row by row:", e)
+        metrics.PREDICT_RETRIES.inc()
+
+    probs: List[Optional[float]] = []
+    for doc in docs:
         try:
-            suspicious_index = _detect_suspicious_index(model)
-        except Exception:
-            suspicious_index = 1
+            proba_row = _model_features(model, [doc])[0][0]
+            idx = suspicious_index
+            if idx < 0 or idx >= len(proba_row):
+                idx = 1 if len(proba_row) > 1 else 0
+            probs.append(float(proba_row[idx]))
+        except Exception as e:
+            # fallback if model fails at predict time
+            print("Model prediction error:", e)
+            probs.append(None)
+    return probs, None
+
+def _chunk_keywords(handle: LoadedModel, probs: List[float], weights: TermWeights) -> List[List[str]]:
+    """Top KEYWORDS_TOP_K terms of every review in a scored chunk, from its tf-idf entries."""
+    direction = None
+    if KEYWORDS_MODE == "contribution":
+        # contributions point towards classes_[1]; list the terms behind each row's label
+        towards_suspicious = 1.0 if handle.suspicious_index == 1 else -1.0
+        direction = np.where(np.asarray(probs) >= SUSPICIOUS_THRESHOLD, towards_suspicious, -towards_suspicious)
+    return top_terms(weights, handle.keywords, KEYWORDS_TOP_K, KEYWORDS_MODE, direction)
+
+def _score_texts(handle: LoadedModel, docs: List[ProcessedText], batch_size: int) -> List[dict]:
+    """Model probability and keywords for each (unique) cleaned review; None probability if the model is missing or failed."""
+    probabilities: List[Optional[float]] = [None] * len(docs)
+    keywords: List[Optional[List[str]]] = [None] * len(docs)
+    if handle.model is not None:
+        for start in range(0, len(docs), batch_size):
+            chunk = docs[start:start + batch_size]
+            with metrics.stage("predict"):
+                probs, weights = _predict_chunk(handle.model, chunk, handle.suspicious_index)
+            probabilities[start:start + len(chunk)] = probs
+            if weights is not None and handle.keywords is not None:
+                # the same tf-idf matrix, top-k per row for the whole chunk at once
+                with metrics.stage("keywords"):
+                    keywords[start:start + len(chunk)] = _chunk_keywords(handle, probs, weights)
+
+    # no model vocabulary (hashing pipeline, no model, failed chunk): distinct long tokens
+    unranked = [i for i, kws in enumerate(keywords) if kws is None]
+    if unranked:
+        with metrics.stage("keywords"):
+            for i in unranked:
+                keywords[i] = keywords_from_tokens(docs[i].tokens, k=KEYWORDS_TOP_K)
+
+    fallbacks = sum(p is None for p in probabilities)
+    if fallbacks:
+        metrics.MODEL_FALLBACKS.inc(fallbacks, reason="no_model" if handle.model is None else "predict_error")
+    return [{"probability": p, "keywords": kws} for p, kws in zip(probabilities, keywords)]
+
+def _sentiments(raws: List[str]) -> dict:
+    """Sentiment per distinct raw text, from the result cache where possible."""
+    # sentiment needs the raw punctuation/casing ("!", "n't", "Mr.", ":)"), so
+    # it is keyed on the raw text, not on the cleaned text the model sees
+    keys = {raw: make_cache_key(raw, SENTIMENT_FINGERPRINT) for raw in dict.fromkeys(raws)}
+    cached = {}
+    if result_cache is not None:
+        with metrics.stage("cache_lookup"):
+            cached = result_cache.get_many(keys.values())
+    found = {raw: cached[key]["sentiment"] for raw, key in keys.items() if key in cached}
+    missing = [raw for raw in keys if raw not in found]
+    if missing:
+        with metrics.stage("sentiment"):
+            fresh = dict(zip(missing, get_sentiment_scores(missing).tolist()))
+        found.update(fresh)
+        if result_cache is not None:
+            with metrics.stage("cache_store"):
+                result_cache.set_many({keys[raw]: {"sentiment": value} for raw, value in fresh.items()})
+    return found
+
+def _result_row(raw: str, sentiment: float, model_fields: dict) -> dict:
+    probability = model_fields["probability"]
+    if probability is not None:
+        label = "suspicious" if probability >= SUSPICIOUS_THRESHOLD else "genuine"
     else:
-        suspicious_index = 1
+        # model missing or failed on this row
+        label = _fallback_label(sentiment)
+    return {
+        "text": raw,
+        "sentiment": sentiment,
+        "label": label,
+        "probability": probability,
+        "keywords": model_fields["keywords"],
+    }
 
-    for text in texts:
-        raw_text = str(text)
-        cleaned = clean_text(raw_text)
-        sentiment = get_sentiment_score(raw_text)
+def _flag_duplicates(docs: List[ProcessedText], keys: List[str], first_index: dict,
+                     index: DuplicateIndex) -> dict:
+    """Cluster id per cache key: one MinHash signature per distinct cleaned text, weighted by its copies."""
+    copies = Counter(keys)
+    rows = list(first_index.values())
+    sigs = minhash_signatures([docs[i].tokens for i in rows], index.params)
+    cluster_ids = index.assign(sigs, [copies[keys[i]] for i in rows], [docs[i].raw for i in rows])
+    return {keys[i]: c for i, c in zip(rows, cluster_ids)}
 
-        if model is not None:
-            try:
-                proba_all = model.predict_proba([cleaned])[0]  # returns array like [p_class0, p_class1]
-                # clamp index safety
-                if suspicious_index < 0 or suspicious_index >= len(proba_all):
-                    suspicious_index = 1 if len(proba_all) > 1 else 0
-                prob_suspicious = float(proba_all[suspicious_index])
-                label = "suspicious" if prob_suspicious >= SUSPICIOUS_THRESHOLD else "genuine"
-                probability = prob_suspicious
-            except Exception as e:
-                # fallback if model fails at predict time
-                print("Model prediction error:", e)
-                probability = None
-                label = "suspicious" if sentiment < -0.2 else "genuine"
-        else:
-            # fallback dummy rule if model missing
-            probability = None
-            label = "suspicious" if sentiment < -0.2 else "genuine"
-
-        results.append({
-            "text": raw_text,
-            "sentiment": sentiment,
-            "label": label,
-            "probability": probability,
-            "keywords": extract_keywords(raw_text)
-        })
+def analyze_batch(
+    texts: List[str],
+    batch_size: Optional[int] = None,
+    handle: Optional[LoadedModel] = None,
+    index: Optional[DuplicateIndex] = None,
+) -> List[dict]:
+    """
+    Analyze a list of raw review texts and return structured results.
+    Each result contains: text, sentiment, label, probability, keywords
+
+    The whole batch is cleaned and tokenized once up front and the model is
+    called once per chunk of `batch_size` rows (default: PREDICT_BATCH_SIZE)
+    instead of once per review; keywords are the top KEYWORDS_TOP_K terms
+    of each row of the tf-idf matrix built for that call. Reviews with the
+    same cleaned text share one model call (probability/keywords), reviews
+    with the same raw text share one sentiment score, and both are looked
+    up in the result cache first when RESULT_CACHE is enabled.
+
+    `handle` pins the model version (default: current_model()); pass the
+    same handle for every chunk of one request.
+
+    With `index`, the batch is added to that near-duplicate index and every
+    result also gets "cluster_id" and "duplicate_count" (other reviews in the
+    cluster so far, earlier batches and uploads included).
+    """
+    handle = handle or current_model()
+    batch_size = batch_size or PREDICT_BATCH_SIZE
+
+    # normalize and tokenize every review exactly once
+    with metrics.stage("preprocess"):
+        docs = process_batch(texts)
+        keys = [make_cache_key(d.cleaned, handle.fingerprint) for d in docs]
+
+    # first occurrence of every distinct cleaned text
+    first_index = {}
+    for i, key in enumerate(keys):
+        first_index.setdefault(key, i)
+
+    scored = {}
+    if result_cache is not None:
+        with metrics.stage("cache_lookup"):
+            scored = result_cache.get_many(first_index)
+    missing = [i for key, i in first_index.items() if key not in scored]
+    if missing:
+        fresh = _score_texts(handle, [docs[i] for i in missing], batch_size)
+        new_entries = {keys[i]: value for i, value in zip(missing, fresh)}
+        scored.update(new_entries)
+        if result_cache is not None:
+            # do not cache rows where the model failed or is missing
+            with metrics.stage("cache_store"):
+                result_cache.set_many({k: v for k, v in new_entries.items() if v["probability"] is not None})
+    sentiments = _sentiments([doc.raw for doc in docs])
 
+    metrics.ROWS_ANALYZED.inc(len(docs))
+    metrics.ROWS_SCORED.inc(len(missing))
+    results = [_result_row(doc.raw, sentiments[doc.raw], scored[key]) for doc, key in zip(docs, keys)]
+    if index is None:
+        return results
+
+    with metrics.stage("dedup"):
+        clusters = _flag_duplicates(docs, keys, first_index, index)
+    for result, key in zip(results, keys):
+        result["cluster_id"] = clusters[key]
+        result["duplicate_count"] = max(index.size(clusters[key]) - 1, 0)
     return results
 
+def request_clusters(texts: List[str]) -> List[dict]:
+    """cluster_id / duplicate_count within one /analyze request, for results scored in a shared batch."""
+    docs = process_batch(texts)
+    keys = [d.cleaned for d in docs]
+    first_index = {}
+    for i, key in enumerate(keys):
+        first_index.setdefault(key, i)
+    index = DuplicateIndex(_dedup_params())
+    clusters = _flag_duplicates(docs, keys, first_index, index)
+    return [{"cluster_id": clusters[k], "duplicate_count": max(index.size(clusters[k]) - 1, 0)} for k in keys]
+
+_duplicate_index: Optional[DuplicateIndex] = None
+_duplicate_index_pid: Optional[int] = None
+_duplicate_index_lock = threading.Lock()
+_dedup_compaction: Optional[threading.Thread] = None
+
+def _dedup_params() -> DedupParams:
+    return DedupParams(threshold=DEDUP_THRESHOLD)
+
+def duplicate_index() -> Optional[DuplicateIndex]:
+    """
+    Per-process near-duplicate index for uploads (None if DEDUP_ENABLED=0),
+    brought up to date with what other workers saved to DEDUP_INDEX_PATH
+    (one small query when nothing changed, otherwise just the new changes).
+    """
+    global _duplicate_index, _duplicate_index_pid
+    if not DEDUP_ENABLED:
+        return None
+    with _duplicate_index_lock:
+        if _duplicate_index is None or _duplicate_index_pid != os.getpid():
+            _duplicate_index = DuplicateIndex.load(
+                DEDUP_INDEX_PATH, _dedup_params(), max_clusters=DEDUP_MAX_CLUSTERS, ttl_seconds=DEDUP_TTL_SECONDS
+            )
+            _duplicate_index_pid = os.getpid()
+            print(f"Loaded duplicate index: {len(_duplicate_index)} clusters")
+        else:
+            _duplicate_index.refresh(DEDUP_INDEX_PATH)
+        return _duplicate_index
+
+def _compact_duplicate_index(index: DuplicateIndex) -> None:
+    try:
+        index.compact(DEDUP_INDEX_PATH)
+    except Exception as e:
+        print("Duplicate index compaction error:", e)
+
+def save_duplicate_index(index: Optional[DuplicateIndex], rows: List[dict] = ()) -> None:
+    """
+    Persist an upload's clusters; a failed save only costs cross-upload matches.
+    `rows` not yet sent to the client get the ids/counts of clusters another
+    worker had created too (ids already sent stay valid as aliases). Once
+    the change log is long enough it is compacted in a background thread.
+    """
+    global _dedup_compaction
+    if index is None:
+        return
+    try:
+        merged = index.save(DEDUP_INDEX_PATH)
+    except Exception as e:
+        print("Duplicate index save error:", e)
+        return
+    with _duplicate_index_lock:
+        if index.needs_compaction() and (_dedup_compaction is None or not _dedup_compaction.is_alive()):
+            _dedup_compaction = threading.Thread(
+                target=_compact_duplicate_index, args=(index,), name="dedup-compaction", daemon=True
+            )
+            _dedup_compaction.start()
+    if merged:
+        for row in rows:
+            if row.get("cluster_id") in merged:
+                row["cluster_id"] = index.resolve(row["cluster_id"])
+                row["duplicate_count"] = max(index.size(row["cluster_id"]) - 1, 0)
+
+WARMUP_REVIEWS = [
+    "Great product, works exactly as described. Would buy again!",
+    "Terrible quality, broke after two days :( not recommended",
+]
+
+class Warmup:
+    """
+    Model load plus one warmup inference (lexicon, tokenizer, scorer pages)
+    on a background thread, once per process: threads do not survive a
+    fork, so gunicorn workers start their own on their first request.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.done = threading.Event()
+            self.error = None
+            threading.Thread(target=self._run, name="warmup", daemon=True).start()
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        try:
+            with metrics.stage("warmup"):
+                analyze_batch(WARMUP_REVIEWS, handle=current_model())
+        except Exception as e:
+            print("Warmup error:", e)
+            self.error = str(e)
+        finally:
+            self.seconds = time.perf_counter() - started
+            print(f"Warmup finished in {self.seconds:.2f}s")
+            self.done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Start the warmup if needed and wait for it; False on timeout."""
+        self.start()
+        return self.done.wait(timeout)
+
+    @property
+    def state(self) -> str:
+        if not self.done.is_set():
+            return "warming"
+        return "failed" if self.error else "ready"
+
+    def after_fork(self) -> None:
+        # the warmup thread is gone in a forked child: start over on first use
+        self.done = threading.Event()
+        self.error = None
+        self.seconds = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+warmup = Warmup()
+
+def _after_fork_in_child() -> None:
+    """
+    gunicorn --preload forks workers while the import-time warmup may still
+    hold _model_lock (or a metric/cache lock) from the parent. The thread
+    holding it does not exist in the child, so the lock would never be
+    released: every lock a parent thread may hold is replaced here. A model
+    load that was still running is simply redone by the child.
+    """
+    global _model_lock, _duplicate_index_lock
+    _model_lock = threading.Lock()
+    _duplicate_index_lock = threading.Lock()
+    warmup.after_fork()
+    metrics.after_fork()
+    if result_cache is not None:
+        result_cache.after_fork()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+def _not_ready():
+    response = jsonify({"error": "Model is still warming up, retry shortly", "state": warmup.state})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+@app.route("/health", methods=["GET"])
+def health():
+    """Liveness: answers as soon as the process serves requests."""
+    return jsonify({"status": "ok"})
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness: 200 once the model is loaded and warmed up, else 503."""
+    warmup.start()
+    state = warmup.state
+    body = {
+        "ready": state == "ready",
+        "state": state,
+        "model_version": _active_model.version if _active_model is not None else None,
+        "warmup_ms": round(warmup.seconds * 1000, 3) if warmup.seconds is not None else None,
+    }
+    if warmup.error:
+        body["error"] = warmup.error
+    return jsonify(body), 200 if state == "ready" else 503
+
+class OutputFormat(NamedTuple):
+    """How per-row results are sent back (see utils.encoding)."""
+    columnar: bool
+    fields: List[str]
+    msgpack: bool
+
+def output_format(data: dict, args: Mapping[str, str], accept: Optional[str]) -> OutputFormat:
+    """
+    Options from the JSON body, else the query string `args`; ValueError on
+    bad fields/encoding. Shared with asgi.py, hence no Flask request here.
+    """
+    def option(name):
+        return data.get(name, args.get(name))
+    columnar = option("output") == "columnar"
+    fields = parse_fields(option("fields")) if columnar else list(RESULT_FIELDS)
+    return OutputFormat(columnar, fields, wants_msgpack(option("encoding"), accept))
+
+def wants_timings(data: Any, args: Mapping[str, str]) -> bool:
+    """"timings": true in the JSON body or ?timings=1 asks for the per-stage breakdown."""
+    return args.get("timings") in ("1", "true") or (isinstance(data, dict) and bool(data.get("timings")))
+
+def _output_format(data: dict) -> OutputFormat:
+    return output_format(data, request.args, request.headers.get("Accept"))
+
+def rows_payload(results: List[dict], out: OutputFormat) -> dict:
+    if out.columnar:
+        return {"columns": to_columnar(results, out.fields), "count": len(results)}
+    return {"results": results}
+
+def _respond(payload: dict, out: OutputFormat, status: int = 200):
+    if out.msgpack:
+        return Response(pack_msgpack(payload), status=status, mimetype=MSGPACK_MIMETYPE)
+    return jsonify(payload), status
+
 @app.route("/analyze", methods=["POST"])
 def analyze():
     """
@@ -156,20 +739,533 @@ def analyze():
     reviews = data.get("reviews", [])
     if not isinstance(reviews, list) or len(reviews) == 0:
         return jsonify({"error": "Field 'reviews' must be a non-empty list"}), 400
+    try:
+        out = _output_format(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not warmup.wait(WARMUP_WAIT_SECONDS):
+        return _not_ready()
 
     try:
-        results = analyze_batch(reviews)
-        return jsonify({"results": results})
+        handle = current_model()
+        # clusters within this request only; uploads use the persisted index
+        index = DuplicateIndex(_dedup_params()) if DEDUP_ENABLED else None
+        results = analyze_batch(reviews, handle=handle, index=index)
+        return _respond(_with_timings({**rows_payload(results, out), "model_version": handle.version}), out)
     except Exception as e:
         print("Analyze error:", e)
         return jsonify({"error": "Internal analyze error", "details": str(e)}), 500
 
+@app.route("/model", methods=["GET"])
+def model_info():
+    """Active model version and the versions available in the registry."""
+    handle = current_model()
+    return jsonify({
+        "model_version": handle.version,
+        "source": str(handle.source) if handle.source else None,
+        "kind": type(handle.model).__name__ if handle.model is not None else None,
+        "registry": str(registry.root),
+        "available_versions": registry.versions(),
+    })
+
+def _admin_token_ok() -> bool:
+    supplied = request.headers.get("X-Admin-Token") or ""
+    return hmac.compare_digest(supplied.encode("utf-8"), (MODEL_ADMIN_TOKEN or "").encode("utf-8"))
+
+@app.route("/admin/reload-model", methods=["POST"])
+def admin_reload_model():
+    """
+    Atomically swap in a model: JSON {"version": "..."} activates that
+    registry version, an empty body reloads the registry's CURRENT version.
+    Disabled unless MODEL_ADMIN_TOKEN is set.
+    """
+    if not MODEL_ADMIN_TOKEN:
+        return jsonify({"error": "Model reload is disabled, set MODEL_ADMIN_TOKEN"}), 403
+    if not _admin_token_ok():
+        return jsonify({"error": "Forbidden"}), 403
+    data = request.get_json(force=True, silent=True) or {}
+    try:
+        previous = current_model().version
+        handle = reload_model(data.get("version"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print("Model reload error:", e)
+        return jsonify({"error": "Failed to reload model", "details": str(e)}), 500
+    return jsonify({"model_version": handle.version, "previous_version": previous})
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """Hit/miss counters and size of the result cache."""
+    if result_cache is None:
+        return jsonify({"backend": "off"})
+    return jsonify(result_cache.stats())
+
+_profiler: Optional[metrics.SamplingProfiler] = None
+_profiler_pid: Optional[int] = None
+
+def _ensure_profiler() -> None:
+    # like the model watcher, the sampler thread is per worker process
+    global _profiler, _profiler_pid
+    if not ML_PROFILE or _profiler_pid == os.getpid():
+        return
+    _profiler_pid = os.getpid()
+    _profiler = metrics.SamplingProfiler(interval=ML_PROFILE_INTERVAL_MS / 1000.0)
+    _profiler.start()
+
+@app.before_request
+def _start_request_metrics():
+    g.request_started = time.perf_counter()
+    _ensure_profiler()
+    data = request.get_json(force=True, silent=True) if request.method == "POST" else None
+    if wants_timings(data, request.args):
+        metrics.start_request_timings()
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.get("request_started")
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+    return response
+
+@app.teardown_request
+def _clear_request_timings(_exc):
+    metrics.stop_request_timings()
+
+def timings_payload(stages: Dict[str, float], started: float, **extra) -> dict:
+    """The "timings" response field: stage seconds and the time since `started`, in milliseconds."""
+    return {
+        "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in stages.items()},
+        **extra,
+        "total_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+def _with_timings(payload: dict) -> dict:
+    """Attach the per-stage breakdown (milliseconds) when the request asked for it."""
+    timings = metrics.current_request_timings()
+    if timings is not None:
+        payload["timings"] = timings_payload(timings, g.request_started)
+    return payload
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus text exposition of this worker's metrics."""
+    # never blocks on a model that is still loading
+    version = _active_model.version if _active_model is not None else "none"
+    extra = [
+        "# HELP mlserver_model_info Active model version",
+        "# TYPE mlserver_model_info gauge",
+        f'mlserver_model_info{{version="{metrics.escape_label_value(version)}"}} 1',
+    ]
+    if result_cache is not None:
+        stats = result_cache.stats()
+        extra += [
+            "# HELP mlserver_result_cache_hits_total Result cache hits",
+            "# TYPE mlserver_result_cache_hits_total counter",
+            f"mlserver_result_cache_hits_total {stats['hits']}",
+            "# HELP mlserver_result_cache_misses_total Result cache misses",
+            "# TYPE mlserver_result_cache_misses_total counter",
+            f"mlserver_result_cache_misses_total {stats['misses']}",
+            "# HELP mlserver_result_cache_entries Result cache size",
+            "# TYPE mlserver_result_cache_entries gauge",
+            f"mlserver_result_cache_entries {stats['size']}",
+        ]
+    return Response(metrics.render(extra), mimetype="text/plain; version=0.0.4")
+
+@app.route("/debug/profile", methods=["GET"])
+def debug_profile():
+    """Collapsed stacks from the sampling profiler (flamegraph input); ?reset=1 clears them."""
+    if MODEL_ADMIN_TOKEN and not _admin_token_ok():
+        return jsonify({"error": "Forbidden"}), 403
+    if _profiler is None:
+        return jsonify({"error": "Profiler disabled, set ML_PROFILE=1"}), 404
+    return Response(_profiler.collapsed(reset=request.args.get("reset") == "1"), mimetype="text/plain")
+
+class RunningSummary:
+    """
+    File summary (total, suspicious rate, avg sentiment) updated chunk by
+    chunk; with a duplicate index also the rows in near-duplicate clusters
+    and the largest clusters of the file.
+    """
+
+    def __init__(self, index: Optional[DuplicateIndex] = None):
+        self.total = 0
+        self.suspicious = 0
+        self.sentiment_sum = 0.0
+        self.index = index
+        self.clusters: Counter = Counter()
+
+    def update(self, results: List[dict]) -> None:
+        self.total += len(results)
+        self.suspicious += sum(1 for r in results if r["label"] == "suspicious")
+        self.sentiment_sum += sum(r["sentiment"] for r in results)
+        if self.index is not None:
+            self.clusters.update(r["cluster_id"] for r in results if r["cluster_id"] is not None)
+
+    def as_dict(self) -> dict:
+        total = self.total
+        summary = {
+            "total_reviews": total,
+            "suspicious": self.suspicious,
+            "suspicious_rate": self.suspicious / total if total else 0.0,
+            "avg_sentiment": self.sentiment_sum / total if total else 0.0
+        }
+        if self.index is not None:
+            # ids as of now: clusters merged with another worker's since they were counted
+            clusters: Counter = Counter()
+            for c, n in self.clusters.items():
+                resolved = self.index.resolve(c)
+                if resolved is not None:
+                    clusters[resolved] += n
+            # clusters with another member, here or in an earlier upload
+            duplicated = [(c, n) for c, n in clusters.items() if self.index.size(c) > 1]
+            duplicated.sort(key=lambda item: (-item[1], -self.index.size(item[0])))
+            summary["duplicate_reviews"] = sum(n for _, n in duplicated)
+            summary["top_clusters"] = [
+                {"cluster_id": c, "reviews": n, "total": self.index.size(c), "example": self.index.example(c)}
+                for c, n in duplicated[:DEDUP_TOP_CLUSTERS]
+            ]
+        return summary
+
+class _StreamingBodyIO(io.RawIOBase):
+    """Raw file adapter over a botocore StreamingBody so it can be buffered."""
+
+    def __init__(self, body):
+        self._body = body
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        with metrics.stage("s3_read"):
+            data = self._body.read(len(buf))
+        n = len(data)
+        buf[:n] = data
+        self.bytes_read += n
+        return n
+
+    def close(self) -> None:
+        self._body.close()
+        super().close()
+
+class Upload(NamedTuple):
+    """An opened S3 upload: parse `fileobj` as `fmt`; bytes_read() reports download progress."""
+    fileobj: Any
+    fmt: str
+    size: Optional[int]
+    bytes_read: Callable[[], int]
+
+def _open_upload(s3_key: str, fmt: Optional[str] = None, stream: bool = True) -> Upload:
+    """
+    Open an S3 upload for parsing. The format comes from the request, else
+    the key's extension, else the first bytes. With stream=True the body is
+    read sequentially in S3_READ_CHUNK_BYTES pieces; otherwise (and always
+    for Parquet/Arrow, which need random access) the whole object is
+    downloaded into a mapped buffer, with parallel ranged GETs when large.
+    The caller closes upload.fileobj.
+    """
+    fmt = fmt or format_from_name(s3_key)
+    if not stream or (fmt is not None and needs_random_access(fmt)):
+        with metrics.stage("s3_read"):
+            fileobj = storage.download(AWS_BUCKET, s3_key)
+        if fmt is None:
+            fmt = detect_format(s3_key, fileobj.read(8))
+            fileobj.seek(0)
+        return Upload(fileobj, fmt, fileobj.size, lambda: fileobj.size)
+
+    with metrics.stage("s3_get_object"):
+        obj = storage.get_object(AWS_BUCKET, s3_key)
+    raw = _StreamingBodyIO(obj["Body"])
+    fileobj = io.BufferedReader(raw, buffer_size=S3_READ_CHUNK_BYTES)
+    if fmt is None:
+        fmt = detect_format(s3_key, fileobj.peek(8)[:8])
+        if needs_random_access(fmt):
+            # Parquet/Arrow recognized by magic bytes only: spool what is left
+            with metrics.stage("s3_read"):
+                spooled = to_seekable(fileobj)
+            fileobj.close()
+            fileobj = spooled
+    return Upload(fileobj, fmt, obj.get("ContentLength"), lambda: raw.bytes_read)
+
+def iter_analyzed_chunks(fileobj, chunk_rows: int = None, handle: Optional[LoadedModel] = None, fmt: str = "csv",
+                         index: Optional[DuplicateIndex] = None):
+    """
+    Parse an uploaded file object incrementally and yield analyze_batch
+    results one chunk of `chunk_rows` rows at a time. Only the detected text
+    column is read (see utils.readers). Raises ValueError if no text-like
+    column is found.
+    """
+    chunk_rows = chunk_rows or STREAM_CHUNK_ROWS
+    handle = handle or current_model()
+    chunks = iter_text_chunks(fileobj, fmt, chunk_rows)
+    while True:
+        # the S3 reads the parser triggers are counted as s3_read only
+        with metrics.stage("file_parse", exclude=("s3_read",)):
+            texts = next(chunks, None)
+        if texts is None:
+            return
+        metrics.FILE_ROWS.inc(len(texts))
+        yield analyze_batch(texts, handle=handle, index=index)
+
+def _file_response(summary: RunningSummary, kept: List[dict], handle: LoadedModel, out: OutputFormat,
+                   stored: Optional["StoredResults"]):
+    """/analyze-file payload: summary plus the first RESULTS_CAP rows (all rows via GET /results/<id> when stored)."""
+    payload = {"summary": summary.as_dict(), **rows_payload(kept, out), "model_version": handle.version,
+               "truncated": summary.total > len(kept)}
+    if stored is not None:
+        payload["result_id"] = stored.id
+        payload["next_cursor"] = _encode_cursor(len(kept)) if summary.total > len(kept) else None
+    return _respond(_with_timings(payload), out)
+
+def _analyze_file_streaming(upload: Upload, ndjson: bool, out: OutputFormat, stored: Optional["StoredResults"] = None):
+    """
+    Bounded-memory variant of /analyze-file: the S3 body is read in
+    S3_READ_CHUNK_BYTES pieces and analyzed STREAM_CHUNK_ROWS rows at a time
+    (Parquet/Arrow are downloaded first, they need random access).
+    Returns either NDJSON (one result per line, then a summary line) or the
+    usual {"summary", "results"} payload with only the first RESULTS_CAP rows kept
+    (every row is written to `stored` when given).
+    """
+    fileobj, fmt = upload.fileobj, upload.fmt
+    index = duplicate_index()
+    summary = RunningSummary(index)
+    # every chunk of this file is scored by the same model version
+    handle = current_model()
+
+    if ndjson:
+        def generate():
+            try:
+                for results in iter_analyzed_chunks(fileobj, handle=handle, fmt=fmt, index=index):
+                    summary.update(results)
+                    if stored is not None:
+                        stored.append(results)
+                    yield "".join(json.dumps(r) + "\n" for r in results)
+                save_duplicate_index(index)
+                tail = {"summary": summary.as_dict(), "model_version": handle.version}
+                if stored is not None:
+                    stored.finish(tail["summary"])
+                    tail["result_id"] = stored.id
+                yield json.dumps(tail) + "\n"
+            except Exception as e:
+                # headers are already sent, so report the failure in-band
+                print("Streaming analyze error:", e)
+                if stored is not None:
+                    stored.fail(str(e))
+                yield json.dumps({"error": "Failed during analysis", "details": str(e)}) + "\n"
+            finally:
+                fileobj.close()
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    kept: List[dict] = []
+    try:
+        for results in iter_analyzed_chunks(fileobj, handle=handle, fmt=fmt, index=index):
+            summary.update(results)
+            if stored is not None:
+                stored.append(results)
+            if len(kept) < RESULTS_CAP:
+                kept.extend(results[:RESULTS_CAP - len(kept)])
+    except ValueError as e:
+        if stored is not None:
+            stored.fail(str(e))
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print("Streaming analyze error:", e)
+        if stored is not None:
+            stored.fail(str(e))
+        return jsonify({"error": "Failed during analysis", "details": str(e)}), 500
+    finally:
+        fileobj.close()
+    save_duplicate_index(index, kept)
+    if stored is not None:
+        stored.finish(summary.as_dict())
+    return _file_response(summary, kept, handle, out, stored)
+
+def run_file_analysis(s3_key: str, on_start, on_chunk, on_done, fmt: Optional[str] = None) -> None:
+    """
+    Analyze an S3 file chunk by chunk for an async job (see utils.jobs).
+    Callbacks: on_start(total_bytes, model_version), on_chunk(results, bytes_read)
+    after every STREAM_CHUNK_ROWS rows, on_done(summary).
+    """
+    if not AWS_BUCKET:
+        raise RuntimeError("Server missing AWS_S3_BUCKET environment variable")
+    upload = _open_upload(s3_key, fmt)
+    handle = current_model()
+    on_start(upload.size, handle.version)
+
+    index = duplicate_index()
+    summary = RunningSummary(index)
+    try:
+        for results in iter_analyzed_chunks(upload.fileobj, handle=handle, fmt=upload.fmt, index=index):
+            summary.update(results)
+            on_chunk(results, upload.bytes_read())
+    finally:
+        upload.fileobj.close()
+    save_duplicate_index(index)
+    on_done(summary.as_dict())
+
+_job_store: Optional[JobStore] = None
+_job_store_pid: Optional[int] = None
+_job_runner: Optional[JobRunner] = None
+_job_runner_pid: Optional[int] = None
+_last_purge = 0.0
+
+def job_store() -> JobStore:
+    """Per-process handle on the job/result SQLite file; prunes expired results about hourly."""
+    global _job_store, _job_store_pid, _last_purge
+    if _job_store is None or _job_store_pid != os.getpid():
+        _job_store = JobStore(JOB_DB_PATH)
+        _job_store_pid = os.getpid()
+    if RESULTS_RETENTION_SECONDS > 0 and time.time() - _last_purge > 3600:
+        _last_purge = time.time()
+        _job_store.purge(_last_purge - RESULTS_RETENTION_SECONDS)
+    return _job_store
+
+def job_runner() -> JobRunner:
+    """Per-process job pool (created lazily; resumes unfinished jobs on creation)."""
+    global _job_runner, _job_runner_pid
+    if _job_runner is None or _job_runner_pid != os.getpid():
+        _job_runner = JobRunner(job_store(), max_workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE,
+                                start_method=JOB_START_METHOD)
+        _job_runner_pid = os.getpid()
+        _job_runner.resume()
+    return _job_runner
+
+@app.before_request
+def _resume_jobs():
+    if JOB_RESUME_ON_START and _job_runner_pid != os.getpid():
+        try:
+            job_runner()
+        except Exception as e:
+            print("Failed to resume analysis jobs:", e)
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """
+    Queue an S3 file for background analysis.
+    Expects JSON: { "s3_key": "uploads/xxx.csv", "format": null }; returns 202 with a job id.
+    """
+    data = request.get_json(force=True, silent=True) or {}
+    s3_key = data.get("s3_key", None)
+    if not s3_key:
+        return jsonify({"error": "Missing 's3_key' in request body"}), 400
+    if not AWS_BUCKET:
+        return jsonify({"error": "Server missing AWS_S3_BUCKET environment variable"}), 500
+    fmt = data.get("format")
+    if fmt is not None and fmt not in FORMATS:
+        return jsonify({"error": f"Unsupported format, expected one of {list(FORMATS)}"}), 400
+
+    runner = job_runner()
+    job_id = runner.store.create(s3_key, fmt=fmt, max_active=JOB_QUEUE_SIZE)
+    if job_id is None:
+        return jsonify({"error": "Job queue is full, retry later"}), 503
+    if not runner.submit(job_id):
+        runner.store.fail(job_id, "Job queue is full")
+        return jsonify({"error": "Job queue is full, retry later"}), 503
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Job status and progress (rows done, rows/sec, ETA); includes the summary when done."""
+    job = job_store().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_progress(job))
+
+def _encode_cursor(position: int) -> str:
+    return base64.urlsafe_b64encode(f"r{position}".encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        if not raw.startswith("r"):
+            raise ValueError
+        return max(0, int(raw[1:]))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _results_page(job_id: str, not_found: str):
+    """
+    One page of stored per-row results: ?cursor= (or ?offset=) and ?limit=,
+    plus the output/fields/encoding options. Rows are keyed by position, so
+    a cursor stays valid while a job is still appending.
+    """
+    store = job_store()
+    job = store.get(job_id)
+    if job is None:
+        return jsonify({"error": not_found}), 404
+    try:
+        out = _output_format({})
+        cursor = request.args.get("cursor")
+        offset = _decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        if offset is None:
+            offset = max(0, int(request.args.get("offset", 0)))
+        limit = min(JOB_RESULTS_PAGE_MAX, max(1, int(request.args.get("limit", 100))))
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers"}), 400
+    results = store.results(job_id, offset, limit)
+    next_offset = offset + len(results)
+    has_more = next_offset < job["rows_done"] or job["status"] in ("queued", "running")
+    return _respond({
+        "job_id": job_id,
+        "status": job["status"],
+        "offset": offset,
+        **rows_payload(results, out),
+        "next_offset": next_offset if has_more else None,
+        "next_cursor": _encode_cursor(next_offset) if has_more else None,
+    }, out)
+
+@app.route("/jobs/<job_id>/results", methods=["GET"])
+def get_job_results(job_id):
+    """Per-row results of a job, paginated with ?cursor= (or ?offset=0) and &limit=100."""
+    return _results_page(job_id, "Job not found")
+
+class StoredResults:
+    """Server-side copy of one synchronous /analyze-file result set (a finished job without a worker)."""
+
+    def __init__(self, s3_key: str, model_version: str):
+        self.store = job_store()
+        self.id = self.store.create(s3_key, running=True)
+        self.store.set_total_bytes(self.id, None, model_version)
+
+    def append(self, results: List[dict]) -> None:
+        self.store.append_results(self.id, results, 0)
+
+    def finish(self, summary: dict) -> None:
+        self.store.finish(self.id, summary)
+
+    def fail(self, error: str) -> None:
+        self.store.fail(self.id, error)
+
+@app.route("/results/<result_id>", methods=["GET"])
+def get_stored_results(result_id):
+    """Every row of a stored /analyze-file result, page by page: ?cursor=<next_cursor>&limit=100."""
+    return _results_page(result_id, "Result not found")
+
 @app.route("/analyze-file", methods=["POST"])
 def analyze_file():
     """
-    Analyze a CSV file stored in S3.
+    Analyze a review file stored in S3.
     Expects JSON: { "s3_key": "uploads/xxx.csv" }
-    CSV should contain a review text column (detected flexibly).
+    CSV, JSON Lines (optionally .gz/.zst), Parquet and Arrow/Feather files are
+    accepted; the format comes from the key's extension or "format" (one of
+    utils.readers.FORMATS). The file should contain a review text column
+    (detected flexibly); only that column is parsed.
+
+    Optional: "stream": true parses and analyzes the file chunk by chunk with
+    bounded memory; "output": "ndjson" (implies stream) sends every per-row
+    result back as NDJSON followed by a final {"summary": ...} line;
+    "output": "columnar" / "fields" / "encoding" pick the response shape;
+    "store": true (off by default) keeps every row, review text included,
+    server-side and returns a "result_id" and "next_cursor" for
+    GET /results/<result_id> (no RESULTS_CAP limit there); stored rows are
+    deleted (checked about hourly) RESULTS_RETENTION_SECONDS after the
+    analysis finished;
+    "async": true queues a background job instead (same as POST /jobs).
     """
     data = request.get_json(force=True, silent=True) or {}
     s3_key = data.get("s3_key", None)
@@ -178,52 +1274,74 @@ def analyze_file():
     if not AWS_BUCKET:
         return jsonify({"error": "Server missing AWS_S3_BUCKET environment variable"}, 500)
 
-    # setup boto3 client
-    s3 = boto3.client("s3", region_name=AWS_REGION)
+    if data.get("async"):
+        return submit_job()
+    if not warmup.wait(WARMUP_WAIT_SECONDS):
+        return _not_ready()
+
+    fmt = data.get("format")
+    if fmt is not None and fmt not in FORMATS:
+        return jsonify({"error": f"Unsupported format, expected one of {list(FORMATS)}"}), 400
+    try:
+        out = _output_format(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    ndjson = data.get("output") == "ndjson"
+    stream = bool(data.get("stream")) or ndjson
+
+    if stream:
+        try:
+            upload = _open_upload(s3_key, fmt)
+        except Exception as e:
+            print("S3 read error:", e)
+            return jsonify({"error": "Failed to read file from S3", "details": str(e)}), 500
+        stored = StoredResults(s3_key, current_model().version) if data.get("store") else None
+        return _analyze_file_streaming(upload, ndjson, out, stored)
 
     try:
-        obj = s3.get_object(Bucket=AWS_BUCKET, Key=s3_key)
-        raw = obj["Body"].read()
-        # read into pandas (flexibly)
-        df = pd.read_csv(io.BytesIO(raw), low_memory=False)
+        # whole object into a mapped buffer (parallel ranged GETs when large)
+        upload = _open_upload(s3_key, fmt, stream=False)
+        try:
+            # parse only the detected text column
+            with metrics.stage("file_parse"):
+                texts = [t for chunk in iter_text_chunks(upload.fileobj, upload.fmt, STREAM_CHUNK_ROWS) for t in chunk]
+        finally:
+            upload.fileobj.close()
+        metrics.FILE_ROWS.inc(len(texts))
+    except ValueError as e:
+        # no text-like column
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print("S3 read error:", e)
         return jsonify({"error": "Failed to read file from S3", "details": str(e)}), 500
 
-    # detect review text column
-    possible_text_cols = ["text", "text_", "review", "review_text", "reviewText", "content", "body", "reviewBody"]
-    text_col = next((c for c in possible_text_cols if c in df.columns), None)
-    if text_col is None:
-        # fallback: pick the object column with largest avg length
-        obj_cols = [c for c in df.columns if df[c].dtype == object]
-        if obj_cols:
-            avg_len = {c: df[c].astype(str).map(len).mean() for c in obj_cols}
-            text_col = max(avg_len, key=avg_len.get)
-            print(f"Fallback chosen text column: {text_col}")
-        else:
-            return jsonify({"error": "CSV must contain a text-like column (e.g. 'text' or 'text_')"}), 400
-
-    texts = df[text_col].astype(str).tolist()
+    handle = current_model()
+    index = duplicate_index()
     try:
-        results = analyze_batch(texts)
+        results = analyze_batch(texts, handle=handle, index=index)
     except Exception as e:
         print("Batch analyze error:", e)
         return jsonify({"error": "Failed during analysis", "details": str(e)}), 500
+    save_duplicate_index(index, results)
 
     # prepare summary
-    total = len(results)
-    suspicious = sum(1 for r in results if r["label"] == "suspicious")
-    avg_sent = sum(r["sentiment"] for r in results) / total if total else 0.0
-
-    summary = {
-        "total_reviews": total,
-        "suspicious": suspicious,
-        "suspicious_rate": suspicious / total if total else 0.0,
-        "avg_sentiment": avg_sent
-    }
+    summary = RunningSummary(index)
+    summary.update(results)
+
+    stored = None
+    if data.get("store"):
+        stored = StoredResults(s3_key, handle.version)
+        for start in range(0, len(results), STREAM_CHUNK_ROWS):
+            stored.append(results[start:start + STREAM_CHUNK_ROWS])
+        stored.finish(summary.as_dict())
+
+    # cap results to avoid huge payloads
+    return _file_response(summary, results[:RESULTS_CAP], handle, out, stored)
 
-    # cap results to 500 items to avoid huge payloads
-    return jsonify({"summary": summary, "results": results[:500]})
+if WARMUP_ON_START:
+    # module is fully defined now: load the model and warm up in the background
+    warmup.start()
 
 if __name__ == "__main__":
     # Optionally set debug to False for production
@@ -0,0 +1,163 @@
+# mlserver/asgi.py
+"""
+ASGI entry point for the ML service: same endpoints as app.py, with
+concurrent /analyze calls micro-batched.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+
+POST /analyze requests are queued and scored together (utils.batching): a
+batch closes BATCH_MAX_WAIT_MS after its first request or once it holds
+BATCH_MAX_REVIEWS reviews, runs one analyze_batch (one model call per
+PREDICT_BATCH_SIZE rows) over the combined reviews, and each request gets
+its own slice back. Near-duplicate clusters stay per request, as in app.py.
+With BATCH_MAX_PENDING reviews already queued or in flight, /analyze
+answers 503 with Retry-After instead of queueing more.
+
+Every other route is the Flask app, served through a WSGI adapter.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+import app as service
+from utils import metrics
+from utils.batching import MicroBatcher, QueueFull
+from utils.encoding import MSGPACK_MIMETYPE, pack_msgpack
+
+# a batch closes after this many ms or reviews, whichever comes first
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", 5))
+BATCH_MAX_REVIEWS = max(1, int(os.getenv("BATCH_MAX_REVIEWS", 256)))
+# reviews queued + in flight before /analyze answers 503
+BATCH_MAX_PENDING = max(1, int(os.getenv("BATCH_MAX_PENDING", 4096)))
+# batches scored concurrently (threads; the model call releases the GIL in NumPy)
+BATCH_WORKERS = max(1, int(os.getenv("BATCH_WORKERS", 1)))
+RETRY_AFTER_SECONDS = 1
+
+
+def _score_batch(batch: List[List[str]]) -> List[Tuple[str, List[dict], float, int]]:
+    """
+    One analyze_batch over every queued request's reviews. Returns, per
+    request: (model_version, results, batch seconds, batch reviews).
+    """
+    started = time.perf_counter()
+    handle = service.current_model()
+    combined = [review for reviews in batch for review in reviews]
+    results = service.analyze_batch(combined, handle=handle)
+    seconds = time.perf_counter() - started
+
+    out, start = [], 0
+    for reviews in batch:
+        part = results[start:start + len(reviews)]
+        start += len(reviews)
+        if service.DEDUP_ENABLED:
+            part = [{**r, **c} for r, c in zip(part, service.request_clusters(reviews))]
+        out.append((handle.version, part, seconds, len(combined)))
+    return out
+
+
+batcher = MicroBatcher(
+    _score_batch,
+    max_batch=BATCH_MAX_REVIEWS,
+    max_wait=BATCH_MAX_WAIT_MS / 1000.0,
+    max_pending=BATCH_MAX_PENDING,
+    workers=BATCH_WORKERS,
+)
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    service.warmup.start()
+    batcher.start()
+    yield
+    await batcher.stop()
+
+
+app = FastAPI(title="Review Guardian ML", lifespan=lifespan, docs_url=None, redoc_url=None, openapi_url=None)
+
+
+def _error(message: str, status: int, **extra) -> JSONResponse:
+    return JSONResponse({"error": message, **extra}, status_code=status)
+
+
+async def _warmed_up(timeout: float) -> bool:
+    """Wait for the background warmup without tying up a thread per waiting request."""
+    service.warmup.start()
+    deadline = time.perf_counter() + timeout
+    while not service.warmup.done.is_set():
+        if time.perf_counter() >= deadline:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+
+@app.post("/analyze")
+async def analyze(request: Request):
+    """Same contract as app.py's /analyze; the reviews are scored in a shared micro-batch."""
+    started = time.perf_counter()
+    try:
+        try:
+            data = await request.json()
+        except Exception:
+            data = {}
+        data = data if isinstance(data, dict) else {}
+        reviews = data.get("reviews", [])
+        if not isinstance(reviews, list) or len(reviews) == 0:
+            return _error("Field 'reviews' must be a non-empty list", 400)
+
+        try:
+            out = service.output_format(data, request.query_params, request.headers.get("accept"))
+        except ValueError as e:
+            return _error(str(e), 400)
+        if not await _warmed_up(service.WARMUP_WAIT_SECONDS):
+            return JSONResponse(
+                {"error": "Model is still warming up, retry shortly", "state": service.warmup.state},
+                status_code=503, headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+
+        try:
+            version, results, batch_seconds, batch_reviews = await batcher.submit(reviews, size=len(reviews))
+        except QueueFull:
+            return JSONResponse(
+                {"error": "Server busy, retry later"}, status_code=503,
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+        except Exception as e:
+            print("Analyze error:", e)
+            return _error("Internal analyze error", 500, details=str(e))
+
+        payload = {**service.rows_payload(results, out), "model_version": version}
+        if service.wants_timings(data, request.query_params):
+            waited = time.perf_counter() - started - batch_seconds
+            payload["timings"] = service.timings_payload(
+                {"batch_wait": waited, "batch": batch_seconds}, started, batch_reviews=batch_reviews,
+            )
+        if out.msgpack:
+            return Response(pack_msgpack(payload), media_type=MSGPACK_MIMETYPE)
+        return JSONResponse(payload)
+    finally:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="/analyze")
+
+
+def _wsgi(flask_app):
+    try:
+        from a2wsgi import WSGIMiddleware
+    except ImportError:
+        # deprecated in newer Starlette, still fine as a fallback
+        from starlette.middleware.wsgi import WSGIMiddleware
+    return WSGIMiddleware(flask_app)
+
+
+# everything else (/analyze-file, /jobs, /results, /metrics, /model, ...) is the Flask app
+app.mount("/", _wsgi(service.app))
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", 5001)))
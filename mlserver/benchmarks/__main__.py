@@ -0,0 +1,53 @@
+# mlserver/benchmarks/__main__.py
+"""
+Full benchmark suite: analyze_batch stage timings, training timings, an
+in-process load replay and the cold-start report, written as one JSON report.
+
+    python -m benchmarks --sizes 1000,10000 --train-sizes 5000 --replay-n 20000 --out bench/HEAD.json
+    python -m benchmarks.compare bench/base.json bench/HEAD.json
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import environment, parse_sizes, peak_rss_mb, write_report
+from benchmarks.corpus import generate_reviews, write_csv, write_request_log
+from benchmarks.imports import cold_start_report
+from benchmarks.replay import install_local_s3, isolated_state, load_log, replay, _in_process_sender
+from benchmarks.stages import bench_analyze, bench_training
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=parse_sizes, default=[1000, 10000])
+    parser.add_argument("--train-sizes", type=parse_sizes, default=[5000])
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--replay-n", type=int, default=10000)
+    parser.add_argument("--file-rows", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "cold_start": cold_start_report()}
+
+    import app
+    # dedup index, job DB and result cache in the temp dir (bench_analyze also clears the cache)
+    with tempfile.TemporaryDirectory() as tmp, isolated_state(app, tmp):
+        tmp = Path(tmp)
+        report["analyze"] = bench_analyze(args.sizes, args.duplicate_rate)
+        if args.train_sizes:
+            report["train"] = bench_training(args.train_sizes, args.duplicate_rate)
+        write_csv(generate_reviews(args.file_rows, duplicate_rate=args.duplicate_rate, seed=11),
+                  tmp / "s3" / "uploads" / "bench.csv")
+        log = write_request_log(generate_reviews(args.replay_n, duplicate_rate=args.duplicate_rate),
+                                tmp / "requests.jsonl", file_keys=("uploads/bench.csv",))
+        install_local_s3(app, tmp / "s3")
+        report["replay"] = replay(load_log(log), args.concurrency, _in_process_sender(app))
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    write_report(report, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# mlserver/benchmarks/common.py
+"""Shared helpers for the benchmark suite: timers, percentiles, RSS, JSON output."""
+
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def latency_stats(latencies_s: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max in milliseconds."""
+    if not latencies_s:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0, "max_ms": 0.0}
+    ms = np.asarray(latencies_s, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "mean_ms": float(ms.mean()),
+        "max_ms": float(ms.max()),
+    }
+
+
+@contextmanager
+def timed(into: Dict[str, float], name: str):
+    """Accumulate wall time of the block into into[name] (seconds)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        into[name] = into.get(name, 0.0) + time.perf_counter() - start
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment() -> dict:
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_report(report: dict, out: Optional[Path]) -> None:
+    """Print the JSON report and optionally save it (for diffing between commits)."""
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if out is not None:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(text + "\n")
+        print(f"Wrote {out}", file=sys.stderr)
+    print(text)
+
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
@@ -0,0 +1,60 @@
+# mlserver/benchmarks/compare.py
+"""
+Compare two benchmark JSON reports (e.g. from two commits) and flag
+regressions in throughput, latency and peak RSS.
+
+    python -m benchmarks.compare base.json head.json [--threshold 0.1]
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+# metric name fragments where a larger value is worse
+_HIGHER_IS_WORSE = ("_ms", "seconds", "rss")
+
+
+def _flatten(value, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(value, dict):
+        for key, sub in value.items():
+            if key != "environment":
+                yield from _flatten(sub, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            # benchmark rows are keyed by their size
+            label = f"rows={item['rows']}" if isinstance(item, dict) and "rows" in item else str(i)
+            yield from _flatten(item, f"{prefix}[{label}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, float(value)
+
+
+def compare(base: Dict, head: Dict, threshold: float) -> int:
+    base_metrics = dict(_flatten(base))
+    regressions = 0
+    for name, new in _flatten(head):
+        old = base_metrics.get(name)
+        if old is None or old == 0 or name.endswith(("rows", "requests", "concurrency", "duplicate_rate")):
+            continue
+        change = (new - old) / abs(old)
+        worse = change > threshold if any(t in name for t in _HIGHER_IS_WORSE) else change < -threshold
+        marker = "REGRESSION" if worse else ""
+        regressions += int(worse)
+        print(f"{name:70s} {old:14.3f} -> {new:14.3f} ({change:+7.1%}) {marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    regressions = compare(json.loads(args.base.read_text()), json.loads(args.head.read_text()), args.threshold)
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
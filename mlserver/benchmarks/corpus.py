@@ -0,0 +1,126 @@
+# mlserver/benchmarks/corpus.py
+"""
+Synthetic review corpora for benchmarks.
+
+Reviews are assembled from sentiment phrases, product nouns and filler, with
+templated "spam" reviews labelled fake. A configurable share of rows are
+exact or near-exact copies of earlier rows, like real marketplace feeds.
+
+    python -m benchmarks.corpus --n 100000 --duplicate-rate 0.2 --csv /tmp/reviews.csv
+"""
+
+import argparse
+import csv
+import json
+import random
+from pathlib import Path
+from typing import List, Tuple
+
+PRODUCTS = ["phone", "charger", "case", "headphones", "blender", "shoes", "jacket", "lamp", "watch", "backpack",
+            "keyboard", "mouse", "kettle", "pillow", "camera", "speaker", "tent", "bottle", "book", "toy"]
+POSITIVE = ["great", "excellent", "really good", "amazing", "works perfectly", "very comfortable", "love it",
+            "fast shipping", "good value", "well made", "exactly as described", "happy with it"]
+NEGATIVE = ["terrible", "broke after a week", "not good", "very disappointing", "cheap plastic", "stopped working",
+            "poor quality", "never again", "does not fit", "arrived damaged", "waste of money", "too small"]
+FILLER = ["I bought this for my sister", "after using it for a month", "the packaging was fine",
+          "compared to my old one", "for the price", "honestly", "to be fair", "the seller responded quickly",
+          "my kids use it daily", "it took a while to arrive", "the color is nice", "battery life is ok"]
+SPAM_TEMPLATES = [
+    "Best {p} ever!!! Five stars, highly recommend, buy now!!!",
+    "AMAZING {p}!!! Must buy, {pos}, {pos}, {pos}!!!",
+    "This {p} is perfect perfect perfect. Great seller. Check my profile for discount codes.",
+    "{pos} {p}. {pos}. Would buy again 100% :)",
+]
+
+
+def _genuine(rng: random.Random) -> str:
+    product = rng.choice(PRODUCTS)
+    parts = [f"The {product} is {rng.choice(POSITIVE if rng.random() < 0.65 else NEGATIVE)}."]
+    for _ in range(rng.randint(0, 4)):
+        tone = POSITIVE if rng.random() < 0.5 else NEGATIVE
+        parts.append(f"{rng.choice(FILLER).capitalize()}, {rng.choice(tone)}.")
+    return " ".join(parts)
+
+
+def _spam(rng: random.Random) -> str:
+    return rng.choice(SPAM_TEMPLATES).format(p=rng.choice(PRODUCTS), pos=rng.choice(POSITIVE))
+
+
+def _near_copy(rng: random.Random, text: str) -> str:
+    """Exact copy, or a light edit (case, punctuation, one extra word)."""
+    edit = rng.random()
+    if edit < 0.5:
+        return text
+    if edit < 0.7:
+        return text.lower()
+    if edit < 0.85:
+        return text.rstrip(".!") + "!!"
+    return f"{text} {rng.choice(['Thanks.', 'Recommended.', 'OK.'])}"
+
+
+def generate_reviews(n: int, duplicate_rate: float = 0.1, spam_rate: float = 0.3, seed: int = 7) -> List[Tuple[str, int]]:
+    """(text, label) rows; label 1 = fake/templated, 0 = genuine."""
+    rng = random.Random(seed)
+    rows: List[Tuple[str, int]] = []
+    for _ in range(n):
+        if rows and rng.random() < duplicate_rate:
+            text, label = rng.choice(rows)
+            rows.append((_near_copy(rng, text), label))
+        elif rng.random() < spam_rate:
+            rows.append((_spam(rng), 1))
+        else:
+            rows.append((_genuine(rng), 0))
+    return rows
+
+
+def write_csv(rows: List[Tuple[str, int]], path: Path, extra_columns: int = 0) -> Path:
+    """CSV with 'text' and 'label' columns (plus optional filler columns to mimic wide exports)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "text", "label"] + [f"col{i}" for i in range(extra_columns)])
+        for i, (text, label) in enumerate(rows):
+            writer.writerow([i, text, label] + [f"v{i % 97}"] * extra_columns)
+    return path
+
+
+def write_request_log(rows: List[Tuple[str, int]], path: Path, reviews_per_request: int = 3,
+                      file_keys: Tuple[str, ...] = (), seed: int = 7) -> Path:
+    """
+    Request log for benchmarks.replay: one JSON object per line,
+    {"endpoint": "/analyze", "body": {"reviews": [...]}} or
+    {"endpoint": "/analyze-file", "body": {"s3_key": ...}}.
+    """
+    rng = random.Random(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for start in range(0, len(rows), reviews_per_request):
+            batch = [text for text, _ in rows[start:start + reviews_per_request]]
+            f.write(json.dumps({"endpoint": "/analyze", "body": {"reviews": batch}}) + "\n")
+            if file_keys and rng.random() < 0.01:
+                f.write(json.dumps({"endpoint": "/analyze-file", "body": {"s3_key": rng.choice(file_keys)}}) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=10000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--spam-rate", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--extra-columns", type=int, default=0)
+    parser.add_argument("--csv", type=Path, help="write a text,label CSV here")
+    parser.add_argument("--requests", type=Path, help="write a replay request log here")
+    args = parser.parse_args()
+
+    rows = generate_reviews(args.n, args.duplicate_rate, args.spam_rate, args.seed)
+    if args.csv:
+        write_csv(rows, args.csv, args.extra_columns)
+        print("Wrote", args.csv)
+    if args.requests:
+        write_request_log(rows, args.requests, seed=args.seed)
+        print("Wrote", args.requests)
+
+
+if __name__ == "__main__":
+    main()
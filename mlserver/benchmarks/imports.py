@@ -0,0 +1,129 @@
+# mlserver/benchmarks/imports.py
+"""
+Cold-start report: import time of the service, which heavy modules each
+path pulls in, and how long until /ready.
+
+Every measurement runs in a fresh interpreter (`python -X importtime`), so
+nothing already imported by this process skews it.
+
+    python -m benchmarks.imports --out bench/imports.json
+    python -m benchmarks.imports --budget-ms 600   # exit 1 above budget or on a heavy /analyze import
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.common import environment, write_report
+
+ROOT = Path(__file__).resolve().parent.parent
+# imported lazily on purpose; the analyze path must not need these
+HEAVY_MODULES = ("pandas", "pyarrow", "boto3", "botocore", "sklearn", "scipy", "joblib", "textblob", "nltk")
+FORBIDDEN_ON_ANALYZE = ("pandas", "pyarrow", "boto3", "botocore")
+
+_ANALYZE_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+ready = client.get("/ready")
+status = client.post("/analyze", json={"reviews": ["Great product, would buy again!"]}).status_code
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_analyze_ms": (done - imported) * 1000,
+    "first_ready_status": ready.status_code,
+    "analyze_status": status,
+    "heavy_modules": sorted(m for m in %r if m in sys.modules),
+}))
+"""
+
+_READY_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import app
+app.warmup.wait()
+print(json.dumps({"ready_ms": (time.perf_counter() - started) * 1000, "state": app.warmup.state}))
+"""
+
+
+def _run(args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": str(ROOT), **(env or {})},
+    )
+
+
+def _last_json_line(stdout: str) -> dict:
+    # the service prints progress lines before the report
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def import_times(module: str = "app", top: int = 15) -> dict:
+    """Parse `-X importtime` for `import module`: total plus the slowest packages (cumulative ms)."""
+    proc = _run(["-X", "importtime", "-c", f"import {module}"], env={"WARMUP_ON_START": "0"})
+    cumulative: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cum_us, name = line[len("import time:"):].split("|")
+            cumulative[name.strip()] = int(cum_us) / 1000.0
+        except ValueError:
+            # the header line
+            continue
+    top_level = {name: ms for name, ms in cumulative.items() if "." not in name}
+    slowest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "total_ms": cumulative.get(module, 0.0),
+        "slowest": {name: round(ms, 3) for name, ms in slowest},
+        "heavy_modules": sorted(m for m in HEAVY_MODULES if m in cumulative),
+    }
+
+
+def analyze_path() -> dict:
+    """Modules pulled in by importing app and answering one /analyze call."""
+    return _last_json_line(_run(["-c", _ANALYZE_SCRIPT % (HEAVY_MODULES,)], env={"WARMUP_ON_START": "0"}).stdout)
+
+
+def time_to_ready() -> dict:
+    """Process start to finished background warmup (model load + warmup inference)."""
+    return _last_json_line(_run(["-c", _READY_SCRIPT]).stdout)
+
+
+def cold_start_report(top: int = 15) -> dict:
+    return {"import": import_times(top=top), "analyze_path": analyze_path(), "ready": time_to_ready()}
+
+
+def violations(report: dict, budget_ms: Optional[float]) -> List[str]:
+    found = [
+        f"/analyze imported {m}" for m in report["analyze_path"]["heavy_modules"] if m in FORBIDDEN_ON_ANALYZE
+    ]
+    if budget_ms is not None and report["import"]["total_ms"] > budget_ms:
+        found.append(f"import app took {report['import']['total_ms']:.1f}ms (budget {budget_ms:.0f}ms)")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float)
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "cold_start": cold_start_report(args.top)}
+    problems = violations(report["cold_start"], args.budget_ms)
+    report["violations"] = problems
+    write_report(report, args.out)
+    for problem in problems:
+        print("FAIL:", problem, file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+# mlserver/benchmarks/replay.py
+"""
+Replay a request log against /analyze and /analyze-file at a target
+concurrency, with S3 replaced by a local directory stub.
+
+Log format (one JSON object per line, see benchmarks.corpus.write_request_log):
+    {"endpoint": "/analyze", "body": {"reviews": ["..."]}}
+    {"endpoint": "/analyze-file", "body": {"s3_key": "uploads/x.csv"}}
+Lines without "endpoint" are treated as request bodies and routed by shape.
+
+    python -m benchmarks.replay --n 20000 --concurrency 8
+    python -m benchmarks.replay --log requests.jsonl --files-dir ./s3 --url http://localhost:5001
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.common import environment, latency_stats, peak_rss_mb, write_report
+from benchmarks.corpus import generate_reviews, write_csv, write_request_log
+
+STUB_BUCKET = "local-benchmark-bucket"
+
+
+class LocalS3:
+    """Minimal boto3 S3 client stand-in serving objects from a local directory."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, Key: str) -> Path:
+        path = (self.root / Key).resolve()
+        if self.root.resolve() not in path.parents or not path.is_file():
+            raise FileNotFoundError(f"NoSuchKey: {Key}")
+        return path
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        return {"ContentLength": self._path(Key).stat().st_size}
+
+    def get_object(self, Bucket: str, Key: str, Range: Optional[str] = None, **kwargs) -> dict:
+        path = self._path(Key)
+        f = open(path, "rb")
+        size = path.stat().st_size
+        if Range:
+            # "bytes=start-end" (inclusive)
+            start, end = (int(v) for v in Range.split("=", 1)[1].split("-"))
+            f.seek(start)
+            body = _RangeBody(f, end - start + 1)
+            return {"Body": body, "ContentLength": end - start + 1}
+        return {"Body": f, "ContentLength": size}
+
+
+class _RangeBody:
+    def __init__(self, f, length: int):
+        self._f = f
+        self._left = length
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        amt = self._left if amt is None or amt < 0 else min(amt, self._left)
+        data = self._f.read(amt)
+        self._left -= len(data)
+        return data
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def install_local_s3(app_module, root: Path) -> LocalS3:
+    """Point the service's S3 accessor at a LocalS3 stub (in-process replay only)."""
+    stub = LocalS3(root)
+    app_module.storage.set_client(stub)
+    app_module.AWS_BUCKET = STUB_BUCKET
+    return stub
+
+
+# app settings that name files a replay writes to, and the lazily created objects built from them
+_STATE_PATHS = ("DEDUP_INDEX_PATH", "JOB_DB_PATH", "RESULT_CACHE_PATH")
+_STATE_OBJECTS = ("result_cache", "_duplicate_index", "_duplicate_index_pid", "_job_store", "_job_store_pid",
+                  "_job_runner", "_job_runner_pid")
+
+
+@contextlib.contextmanager
+def isolated_state(app_module, root: Path):
+    """
+    Point the service's dedup index, job DB and result cache at `root` for
+    the duration (in-process runs only), so synthetic reviews never reach
+    cache/ and one run's clusters do not skew the next; restored afterwards.
+    """
+    root = Path(root)
+    saved = {name: getattr(app_module, name) for name in _STATE_PATHS + _STATE_OBJECTS}
+    saved_env = {name: os.environ.get(name) for name in _STATE_PATHS}
+    try:
+        for name in _STATE_PATHS:
+            path = root / getattr(app_module, name).name
+            setattr(app_module, name, path)
+            # job pool processes import app afresh
+            os.environ[name] = str(path)
+        app_module.result_cache = app_module.create_result_cache(
+            app_module.RESULT_CACHE, app_module.RESULT_CACHE_SIZE, app_module.RESULT_CACHE_TTL,
+            app_module.RESULT_CACHE_PATH,
+        )
+        for name in _STATE_OBJECTS[1:]:
+            setattr(app_module, name, None)
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(app_module, name, value)
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def load_log(path: Path, limit: Optional[int] = None) -> List[Dict]:
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if "endpoint" not in entry:
+                entry = {"endpoint": "/analyze-file" if "s3_key" in entry else "/analyze", "body": entry}
+            entries.append(entry)
+            if limit and len(entries) >= limit:
+                break
+    return entries
+
+
+def _in_process_sender(app_module):
+    local = threading.local()
+
+    def send(endpoint: str, body: dict) -> int:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app_module.app.test_client()
+        resp = client.post(endpoint, json=body)
+        resp.get_data()
+        return resp.status_code
+
+    return send
+
+
+def _http_sender(base_url: str, timeout: float):
+    def send(endpoint: str, body: dict) -> int:
+        req = urllib.request.Request(
+            base_url.rstrip("/") + endpoint,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    return send
+
+
+def replay(entries: List[Dict], concurrency: int, send) -> Dict:
+    """Send every entry with `concurrency` threads; returns throughput and latency stats."""
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    reviews = {"count": 0}
+    lock = threading.Lock()
+
+    def one(entry: Dict) -> None:
+        endpoint = entry["endpoint"]
+        start = time.perf_counter()
+        try:
+            status = send(endpoint, entry["body"])
+        except Exception:
+            status = 599
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.setdefault(endpoint, []).append(elapsed)
+            if status >= 400:
+                errors[endpoint] = errors.get(endpoint, 0) + 1
+            reviews["count"] += len(entry["body"].get("reviews", []))
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, entries))
+    wall = time.perf_counter() - wall_start
+
+    all_latencies = [x for values in latencies.values() for x in values]
+    return {
+        "requests": len(entries),
+        "concurrency": concurrency,
+        "wall_seconds": wall,
+        "requests_per_sec": len(entries) / wall if wall > 0 else None,
+        "reviews_per_sec": reviews["count"] / wall if wall > 0 else None,
+        "latency": latency_stats(all_latencies),
+        "endpoints": {
+            endpoint: {
+                "requests": len(values),
+                "errors": errors.get(endpoint, 0),
+                "latency": latency_stats(values),
+            }
+            for endpoint, values in latencies.items()
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", type=Path, help="request log to replay (default: synthetic)")
+    parser.add_argument("--files-dir", type=Path, help="directory served as the S3 bucket")
+    parser.add_argument("--n", type=int, default=10000, help="synthetic reviews when no --log is given")
+    parser.add_argument("--file-rows", type=int, default=20000, help="rows in the synthetic S3 CSV")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--url", help="replay over HTTP against a running server instead of in-process")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        files_dir = args.files_dir
+        log = args.log
+        if files_dir is None:
+            files_dir = tmp / "s3"
+            write_csv(generate_reviews(args.file_rows, duplicate_rate=args.duplicate_rate, seed=11),
+                      files_dir / "uploads" / "bench.csv")
+        if log is None:
+            log = write_request_log(generate_reviews(args.n, duplicate_rate=args.duplicate_rate), tmp / "requests.jsonl",
+                                    file_keys=("uploads/bench.csv",))
+        entries = load_log(log, args.limit)
+
+        state = contextlib.nullcontext()
+        if args.url:
+            send = _http_sender(args.url, args.timeout)
+            target = args.url
+        else:
+            import app
+            install_local_s3(app, files_dir)
+            send = _in_process_sender(app)
+            target = "in-process"
+            # load the model before the clock starts
+            app.analyze_batch(["warm up"])
+            state = isolated_state(app, tmp)
+
+        with state:
+            report = {"environment": environment(), "target": target, "replay": replay(entries, args.concurrency, send)}
+    write_report(report, args.out)
+
+
+if __name__ == "__main__":
+    main()
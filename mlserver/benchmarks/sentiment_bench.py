@@ -0,0 +1,91 @@
+# mlserver/benchmarks/sentiment_bench.py
+"""
+Parity check and speed comparison: utils.sentiment.get_sentiment_scores vs
+TextBlob(text).sentiment.polarity.
+
+Run from mlserver/:  python -m benchmarks.sentiment_bench [--csv data/reviews.csv] [--n 5000]
+Exits with status 1 if any review differs by more than --tolerance.
+The fixed-sample parity check run by pytest is tests/test_sentiment.py.
+"""
+
+import argparse
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.sentiment import get_sentiment_score, get_sentiment_scores, load_lexicon
+
+# hand-picked cases for negation, intensifiers, "!", emoticons, contractions, abbreviations
+SAMPLE_REVIEWS = [
+    "This product is not good at all!!",
+    "Really bad, never buying again :(",
+    "I don't like it",
+    "Absolutely amazing, very very good :) <3",
+    "It was terribly slow... but okay.",
+    "Not a good deal (!) lol",
+    "U.S. shipping was fast. Mr. Smith helped.",
+    "meh",
+    "",
+    "Great!!! Best purchase ever!",
+    "I can't say it's awful",
+    "no good",
+    "not really good",
+    "really not good",
+    "the \"best\" thing ‘ever’",
+    "wow xD so funny",
+    "Terrible.\n\nWould not recommend.",
+    "extremely disappointing, quite poor quality",
+    "it's fine i guess ;)",
+    "NEVER AGAIN!!!",
+]
+
+
+def build_corpus(n: int, csv_path: Path = None, seed: int = 13) -> list:
+    """Sample reviews plus either rows from a CSV or random lexicon-word reviews."""
+    if csv_path is not None and csv_path.exists():
+        df = pd.read_csv(csv_path, low_memory=False)
+        col = next((c for c in ("text", "text_", "review", "review_text", "reviewText", "content", "body") if c in df.columns), None)
+        if col is not None:
+            return SAMPLE_REVIEWS + df[col].astype(str).head(n).tolist()
+    rng = random.Random(seed)
+    vocab = list(load_lexicon().words) + ["not", "never", "very", "!", "the", "product", "really", ":)", "no", "."]
+    return SAMPLE_REVIEWS + [" ".join(rng.choice(vocab) for _ in range(rng.randint(1, 60))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", type=Path, default=Path("data/reviews.csv"))
+    parser.add_argument("--n", type=int, default=5000)
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    if load_lexicon() is None:
+        raise SystemExit("Sentiment lexicon not available (is textblob installed?)")
+    corpus = build_corpus(args.n, args.csv)
+
+    start = time.perf_counter()
+    expected = np.array([get_sentiment_score(t) for t in corpus])
+    textblob_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = get_sentiment_scores(corpus)
+    batched_s = time.perf_counter() - start
+
+    diff = np.abs(expected - got)
+    bad = np.flatnonzero(diff > args.tolerance)
+    print(f"reviews: {len(corpus)}")
+    print(f"textblob: {textblob_s:.3f}s ({len(corpus) / textblob_s:.0f} reviews/s)")
+    print(f"batched:  {batched_s:.3f}s ({len(corpus) / batched_s:.0f} reviews/s)")
+    print(f"speedup:  {textblob_s / batched_s:.1f}x")
+    print(f"max |diff|: {diff.max() if len(diff) else 0.0:.2e}, mismatches: {len(bad)}")
+    for i in bad[:10]:
+        print(f"  {corpus[i][:80]!r}: textblob={expected[i]:.6f} batched={got[i]:.6f}")
+    if len(bad):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# mlserver/benchmarks/stages.py
+"""
+Per-stage timings of analyze_batch (clean, sentiment, predict, keywords),
+end-to-end analyze_batch with and without the result cache, and
+train_model.train at several data sizes.
+
+    python -m benchmarks.stages --sizes 1000,10000,100000 --train-sizes 2000,20000
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.common import environment, parse_sizes, peak_rss_mb, timed, write_report
+from benchmarks.corpus import generate_reviews, write_csv
+
+
+def bench_analyze(sizes: List[int], duplicate_rate: float, repeat: int = 1) -> List[Dict]:
+    import app
+    from utils.preprocess import process_batch
+    from utils.sentiment import get_sentiment_scores
+
+    handle = app.current_model()
+    # warm up lazy loads (sentiment lexicon, model pages) outside the timings
+    app.analyze_batch(["warm up review, not bad at all!"], handle=handle)
+    out = []
+    for n in sizes:
+        texts = [t for t, _ in generate_reviews(n, duplicate_rate=duplicate_rate)]
+        stages: Dict[str, float] = {}
+        for _ in range(repeat):
+            with timed(stages, "clean"):
+                docs = process_batch(texts)
+            with timed(stages, "sentiment"):
+                get_sentiment_scores([d.raw for d in docs])
+            chunks = []
+            with timed(stages, "predict"):
+                if handle.model is not None:
+                    for start in range(0, len(docs), app.PREDICT_BATCH_SIZE):
+                        chunks.append(app._predict_chunk(handle.model, docs[start:start + app.PREDICT_BATCH_SIZE], handle.suspicious_index))
+            with timed(stages, "keywords"):
+                # top-k from the matrix predict already built (what analyze_batch does)
+                for probs, weights in chunks:
+                    if weights is not None and handle.keywords is not None:
+                        app._chunk_keywords(handle, probs, weights)
+
+            # end to end: cold (no cache) and with a warm in-process cache
+            saved_cache = app.result_cache
+            try:
+                app.result_cache = None
+                with timed(stages, "analyze_batch_nocache"):
+                    app.analyze_batch(texts, handle=handle)
+                if saved_cache is not None:
+                    saved_cache.clear()
+                    app.result_cache = saved_cache
+                    app.analyze_batch(texts, handle=handle)
+                    with timed(stages, "analyze_batch_warm_cache"):
+                        app.analyze_batch(texts, handle=handle)
+            finally:
+                app.result_cache = saved_cache
+
+        per_run = {k: v / repeat for k, v in stages.items()}
+        out.append({
+            "rows": n,
+            "duplicate_rate": duplicate_rate,
+            "model_version": handle.version,
+            "seconds": per_run,
+            "rows_per_sec": {k: (n / v if v > 0 else None) for k, v in per_run.items()},
+            "peak_rss_mb": peak_rss_mb(),
+        })
+        print(f"analyze n={n}: " + ", ".join(f"{k}={v:.3f}s" for k, v in per_run.items()), file=sys.stderr)
+    return out
+
+
+def bench_training(sizes: List[int], duplicate_rate: float) -> List[Dict]:
+    """Time train_model.train on synthetic CSVs; artifacts go to a temp dir, never model/."""
+    from model import train_model
+
+    out = []
+    saved = (train_model.DATA_PATH, train_model.MODEL_PATH, train_model.SCORER_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        try:
+            for n in sizes:
+                train_model.DATA_PATH = write_csv(generate_reviews(n, duplicate_rate=duplicate_rate), tmp / f"reviews_{n}.csv")
+                train_model.MODEL_PATH = tmp / "review_model.pkl"
+                train_model.SCORER_PATH = tmp / "review_model.npz"
+                start = time.perf_counter()
+                # train() is chatty; keep the report clean
+                with contextlib.redirect_stdout(io.StringIO()):
+                    train_model.train(use_cache=False)
+                seconds = time.perf_counter() - start
+                out.append({
+                    "rows": n,
+                    "seconds": seconds,
+                    "rows_per_sec": n / seconds if seconds > 0 else None,
+                    "peak_rss_mb": peak_rss_mb(),
+                })
+                print(f"train n={n}: {seconds:.3f}s", file=sys.stderr)
+        finally:
+            train_model.DATA_PATH, train_model.MODEL_PATH, train_model.SCORER_PATH = saved
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=parse_sizes, default=[1000, 10000])
+    parser.add_argument("--train-sizes", type=parse_sizes, default=[])
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "analyze": bench_analyze(args.sizes, args.duplicate_rate, args.repeat)}
+    if args.train_sizes:
+        report["train"] = bench_training(args.train_sizes, args.duplicate_rate)
+    report["peak_rss_mb"] = peak_rss_mb()
+    write_report(report, args.out)
+
+
+if __name__ == "__main__":
+    main()
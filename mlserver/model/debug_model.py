@@ -1,8 +1,7 @@
 # mlserver/debug_model.py
 from pathlib import Path
 import joblib
-import pandas as pd
-from utils.preprocess import clean_text
+from model.feature_store import FeatureStore
 
 MODEL_PATH = Path("model/review_model.pkl")
 DATA_PATH = Path("data/reviews.csv")
@@ -27,23 +26,19 @@ if clf is not None:
 
 # show a few sample predictions & probabilities from train data
 if DATA_PATH.exists():
-    df = pd.read_csv(DATA_PATH, low_memory=False)
-    # detect text column heuristically
-    text_col = next((c for c in ["text","text_","review","review_text","reviewText","content","body"] if c in df.columns), None)
-    print("Using text column:", text_col)
-    if text_col is None:
-        print("No text column found in dataset.")
-    else:
-        sample = df[text_col].astype(str).head(10).tolist()
-        cleaned = [clean_text(t) for t in sample]
-        proba = pipe.predict_proba(cleaned) if hasattr(pipe, "predict_proba") else None
-        preds = pipe.predict(cleaned)
-        for i, t in enumerate(sample):
-            ptxt = f"pred={preds[i]}"
-            if proba is not None:
-                ptxt += f", proba={proba[i].tolist()}"
-            print(f"--- SAMPLE {i} ---")
-            print(t[:200])
-            print(ptxt)
+    # parsed/cleaned rows are cached by model.feature_store across runs
+    data = FeatureStore().load_dataset(DATA_PATH)
+    print("Using text column:", data.text_col, "label column:", data.label_col)
+    sample = data.raw[:10]
+    cleaned = data.cleaned[:10]
+    proba = pipe.predict_proba(cleaned) if hasattr(pipe, "predict_proba") else None
+    preds = pipe.predict(cleaned)
+    for i, t in enumerate(sample):
+        ptxt = f"pred={preds[i]}, label={data.labels[i]}"
+        if proba is not None:
+            ptxt += f", proba={proba[i].tolist()}"
+        print(f"--- SAMPLE {i} ---")
+        print(t[:200])
+        print(ptxt)
 else:
     print("No dataset found at", DATA_PATH)
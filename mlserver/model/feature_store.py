@@ -0,0 +1,271 @@
+# mlserver/model/feature_store.py
+"""
+On-disk cache of prepared training data for repeated experiments.
+
+Layout (one directory per source file content + preprocessing config):
+    <root>/<dataset key>/dataset.npz           raw + cleaned text, 0/1 labels
+    <root>/<dataset key>/counts-<config>.npz   n-gram counts (CSR) fitted on the train split
+
+The dataset key is the sha256 of the CSV plus PREPROCESS_VERSION, so editing
+the data or clean_text/label mapping (bump the version) invalidates it. Text
+is stored as one utf-8 blob plus offsets, so loading needs no pickle and no
+CSV parsing.
+
+Count matrices hold the full train vocabulary for an ngram_range; any
+max_features is then a column subset plus a TfidfTransformer, which matches
+TfidfVectorizer(max_features=..., ngram_range=...) fitted on the same rows.
+That is what makes grid_search cheap: parse/clean/tokenize happen once.
+
+    python -m model.feature_store --grid        # grid search on data/reviews.csv
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from utils.cache import file_fingerprint
+
+# bump when clean_text, label mapping or the stored layout change
+PREPROCESS_VERSION = 1
+CACHE_DIR = Path("cache/features")
+
+DEFAULT_GRID = {
+    "max_features": [2000, 5000, 20000],
+    "ngram_range": [(1, 1), (1, 2)],
+    "C": [0.3, 1.0, 3.0],
+}
+
+
+class PreparedData(NamedTuple):
+    """Parsed, cleaned and labelled training rows."""
+    key: str
+    raw: List[str]
+    cleaned: List[str]
+    labels: np.ndarray
+    text_col: str
+    label_col: str
+
+
+class CountFeatures(NamedTuple):
+    """n-gram counts for every row, with the vocabulary fitted on train_idx."""
+    counts: sparse.csr_matrix
+    terms: List[str]
+    train_idx: np.ndarray
+    test_idx: np.ndarray
+
+
+def _pack_strings(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+
+def _config_hash(config: dict) -> str:
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def _atomic_savez(path: Path, **arrays) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+class FeatureStore:
+    def __init__(self, root: Union[str, Path] = CACHE_DIR):
+        self.root = Path(root)
+
+    def dataset_key(self, csv_path: Union[str, Path]) -> str:
+        return f"{file_fingerprint(csv_path)}-{_config_hash({'preprocess': PREPROCESS_VERSION})}"
+
+    def load_dataset(self, csv_path: Union[str, Path]) -> PreparedData:
+        """Prepared rows for `csv_path`, from the cache or parsed and cleaned once."""
+        key = self.dataset_key(csv_path)
+        path = self.root / key / "dataset.npz"
+        if path.exists():
+            with np.load(path) as z:
+                meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+                data = PreparedData(
+                    key=key,
+                    raw=_unpack_strings(z["raw_blob"], z["raw_offsets"]),
+                    cleaned=_unpack_strings(z["clean_blob"], z["clean_offsets"]),
+                    labels=z["labels"],
+                    text_col=meta["text_col"],
+                    label_col=meta["label_col"],
+                )
+            print(f"Loaded prepared dataset from cache: {path} ({len(data.labels)} rows)")
+            return data
+
+        # imported here: train_model imports this module
+        from model.train_model import detect_text_label_columns, map_labels_to_binary
+        from utils.preprocess import clean_text
+
+        print("Preparing dataset from:", csv_path)
+        df = pd.read_csv(csv_path, low_memory=False)
+        text_col, label_col = detect_text_label_columns(df)
+        print(f"Using text column: '{text_col}', label column: '{label_col}'")
+        raw = df[text_col].astype(str).tolist()
+        labels = map_labels_to_binary(df[label_col]).to_numpy(dtype=np.int8)
+        cleaned = [clean_text(t) for t in raw]
+
+        raw_blob, raw_offsets = _pack_strings(raw)
+        clean_blob, clean_offsets = _pack_strings(cleaned)
+        meta = json.dumps({"text_col": text_col, "label_col": label_col, "source": str(csv_path)})
+        _atomic_savez(
+            path,
+            raw_blob=raw_blob, raw_offsets=raw_offsets,
+            clean_blob=clean_blob, clean_offsets=clean_offsets,
+            labels=labels, meta=np.frombuffer(meta.encode("utf-8"), dtype=np.uint8),
+        )
+        print(f"Cached prepared dataset to: {path}")
+        return PreparedData(key, raw, cleaned, labels, text_col, label_col)
+
+    def split(self, data: PreparedData, test_size: float = 0.2, random_state: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+        """Row indices of train_model.train's train/test split (same rows, same order)."""
+        from sklearn.model_selection import train_test_split
+
+        stratify = data.labels if len(np.unique(data.labels)) > 1 else None
+        return train_test_split(
+            np.arange(len(data.labels)), test_size=test_size, random_state=random_state, stratify=stratify
+        )
+
+    def count_features(
+        self,
+        data: PreparedData,
+        ngram_range: Tuple[int, int] = (1, 2),
+        test_size: float = 0.2,
+        random_state: int = 42,
+    ) -> CountFeatures:
+        """Cached n-gram count matrix with the vocabulary of the train split."""
+        config = {"ngram_range": list(ngram_range), "test_size": test_size, "random_state": random_state}
+        path = self.root / data.key / f"counts-{_config_hash(config)}.npz"
+        train_idx, test_idx = self.split(data, test_size, random_state)
+        if path.exists():
+            with np.load(path) as z:
+                counts = sparse.csr_matrix((z["data"], z["indices"], z["indptr"]), shape=tuple(z["shape"]))
+                terms = _unpack_strings(z["terms_blob"], z["terms_offsets"])
+            return CountFeatures(counts, terms, train_idx, test_idx)
+
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        start = time.perf_counter()
+        vectorizer = CountVectorizer(ngram_range=tuple(ngram_range))
+        vectorizer.fit([data.cleaned[i] for i in train_idx])
+        counts = vectorizer.transform(data.cleaned).tocsr()
+        terms = vectorizer.get_feature_names_out().tolist()
+        terms_blob, terms_offsets = _pack_strings(terms)
+        _atomic_savez(
+            path,
+            data=counts.data, indices=counts.indices, indptr=counts.indptr, shape=np.array(counts.shape),
+            terms_blob=terms_blob, terms_offsets=terms_offsets,
+        )
+        print(f"Cached {counts.shape[1]} {tuple(ngram_range)} n-gram counts in {time.perf_counter() - start:.1f}s: {path}")
+        return CountFeatures(counts, terms, train_idx, test_idx)
+
+    def clear(self) -> None:
+        import shutil
+
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def tfidf_features(
+    features: CountFeatures, max_features: Optional[int] = None,
+) -> Tuple[sparse.csr_matrix, List[str], np.ndarray]:
+    """
+    TF-IDF matrix for every row, equal to TfidfVectorizer(max_features=...)
+    fitted on the train split: keep the most frequent train terms (same
+    ordering as CountVectorizer._limit_features), then fit idf on train rows.
+    Returns (matrix, terms, idf); terms and idf rebuild the fitted vectorizer
+    (see train_model.train).
+    """
+    from sklearn.feature_extraction.text import TfidfTransformer
+
+    counts = features.counts
+    columns = np.arange(counts.shape[1])
+    if max_features is not None and max_features < counts.shape[1]:
+        term_freq = np.asarray(counts[features.train_idx].sum(axis=0)).ravel()
+        columns = np.sort((-term_freq).argsort()[:max_features])
+    selected = counts[:, columns]
+    transformer = TfidfTransformer().fit(selected[features.train_idx])
+    return transformer.transform(selected).tocsr(), [features.terms[i] for i in columns], transformer.idf_
+
+
+def _fit_and_score(X_train, y_train, X_test, y_test, C: float) -> Tuple[float, float]:
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score
+
+    start = time.perf_counter()
+    clf = LogisticRegression(max_iter=400, solver="liblinear", C=C).fit(X_train, y_train)
+    return accuracy_score(y_test, clf.predict(X_test)), time.perf_counter() - start
+
+
+def grid_search(
+    csv_path: Union[str, Path],
+    grid: Optional[Dict[str, Iterable]] = None,
+    n_jobs: int = -1,
+    store: Optional[FeatureStore] = None,
+    test_size: float = 0.2,
+    random_state: int = 42,
+) -> List[dict]:
+    """
+    Evaluate every max_features x ngram_range x C combination on the cached
+    train/test split; classifier fits run in parallel. Returns results sorted
+    by accuracy (best first).
+    """
+    from joblib import Parallel, delayed
+
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    store = store or FeatureStore()
+    data = store.load_dataset(csv_path)
+
+    jobs, configs = [], []
+    for ngram_range in grid["ngram_range"]:
+        features = store.count_features(data, tuple(ngram_range), test_size, random_state)
+        y_train, y_test = data.labels[features.train_idx], data.labels[features.test_idx]
+        for max_features in grid["max_features"]:
+            X, _, _ = tfidf_features(features, max_features)
+            X_train, X_test = X[features.train_idx], X[features.test_idx]
+            for C in grid["C"]:
+                configs.append({"max_features": max_features, "ngram_range": tuple(ngram_range), "C": C})
+                jobs.append(delayed(_fit_and_score)(X_train, y_train, X_test, y_test, C))
+
+    print(f"Fitting {len(jobs)} configurations...")
+    scores = Parallel(n_jobs=n_jobs)(jobs)
+    results = [
+        {**config, "accuracy": accuracy, "fit_seconds": seconds}
+        for config, (accuracy, seconds) in zip(configs, scores)
+    ]
+    results.sort(key=lambda r: r["accuracy"], reverse=True)
+    for r in results:
+        print(f"  max_features={r['max_features']:<6} ngram_range={r['ngram_range']} C={r['C']:<5} "
+              f"accuracy={r['accuracy']:.4f} ({r['fit_seconds']:.2f}s)")
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    from model.train_model import DATA_PATH
+
+    if "--clear" in sys.argv[1:]:
+        FeatureStore().clear()
+        print("Cleared feature cache:", CACHE_DIR)
+    if "--grid" in sys.argv[1:]:
+        best = grid_search(DATA_PATH)[0]
+        print("Best:", best)
@@ -0,0 +1,216 @@
+# mlserver/model/linear_scorer.py
+"""
+Compiled scorer for the TF-IDF + LogisticRegression pipeline.
+
+`train_model.export_linear_scorer` flattens the fitted pipeline into a small
+.npz file (vocabulary, idf, idf*coef weights, bias, n-gram config). This
+module scores cleaned text from that file with NumPy only, so serving does
+not need to import or unpickle scikit-learn.
+"""
+
+import re
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+# bump when the exported layout changes
+FORMAT_VERSION = 1
+
+# TfidfVectorizer's default token_pattern
+TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")
+
+
+def _npz_member_memmap(path: Union[str, Path], name: str) -> np.ndarray:
+    """
+    Memory-map one array stored uncompressed inside an .npz, so every process
+    that loads the same file shares its pages through the OS page cache.
+    """
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(name + ".npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"{name} is compressed and cannot be memory-mapped")
+    with open(path, "rb") as f:
+        # skip the zip local file header (30 bytes + file name + extra field)
+        f.seek(info.header_offset + 26)
+        name_len, extra_len = np.frombuffer(f.read(4), dtype="<u2")
+        f.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+        major, _ = np.lib.format.read_magic(f)
+        if major == 1:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape, offset=offset,
+                     order="F" if fortran_order else "C")
+
+
+def word_ngrams(tokens: List[str], ngram_range: Tuple[int, int]) -> List[str]:
+    """Same n-gram expansion as sklearn's VectorizerMixin._word_ngrams."""
+    min_n, max_n = ngram_range
+    if max_n == 1:
+        return tokens
+    grams = list(tokens) if min_n == 1 else []
+    n_tokens = len(tokens)
+    for n in range(max(min_n, 2), min(max_n, n_tokens) + 1):
+        for i in range(n_tokens - n + 1):
+            grams.append(" ".join(tokens[i:i + n]))
+    return grams
+
+
+class LinearScorer:
+    """
+    Binary linear text scorer equivalent to
+    Pipeline([TfidfVectorizer(norm="l2", use_idf=True), LogisticRegression]).
+
+    Exposes `classes_` and `predict_proba` so it can stand in for the
+    sklearn pipeline in app.py.
+    """
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        idf: np.ndarray,
+        weights: np.ndarray,
+        bias: float,
+        ngram_range: Tuple[int, int] = (1, 2),
+        classes: Union[np.ndarray, List] = (0, 1),
+        pipeline_fingerprint: Optional[str] = None,
+    ):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.weights = weights
+        self.bias = float(bias)
+        self.ngram_range = (int(ngram_range[0]), int(ngram_range[1]))
+        self.classes_ = np.asarray(classes)
+        # fingerprint of the joblib pipeline this was exported from (None for older files)
+        self.pipeline_fingerprint = pipeline_fingerprint
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = False) -> "LinearScorer":
+        """Load an exported scorer; mmap=True maps the weight arrays read-only."""
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["format_version"])
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported scorer format version {version} (expected {FORMAT_VERSION})")
+            # terms are \w runs joined by spaces, so newline is a safe separator
+            vocab = data["vocab"].tobytes().decode("utf-8").split("\n")
+            if mmap:
+                idf = _npz_member_memmap(path, "idf")
+                weights = _npz_member_memmap(path, "weights")
+            else:
+                idf, weights = data["idf"], data["weights"]
+            return cls(
+                vocabulary={term: i for i, term in enumerate(vocab)},
+                idf=idf,
+                weights=weights,
+                bias=float(data["bias"][0]),
+                ngram_range=tuple(data["ngram_range"].tolist()),
+                classes=data["classes"],
+                pipeline_fingerprint=(
+                    data["pipeline_fingerprint"].tobytes().decode("ascii") if "pipeline_fingerprint" in data else None
+                ),
+            )
+
+    def save(self, path: Union[str, Path]) -> None:
+        vocab = self.feature_names()
+        extra = {}
+        if self.pipeline_fingerprint is not None:
+            extra["pipeline_fingerprint"] = np.frombuffer(self.pipeline_fingerprint.encode("ascii"), dtype=np.uint8)
+        # uncompressed on purpose: members stay directly readable from disk
+        np.savez(
+            path,
+            **extra,
+            format_version=np.array(FORMAT_VERSION, dtype=np.int32),
+            vocab=np.frombuffer("\n".join(vocab).encode("utf-8"), dtype=np.uint8),
+            idf=np.asarray(self.idf, dtype=np.float32),
+            weights=np.asarray(self.weights, dtype=np.float32),
+            bias=np.array([self.bias], dtype=np.float32),
+            ngram_range=np.array(self.ngram_range, dtype=np.int32),
+            classes=self.classes_,
+        )
+
+    def tokenize(self, text: str) -> List[str]:
+        return TOKEN_RE.findall(text.lower())
+
+    def _term_indices(self, token_lists: Iterable[List[str]]) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Flattened (row, vocab index) pairs for every known n-gram per document."""
+        vocab_get = self.vocabulary.get
+        rows: List[int] = []
+        cols: List[int] = []
+        n_docs = 0
+        for row, tokens in enumerate(token_lists):
+            n_docs += 1
+            for gram in word_ngrams(tokens, self.ngram_range):
+                idx = vocab_get(gram)
+                if idx is not None:
+                    rows.append(row)
+                    cols.append(idx)
+        return np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64), n_docs
+
+    def decision_function(self, texts: Iterable[str]) -> np.ndarray:
+        return self.decision_function_tokens(self.tokenize(t) for t in texts)
+
+    def decision_function_tokens(self, token_lists: Iterable[List[str]]) -> np.ndarray:
+        """
+        Score pre-tokenized documents. Tokens must follow the vectorizer's
+        token_pattern (lowercase, 2+ word chars); for clean_text output that is
+        simply the space-split tokens of length >= 2.
+        """
+        return self.decision_function_tfidf(*self.tfidf_tokens(token_lists))
+
+    def tfidf_tokens(self, token_lists: Iterable[List[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """
+        The TfidfVectorizer output for pre-tokenized documents, as COO
+        entries (rows, cols, values, n_docs): one entry per distinct known
+        term per document, values l2-normalized per row.
+        """
+        rows, cols, n_docs = self._term_indices(token_lists)
+        if rows.size == 0:
+            return rows, cols, np.zeros(0, dtype=np.float64), n_docs
+
+        # term counts per (row, col) pair
+        n_features = len(self.idf)
+        keys, counts = np.unique(rows * n_features + cols, return_counts=True)
+        rows, cols = np.divmod(keys, n_features)
+
+        tfidf = counts * self.idf[cols].astype(np.float64)
+        norms = np.sqrt(np.bincount(rows, weights=tfidf * tfidf, minlength=n_docs))
+        # every row with an entry has a positive norm (idf >= 1)
+        return rows, cols, tfidf / norms[rows], n_docs
+
+    def term_contributions(self, cols: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Each tf-idf entry's share of the decision function (tfidf * coef, coef = weights / idf)."""
+        return values * (self.weights[cols].astype(np.float64) / self.idf[cols].astype(np.float64))
+
+    def decision_function_tfidf(self, rows: np.ndarray, cols: np.ndarray, values: np.ndarray, n_docs: int) -> np.ndarray:
+        """Score tf-idf rows from tfidf_tokens, so callers can reuse the matrix (e.g. for keywords)."""
+        scores = np.full(n_docs, self.bias, dtype=np.float64)
+        if rows.size:
+            scores += np.bincount(rows, weights=self.term_contributions(cols, values), minlength=n_docs)
+        return scores
+
+    def feature_names(self) -> List[str]:
+        """Term per feature column (the inverse of `vocabulary`)."""
+        names = [""] * len(self.vocabulary)
+        for term, idx in self.vocabulary.items():
+            names[idx] = term
+        return names
+
+    def predict_proba(self, texts: Iterable[str]) -> np.ndarray:
+        return self._proba(self.decision_function(texts))
+
+    def predict_proba_tokens(self, token_lists: Iterable[List[str]]) -> np.ndarray:
+        return self._proba(self.decision_function_tokens(token_lists))
+
+    def predict_proba_tfidf(self, rows: np.ndarray, cols: np.ndarray, values: np.ndarray, n_docs: int) -> np.ndarray:
+        return self._proba(self.decision_function_tfidf(rows, cols, values, n_docs))
+
+    @staticmethod
+    def _proba(scores: np.ndarray) -> np.ndarray:
+        p = 1.0 / (1.0 + np.exp(-scores))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, texts: Iterable[str]) -> np.ndarray:
+        return self.classes_[(self.decision_function(texts) > 0).astype(int)]
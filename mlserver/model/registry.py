@@ -0,0 +1,144 @@
+# mlserver/model/registry.py
+"""
+Versioned model registry and artifact loading.
+
+Layout:
+    <root>/<version>/review_model.npz   compiled scorer (optional)
+    <root>/<version>/review_model.pkl   joblib pipeline (optional)
+    <root>/CURRENT                      name of the active version
+
+Versions are published into a temp dir and renamed into place, and CURRENT
+is replaced atomically, so a reader never sees a half-written model.
+"""
+
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from model.linear_scorer import LinearScorer
+from utils.cache import file_fingerprint
+
+SCORER_FILE = "review_model.npz"
+PIPELINE_FILE = "review_model.pkl"
+
+
+class LoadedModel(NamedTuple):
+    """An immutable, fully loaded model; requests hold on to the one they started with."""
+    version: str
+    model: Any  # LinearScorer, sklearn pipeline or None (fallback mode)
+    fingerprint: str
+    source: Optional[Path]
+    suspicious_index: int
+    # utils.keywords.KeywordVocab when the model exposes its terms, else None
+    keywords: Any = None
+
+
+def load_artifact(
+    scorer_path: Optional[Path],
+    pipeline_path: Optional[Path],
+    prefer_scorer: bool = True,
+    mmap: bool = True,
+) -> Tuple[Any, Optional[Path]]:
+    """
+    Load the compiled scorer, or the joblib pipeline if available.
+    The scorer is skipped when it was exported from a different pipeline
+    than the one at pipeline_path (e.g. after out-of-core training, whose
+    hashing pipeline cannot be compiled).
+    With mmap=True the numeric arrays are memory-mapped read-only so forked
+    workers share the same physical pages. Returns (model, path) or (None, None).
+    """
+    if prefer_scorer and scorer_path is not None and scorer_path.exists():
+        try:
+            scorer = LinearScorer.load(scorer_path, mmap=mmap)
+            stale = (
+                scorer.pipeline_fingerprint is not None
+                and pipeline_path is not None
+                and pipeline_path.exists()
+                and file_fingerprint(pipeline_path) != scorer.pipeline_fingerprint
+            )
+            if stale:
+                print(f"Compiled scorer {scorer_path} does not match {pipeline_path}, loading the pipeline")
+            else:
+                print("Loaded compiled scorer from", scorer_path)
+                return scorer, scorer_path
+        except Exception as e:
+            print("Failed to load compiled scorer, falling back to pipeline:", e)
+    if pipeline_path is not None and pipeline_path.exists():
+        try:
+            import joblib
+            pipe = joblib.load(pipeline_path, mmap_mode="r" if mmap else None)
+            print("Loaded model from", pipeline_path)
+            return pipe, pipeline_path
+        except Exception as e:
+            print("Failed to load model:", e)
+    else:
+        print("Model file not found at", pipeline_path, "- running in fallback/dummy mode")
+    return None, None
+
+
+class ModelRegistry:
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+
+    @property
+    def current_file(self) -> Path:
+        return self.root / "CURRENT"
+
+    def version_dir(self, version: str) -> Path:
+        # a version is one plain directory name under root, never a path
+        if (not isinstance(version, str) or not version or version.startswith(".")
+                or "/" in version or "\\" in version or version != Path(version).name):
+            raise ValueError(f"Invalid model version name: {version!r}")
+        return self.root / version
+
+    def versions(self) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+    def current_version(self) -> Optional[str]:
+        """Version named in CURRENT, else the newest published version, else None."""
+        try:
+            version = self.current_file.read_text().strip()
+            if version in self.versions():
+                return version
+        except FileNotFoundError:
+            pass
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def paths(self, version: str) -> Tuple[Path, Path]:
+        """(scorer, pipeline) artifact paths for a version."""
+        directory = self.version_dir(version)
+        return directory / SCORER_FILE, directory / PIPELINE_FILE
+
+    def activate(self, version: str) -> None:
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        tmp = self.root / f".CURRENT.{os.getpid()}"
+        tmp.write_text(version + "\n")
+        os.replace(tmp, self.current_file)
+
+    def publish(self, files: Iterable[Union[str, Path]], version: Optional[str] = None, activate: bool = True) -> str:
+        """Copy artifact files into a new version directory (atomically) and optionally activate it."""
+        version = version or time.strftime("%Y%m%d-%H%M%S")
+        target = self.version_dir(version)
+        if target.exists():
+            raise ValueError(f"Model version already exists: {version}")
+        staging = self.root / f".staging-{version}-{os.getpid()}"
+        staging.mkdir(parents=True)
+        try:
+            for f in files:
+                f = Path(f)
+                if f.exists():
+                    shutil.copy2(f, staging / f.name)
+            os.replace(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if activate:
+            self.activate(version)
+        print(f"Published model version {version} to {target}")
+        return version
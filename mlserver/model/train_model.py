@@ -1,23 +1,37 @@
 # mlserver/model/train_model.py
 
+import os
+from multiprocessing import Pool
 from pathlib import Path
 import joblib
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
 # Import project utils (this assumes you run this as a module: `python -m model.train_model`)
 from utils.preprocess import clean_text
+from utils.cache import file_fingerprint
+from model.linear_scorer import LinearScorer
+from model.registry import ModelRegistry
+from model.feature_store import FeatureStore, tfidf_features
 
 # Paths
 DATA_PATH = Path("data/reviews.csv")
 MODEL_DIR = Path("model")
 MODEL_DIR.mkdir(parents=True, exist_ok=True)
 MODEL_PATH = MODEL_DIR / "review_model.pkl"
+SCORER_PATH = MODEL_DIR / "review_model.npz"
+REGISTRY_DIR = MODEL_DIR / "registry"
+# tfidf + logistic regression pipeline
+MAX_FEATURES = 5000
+NGRAM_RANGE = (1, 2)
+# out-of-core mode: rows per CSV chunk and hashed feature space size
+CHUNK_ROWS = 50_000
+HASH_FEATURES = 2 ** 20
 
 
 def detect_text_label_columns(df: pd.DataFrame):
@@ -139,33 +153,113 @@ def load_data():
     return df
 
 
-def build_pipeline(max_features=5000):
+def build_pipeline(max_features=MAX_FEATURES, ngram_range=NGRAM_RANGE):
     pipe = Pipeline(
         [
-            ("tfidf", TfidfVectorizer(max_features=max_features, ngram_range=(1, 2))),
+            ("tfidf", TfidfVectorizer(max_features=max_features, ngram_range=ngram_range)),
             ("clf", LogisticRegression(max_iter=400, solver="liblinear")),
         ]
     )
     return pipe
 
 
-def train(test_size=0.2, random_state=42):
-    df = load_data()
+def export_linear_scorer(pipe, path=SCORER_PATH, check_texts=None, pipeline_path=None):
+    """
+    Flatten a fitted tfidf + logistic regression pipeline into the compact
+    file read by model.linear_scorer (no sklearn needed at serve time).
+    If check_texts is given, verify the exported scorer against the pipeline.
+    pipeline_path (the saved pipeline) is fingerprinted into the file, so the
+    server ignores the scorer once that pipeline is replaced.
+    """
+    tfidf = pipe.named_steps["tfidf"]
+    clf = pipe.named_steps["clf"]
+
+    if tfidf.analyzer != "word" or tfidf.tokenizer is not None or tfidf.preprocessor is not None:
+        raise ValueError("Only the default word analyzer can be exported")
+    if tfidf.token_pattern != r"(?u)\b\w\w+\b" or tfidf.stop_words is not None or tfidf.strip_accents is not None:
+        raise ValueError("Custom token_pattern/stop_words/strip_accents are not supported by the exported scorer")
+    if not tfidf.lowercase or tfidf.binary or tfidf.sublinear_tf or not tfidf.use_idf or tfidf.norm != "l2":
+        raise ValueError("Exported scorer expects lowercase, raw tf, use_idf=True and norm='l2'")
+    if clf.coef_.shape[0] != 1:
+        raise ValueError("Exported scorer only supports binary classifiers")
+
+    idf = tfidf.idf_.astype(np.float32)
+    coef = clf.coef_[0]
+    scorer = LinearScorer(
+        vocabulary={term: int(idx) for term, idx in tfidf.vocabulary_.items()},
+        idf=idf,
+        weights=(tfidf.idf_ * coef).astype(np.float32),
+        bias=float(clf.intercept_[0]),
+        ngram_range=tfidf.ngram_range,
+        classes=clf.classes_,
+        pipeline_fingerprint=file_fingerprint(pipeline_path) if pipeline_path is not None else None,
+    )
+    scorer.save(path)
+    print(f"Saved compiled scorer to: {Path(path).resolve()}")
 
-    X = df["text_clean"].astype(str)
-    y = df["label"].astype(int)
+    if check_texts is not None and len(check_texts):
+        check_texts = list(check_texts)
+        expected = pipe.predict_proba(check_texts)[:, 1]
+        got = LinearScorer.load(path).predict_proba(check_texts)[:, 1]
+        max_err = float(np.max(np.abs(expected - got)))
+        print(f"Compiled scorer max |proba diff| on {len(check_texts)} samples: {max_err:.2e}")
+        if max_err > 1e-4:
+            raise ValueError(f"Compiled scorer diverges from pipeline (max diff {max_err:.2e})")
 
-    # ensure stratify if possible
-    stratify = y if len(y.unique()) > 1 else None
+    return scorer
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=random_state, stratify=stratify
-    )
 
-    print(f"Training on {len(X_train)} samples, validating on {len(X_test)} samples...")
+def _fit_from_cache(test_size, random_state):
+    """
+    Fit the pipeline from model.feature_store's cached n-gram counts: no CSV
+    parsing, cleaning or tokenizing when the data is unchanged. The
+    vectorizer is rebuilt from the cached vocabulary and idf, so the saved
+    pipeline is the same as one fitted on the train texts.
+    """
+    if not DATA_PATH.exists():
+        raise FileNotFoundError(f"Training CSV not found at {DATA_PATH.resolve()}")
+    store = FeatureStore()
+    data = store.load_dataset(DATA_PATH)
+    features = store.count_features(data, NGRAM_RANGE, test_size, random_state)
+    X, terms, idf = tfidf_features(features, MAX_FEATURES)
+    train_idx, test_idx = features.train_idx, features.test_idx
+    y = data.labels.astype(int)
+    print(f"Training on {len(train_idx)} samples, validating on {len(test_idx)} samples (cached features)...")
 
     pipe = build_pipeline()
-    pipe.fit(X_train, y_train)
+    vectorizer = pipe.named_steps["tfidf"]
+    vectorizer.vocabulary_ = {term: i for i, term in enumerate(terms)}
+    vectorizer.idf_ = idf
+    pipe.named_steps["clf"].fit(X[train_idx], y[train_idx])
+
+    X_test = pd.Series([data.cleaned[i] for i in test_idx])
+    # the rebuilt vectorizer must reproduce the cached matrix
+    sample = test_idx[:200]
+    if abs(vectorizer.transform([data.cleaned[i] for i in sample]) - X[sample]).max() > 1e-9:
+        raise ValueError("Cached tf-idf features do not match the vectorizer, clear the feature cache")
+    return pipe, X_test, pd.Series(y[test_idx])
+
+
+def train(test_size=0.2, random_state=42, use_cache=True):
+    if use_cache:
+        # parsed/cleaned/labelled rows and n-gram counts come from model.feature_store when the CSV is unchanged
+        pipe, X_test, y_test = _fit_from_cache(test_size, random_state)
+    else:
+        df = load_data()
+
+        X = df["text_clean"].astype(str)
+        y = df["label"].astype(int)
+
+        # ensure stratify if possible
+        stratify = y if len(y.unique()) > 1 else None
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, random_state=random_state, stratify=stratify
+        )
+        print(f"Training on {len(X_train)} samples, validating on {len(X_test)} samples...")
+
+        pipe = build_pipeline()
+        pipe.fit(X_train, y_train)
 
     # evaluate
     y_pred = pipe.predict(X_test)
@@ -179,15 +273,187 @@ def train(test_size=0.2, random_state=42):
     # Save model
     joblib.dump(pipe, MODEL_PATH)
     print(f"Saved trained pipeline to: {MODEL_PATH.resolve()}")
+    export_linear_scorer(pipe, SCORER_PATH, check_texts=X_test.tolist(), pipeline_path=MODEL_PATH)
 
     return pipe, (X_test, y_test, y_pred, y_proba)
 
 
+# --- out-of-core training ---------------------------------------------------------
+
+def build_streaming_pipeline(n_features=HASH_FEATURES, alpha=1e-5, random_state=42):
+    """
+    Stateless hashing vectorizer + logistic-loss SGD: nothing depends on a
+    fitted vocabulary, so the classifier can be trained chunk by chunk with
+    partial_fit and the result still serves like any other pipeline.
+    """
+    return Pipeline(
+        [
+            ("hashing", HashingVectorizer(n_features=n_features, ngram_range=(1, 2), alternate_sign=False, norm="l2")),
+            ("clf", SGDClassifier(loss="log_loss", alpha=alpha, random_state=random_state)),
+        ]
+    )
+
+
+def _clean_texts(texts):
+    return [clean_text(t) for t in texts]
+
+
+def _scan_columns(path, chunk_rows):
+    """
+    Detect the text/label columns from the first chunk, then read only the
+    label column to build the label mapping over the whole file.
+    Returns (text_col, label_col, mapping {raw label -> 0/1}).
+    """
+    first = next(iter(pd.read_csv(path, chunksize=min(chunk_rows, 10_000), low_memory=False)))
+    print("DEBUG: Original columns:", list(first.columns))
+    text_col, label_col = detect_text_label_columns(first)
+    print(f"Using text column: '{text_col}', label column: '{label_col}'")
+
+    counts = None
+    for chunk in pd.read_csv(path, usecols=[label_col], chunksize=chunk_rows, low_memory=False):
+        part = chunk[label_col].value_counts()
+        counts = part if counts is None else counts.add(part, fill_value=0)
+    if counts is None or counts.empty:
+        raise ValueError("Training CSV has no labelled rows")
+
+    # one row per distinct label; the most frequent label(s) appear twice so
+    # map_labels_to_binary's "most frequent -> 0" fallback still sees it first
+    uniques = pd.Series(counts.index, dtype=counts.index.dtype)
+    repeats = np.where(counts.values == counts.values.max(), 2, 1)
+    mapped = map_labels_to_binary(uniques.repeat(repeats).reset_index(drop=True))
+    mapping = dict(zip(uniques.repeat(repeats).tolist(), mapped.tolist()))
+    distribution = {0: 0, 1: 0}
+    for value, count in counts.items():
+        distribution[mapping[value]] += int(count)
+    print("DEBUG: Label counts:", distribution)
+    return text_col, label_col, mapping
+
+
+def iter_clean_chunks(path, text_col, label_col, mapping, chunk_rows=CHUNK_ROWS, workers=None):
+    """
+    Yield (cleaned_texts, labels) per CSV chunk. Cleaning is split across a
+    process pool, and the next chunk is cleaned while the caller trains on
+    the current one, so at most two chunks are in memory.
+    """
+    workers = workers or os.cpu_count() or 1
+    reader = pd.read_csv(path, usecols=[text_col, label_col], chunksize=chunk_rows, low_memory=False)
+
+    def submit(pool, chunk):
+        chunk = chunk.dropna(subset=[label_col])
+        texts = chunk[text_col].astype(str).tolist()
+        labels = chunk[label_col].map(lambda v: mapping.get(v, 1)).to_numpy(dtype=np.int64)
+        step = max(1, -(-len(texts) // workers))
+        slices = [texts[i:i + step] for i in range(0, len(texts), step)]
+        return pool.map_async(_clean_texts, slices), labels
+
+    with Pool(workers) as pool:
+        pending = None
+        for chunk in reader:
+            nxt = submit(pool, chunk)
+            if pending is not None:
+                result, labels = pending
+                yield [t for part in result.get() for t in part], labels
+            pending = nxt
+        if pending is not None:
+            result, labels = pending
+            yield [t for part in result.get() for t in part], labels
+
+
+def _holdout_mask(n, chunk_index, test_size, random_state):
+    # deterministic per chunk, so every pass over the file sees the same split
+    return np.random.default_rng((random_state, chunk_index)).random(n) < test_size
+
+
+def train_out_of_core(test_size=0.2, random_state=42, chunk_rows=CHUNK_ROWS, workers=None, epochs=1):
+    """
+    Train without loading the dataset: the CSV is streamed in chunks, cleaned
+    in parallel, hashed and fed to SGDClassifier.partial_fit. Rows in the
+    streamed holdout (test_size, fixed per chunk) are skipped during training
+    and scored in a final pass. Saves MODEL_PATH, which app.py then loads
+    instead of the compiled scorer (that one no longer matches MODEL_PATH).
+    """
+    if not DATA_PATH.exists():
+        raise FileNotFoundError(f"Training CSV not found at {DATA_PATH.resolve()}")
+    print("Streaming data from:", DATA_PATH)
+    text_col, label_col, mapping = _scan_columns(DATA_PATH, chunk_rows)
+
+    pipe = build_streaming_pipeline(random_state=random_state)
+    vectorizer, clf = pipe.named_steps["hashing"], pipe.named_steps["clf"]
+    classes = np.array([0, 1])
+
+    for epoch in range(epochs):
+        seen = 0
+        for i, (texts, labels) in enumerate(iter_clean_chunks(DATA_PATH, text_col, label_col, mapping, chunk_rows, workers)):
+            train_rows = ~_holdout_mask(len(labels), i, test_size, random_state)
+            if not train_rows.any():
+                continue
+            X = vectorizer.transform([t for t, keep in zip(texts, train_rows) if keep])
+            clf.partial_fit(X, labels[train_rows], classes=classes)
+            seen += int(train_rows.sum())
+        print(f"Epoch {epoch + 1}/{epochs}: trained on {seen} rows")
+    if not hasattr(clf, "coef_"):
+        raise ValueError("No training rows were read from the CSV")
+
+    # evaluate on the holdout, one chunk at a time
+    cm = np.zeros((2, 2), dtype=np.int64)
+    for i, (texts, labels) in enumerate(iter_clean_chunks(DATA_PATH, text_col, label_col, mapping, chunk_rows, workers)):
+        test_rows = _holdout_mask(len(labels), i, test_size, random_state)
+        if test_rows.any():
+            y_pred = pipe.predict([t for t, keep in zip(texts, test_rows) if keep])
+            cm += confusion_matrix(labels[test_rows], y_pred, labels=classes)
+
+    total = int(cm.sum())
+    print(f"Validated on {total} holdout samples")
+    if total:
+        print(f"Validation Accuracy: {np.trace(cm) / total:.4f}")
+        for label in classes:
+            tp = cm[label, label]
+            precision = tp / cm[:, label].sum() if cm[:, label].sum() else 0.0
+            recall = tp / cm[label, :].sum() if cm[label, :].sum() else 0.0
+            print(f"  class {label}: precision={precision:.4f} recall={recall:.4f} support={cm[label, :].sum()}")
+    print("Confusion Matrix:\n", cm)
+
+    joblib.dump(pipe, MODEL_PATH)
+    print(f"Saved trained pipeline to: {MODEL_PATH.resolve()}")
+    # the compiled scorer needs a fitted vocabulary, so SCORER_PATH is left as
+    # is: it records the pipeline it came from, and the server loads this
+    # pipeline instead (registry.load_artifact)
+    return pipe, cm
+
+
+def _arg_value(args, name, default, cast=int):
+    """Value following `name` in args (e.g. --chunk-rows 100000), else default."""
+    if name in args and args.index(name) + 1 < len(args):
+        return cast(args[args.index(name) + 1])
+    return default
+
+
 if __name__ == "__main__":
+    import sys
+
+    args = sys.argv[1:]
+    if "--export-only" in args:
+        # re-export the compiled scorer from an existing pipeline
+        export_linear_scorer(joblib.load(MODEL_PATH), SCORER_PATH, pipeline_path=MODEL_PATH)
+        raise SystemExit(0)
+
     print("=== Review Guardian: Training script ===")
     try:
-        pipeline, _ = train()
+        if "--out-of-core" in args:
+            # python -m model.train_model --out-of-core [--chunk-rows N] [--workers N] [--epochs N]
+            pipeline, _ = train_out_of_core(
+                chunk_rows=_arg_value(args, "--chunk-rows", CHUNK_ROWS),
+                workers=_arg_value(args, "--workers", None),
+                epochs=_arg_value(args, "--epochs", 1),
+            )
+        else:
+            pipeline, _ = train(use_cache="--no-cache" not in args)
         print("Training finished successfully 🎉")
     except Exception as e:
         print("Training failed:", str(e))
         raise
+
+    if "--publish" in args:
+        # new registry version; running servers pick it up via reload/watch
+        # (after out-of-core training the version's scorer is ignored, see registry.load_artifact)
+        ModelRegistry(REGISTRY_DIR).publish([MODEL_PATH, SCORER_PATH])
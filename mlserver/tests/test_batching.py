@@ -0,0 +1,23 @@
+# mlserver/tests/test_batching.py
+"""Batch assembly of the /analyze micro-batcher (utils.batching)."""
+
+import asyncio
+
+from utils.batching import MicroBatcher
+
+
+def test_cancelled_requests_do_not_take_batch_room():
+    async def run():
+        batcher = MicroBatcher(lambda items: items, max_batch=4)
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in range(3)]
+        for item, size, future in zip("abc", (3, 2, 2), futures):
+            batcher._queue.append((item, size, 0.0, future))
+            batcher._queued_units += size
+            batcher.pending += size
+        # "a" went away while queued: "b" and "c" fit together
+        futures[0].cancel()
+        batch = batcher._take_batch()
+        return [entry[0] for entry in batch], batcher._queued_units, batcher.pending
+
+    assert asyncio.run(run()) == (["b", "c"], 0, 4)
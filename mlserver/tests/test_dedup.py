@@ -0,0 +1,95 @@
+# mlserver/tests/test_dedup.py
+"""False-merge rates of the MinHash/LSH near-duplicate index (utils.dedup)."""
+
+import random
+
+import numpy as np
+import pytest
+
+from utils.dedup import DedupParams, DuplicateIndex, minhash_signatures
+
+PARAMS = DedupParams()
+# short templated reviews: few distinct words, so pairs share most of their vocabulary
+TEMPLATE_WORDS = (
+    "great product works well would buy again fast shipping good quality love it five stars "
+    "recommend this seller item"
+).split()
+
+
+def _shingles(tokens, k=PARAMS.shingle_size):
+    tokens = list(tokens) + [""] * (k - len(tokens))
+    return {tuple(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def jaccard(a, b) -> float:
+    sa, sb = _shingles(a), _shingles(b)
+    return len(sa & sb) / len(sa | sb)
+
+
+def templated_pairs(n: int, seed: int = 5):
+    rng = random.Random(seed)
+    pairs = []
+    while len(pairs) < n:
+        a = [rng.choice(TEMPLATE_WORDS) for _ in range(rng.randint(5, 12))]
+        b = list(a)
+        for _ in range(rng.randint(1, 4)):
+            b[rng.randrange(len(a))] = rng.choice(TEMPLATE_WORDS) if rng.random() < 0.5 else f"w{rng.randrange(10**6)}"
+        pairs.append((a, b))
+    return pairs
+
+
+@pytest.fixture(scope="module")
+def by_level():
+    """Templated pairs binned by true shingle Jaccard (+-0.01), at most 300 per level."""
+    levels = {0.2: [], 1 / 3: [], 0.4: [], 0.6: [], 0.8: []}
+    for a, b in templated_pairs(30000):
+        j = jaccard(a, b)
+        for level, pairs in levels.items():
+            if abs(j - level) <= 0.01 and len(pairs) < 300:
+                pairs.append((a, b))
+    return levels
+
+
+def _merged(pair) -> bool:
+    # a fresh index per pair: only the pair itself can cause the merge
+    ids = DuplicateIndex(PARAMS).assign(minhash_signatures(list(pair), PARAMS))
+    return ids[0] == ids[1]
+
+
+@pytest.mark.parametrize("level", [0.2, 1 / 3, 0.4, 0.6, 0.8])
+def test_estimate_is_unbiased(by_level, level):
+    pairs = by_level[level]
+    assert len(pairs) >= 100
+    a = minhash_signatures([p[0] for p in pairs], PARAMS)
+    b = minhash_signatures([p[1] for p in pairs], PARAMS)
+    assert abs((a == b).mean() - level) < 0.02
+
+
+@pytest.mark.parametrize("level, max_rate", [(0.2, 0.0), (1 / 3, 0.01), (0.4, 0.05)])
+def test_false_merge_rate(by_level, level, max_rate):
+    # threshold 0.5: with 128 permutations a 0.4 pair clears it ~1% of the time
+    pairs = by_level[level]
+    assert np.mean([_merged(p) for p in pairs]) <= max_rate
+
+
+@pytest.mark.parametrize("level, min_rate", [(0.6, 0.95), (0.8, 1.0)])
+def test_near_duplicates_merge(by_level, level, min_rate):
+    pairs = by_level[level]
+    assert np.mean([_merged(p) for p in pairs]) >= min_rate
+
+
+def test_batch_does_not_chain_distant_reviews():
+    # each step rewrites two of 24 words: neighbours ~0.69, the ends ~0.16
+    chain = [[f"w{i}" for i in range(24)]]
+    for start in (3, 11, 19, 7):
+        step = list(chain[-1])
+        step[start:start + 2] = [f"x{start}", f"y{start}"]
+        chain.append(step)
+    assert jaccard(chain[0], chain[-1]) < 0.2
+    ids = DuplicateIndex(PARAMS).assign(minhash_signatures(chain, PARAMS))
+    sigs = minhash_signatures(chain, PARAMS)
+    # every member resembles its cluster's first review (the representative)
+    for i, cluster in enumerate(ids):
+        first = ids.index(cluster)
+        assert np.mean(sigs[i] == sigs[first]) >= PARAMS.threshold
+    assert ids[0] != ids[-1]
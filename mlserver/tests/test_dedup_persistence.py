@@ -0,0 +1,127 @@
+# mlserver/tests/test_dedup_persistence.py
+"""Sharing the duplicate index between processes: snapshot + change log (utils.dedup)."""
+
+import numpy as np
+
+from utils import dedup
+from utils.dedup import DedupParams, DuplicateIndex, minhash_signatures
+
+PARAMS = DedupParams()
+
+
+def _review(i: int, variant: str = "") -> list:
+    return [f"t{i}_{j}" for j in range(20)] + ([variant] if variant else [])
+
+
+def _assign(index, reviews):
+    return index.assign(minhash_signatures(reviews, PARAMS), examples=[" ".join(r) for r in reviews])
+
+
+def test_save_appends_and_refresh_reads_only_new_changes(tmp_path):
+    path = tmp_path / "index.npz"
+    a = DuplicateIndex.load(path, PARAMS)
+    b = DuplicateIndex.load(path, PARAMS)
+    ids_a = _assign(a, [_review(i) for i in range(5)])
+    assert a.save(path) == {}
+    # only the log is written; no snapshot until a compaction
+    assert not path.exists()
+
+    assert b.refresh(path) == {}
+    assert len(b) == 5
+    assert _assign(b, [_review(0, "again")]) == ids_a[:1]
+    b.save(path)
+    assert a.refresh(path) == {}
+    assert a.size(ids_a[0]) == 2
+    # nothing new: refresh is a no-op
+    assert a.refresh(path) == {}
+    assert a.size(ids_a[0]) == 2
+
+
+def test_clusters_created_twice_merge_into_the_saved_one(tmp_path):
+    path = tmp_path / "index.npz"
+    a = DuplicateIndex.load(path, PARAMS)
+    b = DuplicateIndex.load(path, PARAMS)
+    [first] = _assign(a, [_review(1)])
+    [second] = _assign(b, [_review(1, "dup")])
+    assert first != second
+    a.save(path)
+    merged = b.save(path)
+    assert merged == {second: first}
+    assert b.resolve(second) == first
+    assert b.size(second) == 2
+
+    a.refresh(path)
+    assert a.size(first) == 2
+    assert len(a) == len(b) == 1
+
+
+def test_sizes_survive_replaying_unsaved_clusters(tmp_path):
+    path = tmp_path / "index.npz"
+    a = DuplicateIndex.load(path, PARAMS)
+    _assign(a, [_review(0)])
+    a.save(path)
+    b = DuplicateIndex.load(path, PARAMS)
+    _assign(b, [_review(1), _review(2)])
+    _assign(a, [_review(3)])
+    a.save(path)
+    # b applies a's new cluster in place, then re-adds its own two after it
+    b.save(path)
+    assert len(b) == 4
+    assert list(b._sizes[:4]) == [1, 1, 1, 1]
+
+
+def test_compaction_is_picked_up_and_keeps_unsaved_work(tmp_path, monkeypatch):
+    monkeypatch.setattr(dedup, "COMPACT_MIN_CHANGES", 3)
+    path = tmp_path / "index.npz"
+    a = DuplicateIndex.load(path, PARAMS)
+    b = DuplicateIndex.load(path, PARAMS)
+    ids = _assign(a, [_review(i) for i in range(4)])
+    a.save(path)
+    assert a.needs_compaction()
+    [unsaved] = _assign(a, [_review(9)])
+    assert a.compact(path)
+    assert path.exists()
+    assert not a.needs_compaction()
+
+    # the saved clusters now come from the snapshot, the log holds nothing before it
+    fresh = DuplicateIndex.load(path, PARAMS)
+    assert len(fresh) == 4
+    assert fresh.size(ids[2]) == 1
+    assert fresh._log.read(0)[1] == []
+
+    b.refresh(path)
+    assert len(b) == 4
+    a.save(path)
+    b.refresh(path)
+    assert b.resolve(unsaved) == unsaved
+    assert len(b) == 5
+    assert len(DuplicateIndex.load(path, PARAMS)) == 5
+
+
+def test_compaction_prunes_to_max_clusters(tmp_path):
+    path = tmp_path / "index.npz"
+    a = DuplicateIndex.load(path, PARAMS, max_clusters=3)
+    ids = []
+    for i in range(5):
+        ids += _assign(a, [_review(i)])
+        a.save(path)
+    assert a.compact(path)
+    b = DuplicateIndex.load(path, PARAMS, max_clusters=3)
+    assert [b.resolve(c) for c in ids] == [None, None] + ids[2:]
+    a.refresh(path)
+    assert len(a) == 3
+
+
+def test_other_params_start_over(tmp_path):
+    path = tmp_path / "index.npz"
+    a = DuplicateIndex.load(path, PARAMS)
+    _assign(a, [_review(1)])
+    a.save(path)
+    other = DedupParams(threshold=0.7)
+    assert len(DuplicateIndex.load(path, other)) == 0
+    c = DuplicateIndex(other)
+    c.assign(minhash_signatures([_review(2), _review(3)], other))
+    c.save(path)
+    assert len(DuplicateIndex.load(path, other)) == 2
+    assert len(DuplicateIndex.load(path, PARAMS)) == 0
+    assert np.all(c._sizes[:2] == 1)
@@ -0,0 +1,46 @@
+# mlserver/tests/test_fork.py
+"""Workers forked from a preloaded app (gunicorn --preload) while the warmup is loading the model."""
+
+import os
+import time
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+
+
+def test_worker_forked_during_model_load_does_not_hang(monkeypatch):
+    app = pytest.importorskip("app")
+    assert app.warmup.wait(30)
+    real_load = app._load_handle
+
+    def slow_load(*args, **kwargs):
+        time.sleep(1.0)
+        return real_load(*args, **kwargs)
+
+    monkeypatch.setattr(app, "_active_model", None)
+    monkeypatch.setattr(app, "_load_handle", slow_load)
+    monkeypatch.setattr(app, "warmup", app.Warmup())
+    app.warmup.start()
+    # the warmup thread now holds _model_lock for the whole load
+    time.sleep(0.3)
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            ok = app.warmup.wait(10) and app.current_model() is not None
+            os.write(write_fd, b"ready" if ok else b"timeout")
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    deadline = time.monotonic() + 15
+    while os.waitpid(pid, os.WNOHANG) == (0, 0):
+        if time.monotonic() > deadline:
+            os.kill(pid, 9)
+            os.waitpid(pid, 0)
+            pytest.fail("forked worker hung on a lock held by the parent's warmup thread")
+        time.sleep(0.05)
+    with os.fdopen(read_fd, "rb") as f:
+        assert f.read() == b"ready"
+    assert app.warmup.wait(10)
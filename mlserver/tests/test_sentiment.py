@@ -0,0 +1,51 @@
+# mlserver/tests/test_sentiment.py
+"""Parity of the batched sentiment port (utils.sentiment) with TextBlob."""
+
+import numpy as np
+import pytest
+
+from utils.sentiment import get_sentiment_score, get_sentiment_scores, load_lexicon
+
+pytest.importorskip("textblob")
+if load_lexicon() is None:
+    pytest.skip("TextBlob's en-sentiment.xml lexicon not found", allow_module_level=True)
+
+# negation, intensifiers, "!", "(!)", emoticons, contractions, abbreviations,
+# and inputs with no assessable word at all
+SAMPLE = {
+    "not good": -0.35,
+    "very good": 0.91,
+    "really not good": -0.35,
+    "never bad": 0.35,
+    "not very good!": -0.3365384615384615,
+    "good!!!": 1.0,
+    "terribly slow": -0.3,
+    "extremely disappointing, quite poor quality": -0.5,
+    "Great :)": 0.65,
+    "Not a good deal (!) lol": 0.15,
+    "U.S. shipping was fast. Mr. Smith helped.": 0.2,
+    "I don't like it": 0.0,
+    "!!!": 0.0,
+    "...": 0.0,
+    " ?! ": 0.0,
+    "": 0.0,
+    "  ": 0.0,
+}
+
+
+def test_matches_textblob():
+    texts = list(SAMPLE)
+    expected = np.array([get_sentiment_score(t) for t in texts])
+    np.testing.assert_allclose(get_sentiment_scores(texts), expected, rtol=0, atol=1e-9)
+
+
+def test_pinned_polarities():
+    # catches a lexicon or TextBlob upgrade that moves both sides together
+    np.testing.assert_allclose(get_sentiment_scores(list(SAMPLE)), list(SAMPLE.values()), rtol=0, atol=1e-9)
+
+
+def test_batch_does_not_change_scores():
+    texts = list(SAMPLE)
+    one_by_one = [get_sentiment_scores([t])[0] for t in texts]
+    np.testing.assert_array_equal(get_sentiment_scores(texts), one_by_one)
+    assert get_sentiment_scores([]).shape == (0,)
@@ -0,0 +1,151 @@
+# mlserver/utils/batching.py
+"""
+Dynamic micro-batching for small concurrent requests (used by asgi.py).
+
+Concurrent submit() calls are queued and handed to one `fn(items)` call:
+a batch closes after `max_wait` seconds from its first item or once it
+holds `max_batch` units (reviews), whichever comes first. `fn` runs in a
+thread pool of `workers` threads, so the event loop keeps accepting while a
+batch is scored; while every worker is busy the queue simply grows and the
+next batch is larger.
+
+Backpressure: at most `max_pending` units may be queued or in flight;
+beyond that submit() raises QueueFull right away (the caller answers 503)
+instead of letting latency grow without bound.
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, List, Optional, Sequence, Tuple
+
+from utils import metrics
+
+
+class QueueFull(Exception):
+    """The batcher already holds max_pending units."""
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch: int = 256,
+        max_wait: float = 0.005,
+        max_pending: int = 4096,
+        workers: int = 1,
+    ):
+        self.fn = fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait)
+        self.max_pending = max(1, max_pending)
+        self.workers = max(1, workers)
+        self.pending = 0
+        self._queue: Deque[Tuple[Any, int, float, asyncio.Future]] = deque()
+        self._queued_units = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the collector on the running loop (also done lazily by submit)."""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="microbatch")
+        self._task = asyncio.get_running_loop().create_task(self._collect())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._executor.shutdown(wait=True)
+        for _, _, _, future in self._queue:
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped"))
+        self._queue.clear()
+
+    async def submit(self, item: Any, size: int = 1) -> Any:
+        """Queue one item (`size` units) and wait for its result; QueueFull when overloaded."""
+        self.start()
+        # a single oversized item is still accepted when nothing else is pending
+        if self.pending and self.pending + size > self.max_pending:
+            metrics.BATCH_REJECTED.inc()
+            raise QueueFull(f"{self.pending} reviews pending")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((item, size, time.perf_counter(), future))
+        self._queued_units += size
+        self.pending += size
+        self._wakeup.set()
+        return await future
+
+    def _take_batch(self) -> List[Tuple[Any, int, float, asyncio.Future]]:
+        batch, units = [], 0
+        while self._queue:
+            entry = self._queue[0]
+            if entry[3].cancelled():
+                # client went away while queued: its units neither count nor close the batch
+                self._queue.popleft()
+                self._queued_units -= entry[1]
+                self.pending -= entry[1]
+                continue
+            if batch and units + entry[1] > self.max_batch:
+                break
+            self._queue.popleft()
+            self._queued_units -= entry[1]
+            units += entry[1]
+            batch.append(entry)
+        return batch
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            # hold the batch open until it is full or its oldest item has waited max_wait
+            deadline = self._queue[0][2] + self.max_wait
+            while self._queued_units < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            await self._slots.acquire()
+            batch = self._take_batch()
+            if not batch:
+                self._slots.release()
+                continue
+            loop.create_task(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[Any, int, float, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        units = sum(size for _, size, _, _ in batch)
+        for _, _, queued, _ in batch:
+            metrics.record_stage("batch_wait", started - queued)
+        metrics.BATCH_REVIEWS.observe(units)
+        try:
+            outputs = await loop.run_in_executor(self._executor, self.fn, [item for item, _, _, _ in batch])
+        except Exception as e:
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, _, _, future), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+        finally:
+            self.pending -= units
+            self._slots.release()
@@ -0,0 +1,222 @@
+# mlserver/utils/cache.py
+"""
+Content-addressed cache for per-review analysis results.
+
+Model outputs (probability, keywords) are keyed by a hash of the cleaned
+review text plus the model fingerprint, so a retrained model never serves
+stale results; sentiment reads case and punctuation, so it is keyed by the
+raw text instead (see app._sentiments). Two backends share one small
+interface (get_many / set_many / stats / clear):
+ - MemoryResultCache: per-process LRU with a size cap and TTL
+ - SQLiteResultCache: on-disk LRU that all gunicorn workers on a host share
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+
+def file_fingerprint(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """Short sha256 of a file's contents (used to version cache keys by model)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def make_cache_key(cleaned: str, fingerprint: str) -> str:
+    return hashlib.sha1(f"{fingerprint}\0{cleaned}".encode("utf-8")).hexdigest()
+
+
+class MemoryResultCache:
+    """In-process LRU cache with a max entry count and a TTL (seconds, 0 = no expiry)."""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def after_fork(self) -> None:
+        # a parent thread (the warmup, say) may have held the lock at fork time
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, dict]:
+        found = {}
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is not None and self.ttl_seconds and now - entry[0] > self.ttl_seconds:
+                    del self._data[key]
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    continue
+                self._data.move_to_end(key)
+                found[key] = entry[1]
+                self.hits += 1
+        return found
+
+    def set_many(self, items: Dict[str, dict]) -> None:
+        now = time.time()
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (now, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+class SQLiteResultCache(MemoryResultCache):
+    """
+    SQLite-backed LRU cache. One file can be shared by every worker process on
+    the host (WAL mode); hit/miss counters are per process.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: Union[str, Path], max_entries: int = 1_000_000, ttl_seconds: float = 24 * 3600):
+        super().__init__(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._writes_since_evict = 0
+        self._evict_every = max(100, max_entries // 100)
+        # schema from a throwaway connection: the cache is often built at import,
+        # before gunicorn --preload or a job pool forks, and an open SQLite
+        # handle must not be carried into a child process
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread (and per process after fork/spawn)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, dict]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        conn = self._conn()
+        now = time.time()
+        found = {}
+        # stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            marks = ",".join("?" * len(part))
+            rows = conn.execute(f"SELECT key, value, created FROM results WHERE key IN ({marks})", part).fetchall()
+            for key, value, created in rows:
+                if self.ttl_seconds and now - created > self.ttl_seconds:
+                    continue
+                found[key] = json.loads(value)
+        if found:
+            conn.executemany("UPDATE results SET accessed = ? WHERE key = ?", [(now, k) for k in found])
+            conn.commit()
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, items: Dict[str, dict]) -> None:
+        if not items:
+            return
+        conn = self._conn()
+        now = time.time()
+        conn.executemany(
+            "INSERT OR REPLACE INTO results (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+            [(k, json.dumps(v), now, now) for k, v in items.items()],
+        )
+        conn.commit()
+        # amortize expiry/eviction scans over many writes
+        self._writes_since_evict += len(items)
+        if self._writes_since_evict >= self._evict_every:
+            self._writes_since_evict = 0
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds:
+            conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl_seconds,))
+        # LRU eviction down to the size cap
+        conn.execute(
+            "DELETE FROM results WHERE key IN ("
+            " SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        conn.commit()
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM results")
+        conn.commit()
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["size"] = self._conn().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        stats["path"] = str(self.path)
+        return stats
+
+
+def create_result_cache(
+    backend: str,
+    max_entries: int,
+    ttl_seconds: float,
+    path: Optional[Union[str, Path]] = None,
+) -> Optional[MemoryResultCache]:
+    """Build the cache selected by RESULT_CACHE ('memory', 'sqlite' or 'off')."""
+    backend = (backend or "off").lower()
+    if backend in ("off", "none", "0", "false"):
+        return None
+    if backend == "memory":
+        return MemoryResultCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteResultCache(path or "cache/results.sqlite", max_entries=max_entries, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown RESULT_CACHE backend: {backend}")
@@ -0,0 +1,927 @@
+# mlserver/utils/dedup.py
+"""
+Near-duplicate detection for templated / copy-pasted reviews.
+
+ - minhash_signatures(): MinHash over word k-shingles of the cleaned tokens
+   (64-bit shingle hashes, xor-seeded 64-bit mixing as the permutations),
+   computed for a whole batch with NumPy (no per-shingle Python work)
+ - DuplicateIndex: LSH index (bands x rows of the signature) that assigns
+   every review to a cluster of near-duplicates. A batch is looked up with
+   one vectorized binary search per band key (O(log n) in the number of
+   indexed clusters, no pairwise comparison); candidates are confirmed
+   against the cluster's first signature (estimated Jaccard >= threshold),
+   within a batch too, so unrelated reviews sharing one band do not merge
+   and A~B~C chains do not pull A and C into one cluster.
+ - save()/load()/refresh(): the index persists as an .npz snapshot plus a
+   SQLite change log next to it (same name, .sqlite), so later uploads are
+   matched against earlier ones. A save appends only the clusters created or
+   grown since the last one, after replaying what other processes appended
+   (gunicorn workers and job processes share the files) without renumbering
+   clusters; refresh() is one small query unless there is something new.
+   compact() folds the log into a new snapshot in the background, pruned to
+   `max_clusters` most recently grown clusters / `ttl_seconds` of inactivity.
+
+With the defaults (128 permutations, 32 bands of 4 rows, word 3-shingles)
+pairs above ~0.6 Jaccard similarity almost always share a bucket and pairs
+below ~0.25 rarely do; one edited word in a 20-word review keeps ~0.7.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# shingles hashed per MinHash block: keeps the (shingles x permutations) matrix in cache
+_BLOCK_SHINGLES = 2048
+EXAMPLE_CHARS = 120
+# bump when the saved layout or the hashing changes; older files are ignored
+FORMAT_VERSION = 4
+# compact once the log holds this many changes (or a quarter of the clusters, if more)
+COMPACT_MIN_CHANGES = 10_000
+# with a size bound set, compact at least this often so pruning keeps up
+COMPACT_MAX_AGE_SECONDS = 24 * 3600
+
+
+class DedupParams(NamedTuple):
+    num_perm: int = 128
+    bands: int = 32
+    shingle_size: int = 3
+    threshold: float = 0.5
+    seed: int = 1
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer, in place: a bijection on uint64 where every input bit flips ~half the output bits."""
+    tmp = np.empty_like(x)
+    with np.errstate(over="ignore"):
+        for shift, mult in ((30, 0xBF58476D1CE4E5B9), (27, 0x94D049BB133111EB)):
+            x ^= np.right_shift(x, np.uint64(shift), out=tmp)
+            x *= np.uint64(mult)
+        x ^= np.right_shift(x, np.uint64(31), out=tmp)
+    return x
+
+
+def _token_hashes(tokens: Sequence[str], cache: Dict[str, int]) -> List[int]:
+    out = []
+    for tok in tokens:
+        h = cache.get(tok)
+        if h is None:
+            # 64-bit blake2b (crc32 is linear and only 32 bits); 0 stays free for padding short reviews
+            h = cache[tok] = int.from_bytes(hashlib.blake2b(tok.encode("utf-8"), digest_size=8).digest(), "little") or 1
+        out.append(h)
+    return out
+
+
+def _shingle_hashes(token_lists: Sequence[Sequence[str]], k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    64-bit hashes of every word k-shingle, flattened, plus per-review
+    [start, end) offsets into them. Reviews shorter than k tokens get one
+    shingle (padded); reviews without tokens get none.
+    """
+    cache: Dict[str, int] = {}
+    flat: List[int] = []
+    lengths = np.zeros(len(token_lists), dtype=np.int64)
+    for i, tokens in enumerate(token_lists):
+        if not tokens:
+            continue
+        hashes = _token_hashes(tokens, cache)
+        if len(hashes) < k:
+            hashes += [0] * (k - len(hashes))
+        flat.extend(hashes)
+        lengths[i] = len(hashes)
+    tok = np.asarray(flat, dtype=np.uint64)
+    tok_ends = np.cumsum(lengths)
+    tok_starts = tok_ends - lengths
+
+    # fold k consecutive token hashes, mixing after each one (order matters, no linear structure left)
+    n = max(len(tok) - k + 1, 0)
+    combined = np.full(n, 0x5EED, dtype=np.uint64)
+    for j in range(k):
+        combined ^= tok[j:j + n]
+        _mix64(combined)
+
+    # drop shingles that straddle two reviews
+    counts = np.where(lengths > 0, lengths - k + 1, 0)
+    keep = np.zeros(n, dtype=bool)
+    for_review = np.repeat(np.arange(len(lengths)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    keep[tok_starts[for_review] + offsets] = True
+    shingles = combined[keep]
+    ends = np.cumsum(counts)
+    return shingles, np.stack([ends - counts, ends], axis=1)
+
+
+def minhash_signatures(token_lists: Sequence[Sequence[str]], params: DedupParams = DedupParams()) -> np.ndarray:
+    """
+    (n_reviews, num_perm) uint32 MinHash signatures; rows of reviews without
+    tokens are all 0xFFFFFFFF (never matched, see DuplicateIndex.assign).
+    """
+    # xor-seeded hashing: permutation p maps x to the top 32 bits of mix64(x ^ seed[p]); unlike
+    # multiply-shift (only pairwise independent), this does not favour structured shingle sets
+    seeds = np.random.RandomState(params.seed).randint(0, 2**63, size=params.num_perm, dtype=np.int64).astype(np.uint64)
+    shingles, bounds = _shingle_hashes(token_lists, params.shingle_size)
+
+    sigs = np.full((len(token_lists), params.num_perm), 0xFFFFFFFF, dtype=np.uint32)
+    nonempty = np.flatnonzero(bounds[:, 1] > bounds[:, 0])
+    i = 0
+    while i < len(nonempty):
+        # group whole reviews until the block holds ~_BLOCK_SHINGLES shingles
+        first = bounds[nonempty[i], 0]
+        j = int(np.searchsorted(bounds[nonempty, 1], first + _BLOCK_SHINGLES, side="right"))
+        j = max(j, i + 1)
+        rows = nonempty[i:j]
+        last = bounds[rows[-1], 1]
+        permuted = np.bitwise_xor(shingles[first:last, None], seeds)
+        _mix64(permuted)
+        permuted >>= np.uint64(32)
+        sigs[rows] = np.minimum.reduceat(permuted, bounds[rows, 0] - first, axis=0)
+        i = j
+    return sigs
+
+
+@contextmanager
+def _try_file_lock(path: Path):
+    """Exclusive flock next to `path` if free; yields False when another process holds it."""
+    try:
+        import fcntl
+    except ImportError:
+        # no flock (Windows): concurrent compactions only waste work, the log keeps them consistent
+        yield True
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "w") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class _LogState(NamedTuple):
+    generation: str
+    snapshot_seq: int
+    snapshot_written: float
+    layout: str
+    # generation the snapshot extends when compaction pruned nothing, else None
+    previous: Optional[str]
+    head: int
+
+
+class _ClusterLog:
+    """
+    SQLite log of cluster changes since the snapshot: a row with a signature
+    creates a cluster, a row without one grows it. `seq` orders the rows for
+    every reader. The meta row names the current snapshot (generation, last
+    seq folded into it, the generation it extends unless it was pruned) and
+    the params/format the log was written with.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                generation TEXT NOT NULL,
+                snapshot_seq INTEGER NOT NULL,
+                snapshot_written REAL NOT NULL,
+                layout TEXT NOT NULL,
+                previous TEXT
+            );
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                cluster_id INTEGER NOT NULL,
+                grow INTEGER NOT NULL,
+                last_seen REAL NOT NULL,
+                signature BLOB,
+                example TEXT
+            );
+            """
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread (and per process after fork/spawn)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            # autocommit: transactions are begun explicitly below
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _state(conn: sqlite3.Connection) -> Optional[_LogState]:
+        row = conn.execute("SELECT generation, snapshot_seq, snapshot_written, layout, previous FROM meta").fetchone()
+        if row is None:
+            return None
+        # sqlite_sequence keeps the last seq even when compaction deleted every row
+        head = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        return _LogState(*row, head=max(head[0] if head else 0, row[1]))
+
+    def read(self, after_seq: Optional[int]) -> Tuple[Optional[_LogState], list]:
+        """Meta state plus the changes after `after_seq` (None: none), from one consistent read."""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            state = self._state(conn)
+            rows = []
+            if state is not None and after_seq is not None and state.head > after_seq:
+                rows = self._changes(conn, after_seq)
+            return state, rows
+        finally:
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _changes(conn: sqlite3.Connection, after_seq: int) -> list:
+        return conn.execute(
+            "SELECT seq, cluster_id, grow, last_seen, signature, example FROM changes WHERE seq > ? ORDER BY seq",
+            (after_seq,),
+        ).fetchall()
+
+    @contextmanager
+    def write(self, layout: str):
+        """
+        Write transaction (one writer across processes at a time) yielding
+        the connection; creates the meta row for a new log.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR IGNORE INTO meta VALUES (0, ?, 0, ?, ?, NULL)", (uuid.uuid4().hex, time.time(), layout)
+            )
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def _random_ids(n: int) -> np.ndarray:
+    # os.urandom, so forked workers never share a sequence; 52 bits fit a JSON/JS number
+    return (np.frombuffer(os.urandom(8 * n), dtype=np.uint64) >> np.uint64(12)).astype(np.int64)
+
+
+class _BucketTable:
+    """
+    Band key -> cluster id map probed a whole batch at a time: sorted key
+    runs searched with np.searchsorted, merged LSM-style as they grow so
+    lookups stay O(log n) per key. The first id stored for a key is kept.
+    """
+
+    def __init__(self):
+        self._runs: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys, _ in self._runs)
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        found = np.full(len(keys), -1, dtype=np.int64)
+        if not self._runs:
+            return found
+        # sorted needles keep the binary searches cache friendly
+        order = np.argsort(keys)
+        needles = keys[order]
+        for run_keys, run_values in self._runs:
+            pos = np.minimum(np.searchsorted(run_keys, needles), len(run_keys) - 1)
+            hit = run_keys[pos] == needles
+            found[order[hit]] = run_values[pos[hit]]
+        return found
+
+    def insert(self, keys: np.ndarray, values: np.ndarray) -> None:
+        keys, first = np.unique(keys, return_index=True)
+        values = values[first]
+        fresh = self.lookup(keys) < 0
+        keys, values = keys[fresh], values[fresh]
+        if not len(keys):
+            return
+        self._runs.append((keys, values))
+        while len(self._runs) > 1 and len(self._runs[-2][0]) <= 2 * len(self._runs[-1][0]):
+            (k1, v1), (k2, v2) = self._runs.pop(), self._runs.pop()
+            merged = np.concatenate([k2, k1])
+            order = np.argsort(merged, kind="stable")
+            self._runs.append((merged[order], np.concatenate([v2, v1])[order]))
+
+    def items(self) -> Tuple[np.ndarray, np.ndarray]:
+        if not self._runs:
+            return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+        keys = np.concatenate([k for k, _ in self._runs])
+        order = np.argsort(keys, kind="stable")
+        return keys[order], np.concatenate([v for _, v in self._runs])[order]
+
+
+def _best_matches(sigs: np.ndarray, candidates: np.ndarray, refs: np.ndarray, min_agree: float) -> np.ndarray:
+    """
+    For every row of `sigs`, the candidate (row of `refs`, -1 = none) with the
+    most equal signature slots, if at least min_agree; else -1.
+    """
+    best = np.full(len(sigs), -1, dtype=np.int64)
+    rows, cols = np.nonzero(candidates >= 0)
+    if not len(rows):
+        return best
+    span = len(refs) + 1
+    pairs = np.unique(rows * span + candidates[rows, cols])
+    rows, refs_idx = pairs // span, pairs % span
+    agree = np.count_nonzero(refs[refs_idx] == sigs[rows], axis=1)
+    ok = agree >= min_agree
+    rows, refs_idx, agree = rows[ok], refs_idx[ok], agree[ok]
+    # highest agreement first within each row, then keep the first per row
+    order = np.lexsort((-agree, rows))
+    rows, refs_idx = rows[order], refs_idx[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = rows[1:] != rows[:-1]
+    best[rows[first]] = refs_idx[first]
+    return best
+
+
+def _cluster_rows(sigs: np.ndarray, leaders: np.ndarray, min_agree: float) -> np.ndarray:
+    """
+    Cluster root (row) of every row of a batch. Each row first joins the
+    leader (earlier row sharing a band key, -1 = none) it resembles most.
+    Then each row is checked against its cluster's root, the representative,
+    and a row that fails starts its own cluster. This stops chains like
+    A~B~C, where A and C are far apart, from ending up in one cluster. Only
+    the failing row nearest to its root is cut in each round, so the rows
+    below it are re-checked against it.
+    """
+    m = len(sigs)
+    own = np.arange(m)
+    parent = _best_matches(sigs, leaders, sigs, min_agree)
+    parent = np.where(parent >= 0, parent, own)
+    while True:
+        root = parent
+        while True:
+            grand = root[root]
+            if np.array_equal(grand, root):
+                break
+            root = grand
+        moved = np.flatnonzero(root != own)
+        bad = np.zeros(m, dtype=bool)
+        bad[moved] = np.count_nonzero(sigs[moved] == sigs[root[moved]], axis=1) < min_agree
+        if not bad.any():
+            return root
+        # a failing row with a failing ancestor waits: it may match the ancestor once that is a root
+        above = bad[parent] & (parent != own)
+        hop = parent
+        while True:
+            above |= above[hop]
+            nxt = hop[hop]
+            if np.array_equal(nxt, hop):
+                break
+            hop = nxt
+        cut = bad & ~above
+        parent = np.where(cut, own, parent)
+
+
+class DuplicateIndex:
+    """
+    LSH index of near-duplicate clusters. Each cluster keeps its first
+    signature (the representative), its size, an example text and when it
+    last grew; only representatives are bucketed. Thread-safe.
+
+    Cluster ids are random 52-bit integers (safe as JSON numbers), fixed
+    when a cluster is created, so merging with another process's changes or
+    pruning never renumbers them. When two processes created the same
+    cluster independently, the one already on disk wins and the other id
+    becomes an alias of it (resolve()); size() and example() follow aliases.
+    """
+
+    def __init__(self, params: DedupParams = DedupParams(), max_clusters: int = 0, ttl_seconds: float = 0):
+        if params.num_perm % params.bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.params = params
+        # persisted size bounds, applied when compacting (0 = unbounded)
+        self.max_clusters = max_clusters
+        self.ttl_seconds = ttl_seconds
+        self._rows = params.num_perm // params.bands
+        rng = np.random.RandomState(params.seed + 1)
+        self._band_mults = rng.randint(0, 2**62, size=self._rows, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+        # one table for all bands: keys are salted per band
+        self._band_salts = rng.randint(0, 2**62, size=params.bands, dtype=np.int64).astype(np.uint64)
+        # bucket values, sizes etc. are positions; ids only appear at the API.
+        # _table holds clusters that are on disk, _unsaved the ones created since
+        # (looked up second, dropped and replayed when merging with the log)
+        self._table = _BucketTable()
+        self._unsaved = _BucketTable()
+        self._count = 0
+        self._signatures = np.zeros((0, params.num_perm), dtype=np.uint32)
+        self._sizes = np.zeros(0, dtype=np.int64)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._last_seen = np.zeros(0, dtype=np.float64)
+        self._examples: List[str] = []
+        self._position: Dict[int, int] = {}
+        self._aliases: Dict[int, int] = {}
+        # positions grown since the last save/load, replayed when merging; the
+        # first _synced positions are the clusters on disk
+        self._dirty: Dict[int, int] = {}
+        self._synced = 0
+        # log position: snapshot generation, last change applied, when the snapshot was taken
+        self._log: Optional[_ClusterLog] = None
+        self._log_generation: Optional[str] = None
+        self._applied_seq = 0
+        self._snapshot_seq = 0
+        self._snapshot_written = 0.0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _band_keys(self, sigs: np.ndarray) -> np.ndarray:
+        bands = sigs.astype(np.uint64).reshape(len(sigs), self.params.bands, self._rows)
+        with np.errstate(over="ignore"):
+            return (bands * self._band_mults).sum(axis=2, dtype=np.uint64) ^ self._band_salts
+
+    def _lookup(self, keys: np.ndarray) -> np.ndarray:
+        # clusters on disk first: they win over ones this process created since
+        found = self._table.lookup(keys)
+        missing = found < 0
+        if missing.any() and len(self._unsaved):
+            found[missing] = self._unsaved.lookup(keys[missing])
+        return found
+
+    def _new_clusters(self, sigs: np.ndarray, examples: Sequence[str], ids: np.ndarray, now: float) -> np.ndarray:
+        start, end = self._count, self._count + len(sigs)
+        if end > len(self._signatures):
+            capacity = max(1024, 2 * end)
+            grown = np.zeros((capacity, self.params.num_perm), dtype=np.uint32)
+            grown[:start] = self._signatures[:start]
+            self._signatures = grown
+            for name in ("_sizes", "_ids", "_last_seen"):
+                old = getattr(self, name)
+                resized = np.zeros(capacity, dtype=old.dtype)
+                resized[:start] = old[:start]
+                setattr(self, name, resized)
+        self._signatures[start:end] = sigs
+        # slots past _count may hold clusters dropped by _take_unsaved
+        self._sizes[start:end] = 0
+        self._ids[start:end] = ids
+        self._last_seen[start:end] = now
+        self._examples.extend(e[:EXAMPLE_CHARS] for e in examples)
+        self._position.update(zip(ids.tolist(), range(start, end)))
+        self._count = end
+        return np.arange(start, end, dtype=np.int64)
+
+    def assign(
+        self,
+        sigs: np.ndarray,
+        weights: Optional[Sequence[int]] = None,
+        examples: Optional[Sequence[str]] = None,
+        ids: Optional[Sequence[int]] = None,
+    ) -> List[Optional[int]]:
+        """
+        Add reviews (one signature row each, counted `weights[i]` times) and
+        return their cluster ids; None for reviews without tokens.
+
+        Rows first match existing clusters (via their buckets); the rest are
+        clustered among themselves (see _cluster_rows). Either way a row
+        only joins a cluster whose representative signature it resembles
+        (estimated Jaccard >= threshold), not just on a shared bucket.
+        A new cluster takes `ids[row]` of its first row when given, else a
+        fresh random id.
+        """
+        n = len(sigs)
+        weights = np.ones(n, dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+        examples = list(examples) if examples is not None else [""] * n
+        valid = ~(sigs == 0xFFFFFFFF).all(axis=1)
+        keys = self._band_keys(sigs)
+        min_agree = self.params.threshold * self.params.num_perm
+        now = time.time()
+        with self._lock:
+            found = self._lookup(keys.ravel()).reshape(keys.shape)
+            pos = _best_matches(sigs, found, self._signatures[:self._count], min_agree)
+            pos[~valid] = -1
+
+            rest = np.flatnonzero(valid & (pos < 0))
+            if len(rest):
+                m = len(rest)
+                # earliest row of the batch with the same key, per band
+                leaders = np.empty((m, self.params.bands), dtype=np.int64)
+                for b in range(self.params.bands):
+                    _, first, inverse = np.unique(keys[rest, b], return_index=True, return_inverse=True)
+                    leaders[:, b] = first[inverse]
+                leaders[leaders == np.arange(m)[:, None]] = -1
+                parent = _cluster_rows(sigs[rest], leaders, min_agree)
+                roots = np.flatnonzero(parent == np.arange(m))
+                new_ids = (
+                    np.asarray(ids, dtype=np.int64)[rest[roots]] if ids is not None else _random_ids(len(roots))
+                )
+                cluster_of = np.empty(m, dtype=np.int64)
+                cluster_of[roots] = self._new_clusters(
+                    sigs[rest[roots]], [examples[i] for i in rest[roots]], new_ids, now
+                )
+                pos[rest] = cluster_of[parent]
+                self._unsaved.insert(keys[rest[roots]].ravel(), np.repeat(cluster_of[roots], self.params.bands))
+
+            grown, inverse = np.unique(pos[valid], return_inverse=True)
+            added = np.bincount(inverse, weights=weights[valid], minlength=len(grown)).astype(np.int64)
+            self._sizes[grown] += added
+            self._last_seen[grown] = now
+            for c, w in zip(grown.tolist(), added.tolist()):
+                self._dirty[c] = self._dirty.get(c, 0) + w
+            out = self._ids[np.maximum(pos, 0)]
+        return [int(c) if p >= 0 else None for c, p in zip(out.tolist(), pos.tolist())]
+
+    def resolve(self, cluster_id: Optional[int]) -> Optional[int]:
+        """The id a cluster is known by now (follows merges); None if it was pruned."""
+        if cluster_id is None:
+            return None
+        with self._lock:
+            cluster_id = self._aliases.get(cluster_id, cluster_id)
+            return cluster_id if cluster_id in self._position else None
+
+    def size(self, cluster_id: Optional[int]) -> int:
+        with self._lock:
+            pos = self._position.get(self._aliases.get(cluster_id, cluster_id))
+            return int(self._sizes[pos]) if pos is not None else 0
+
+    def example(self, cluster_id: int) -> str:
+        with self._lock:
+            pos = self._position.get(self._aliases.get(cluster_id, cluster_id))
+            return self._examples[pos] if pos is not None else ""
+
+    # persistence
+
+    def _layout(self) -> str:
+        return json.dumps({"format": FORMAT_VERSION, "params": self.params._asdict()}, sort_keys=True)
+
+    def _log_for(self, path: Path) -> _ClusterLog:
+        log_path = path.with_suffix(".sqlite")
+        if self._log is None or self._log.path != log_path:
+            self._log = _ClusterLog(log_path)
+        return self._log
+
+    def _prune(self, now: float) -> None:
+        """Drop clusters idle for ttl_seconds, then the least recently grown beyond max_clusters."""
+        n = self._count
+        keep = np.ones(n, dtype=bool)
+        if self.ttl_seconds:
+            keep &= self._last_seen[:n] >= now - self.ttl_seconds
+        if self.max_clusters and keep.sum() > self.max_clusters:
+            recent = np.argsort(-np.where(keep, self._last_seen[:n], -np.inf), kind="stable")[:self.max_clusters]
+            keep[:] = False
+            keep[recent] = True
+        if keep.all():
+            return
+        new_pos = np.cumsum(keep) - 1
+        kept = np.flatnonzero(keep)
+        band_keys, band_pos = self._table.items()
+        in_kept = keep[band_pos]
+        self._table = _BucketTable()
+        if in_kept.any():
+            self._table._runs = [(band_keys[in_kept], new_pos[band_pos[in_kept]])]
+        self._signatures = self._signatures[kept]
+        self._sizes, self._ids, self._last_seen = self._sizes[kept], self._ids[kept], self._last_seen[kept]
+        self._examples = [self._examples[i] for i in kept.tolist()]
+        self._count = self._synced = len(kept)
+        self._position = dict(zip(self._ids.tolist(), range(self._count)))
+        self._aliases = {a: c for a, c in self._aliases.items() if c in self._position}
+
+    def _state(self, generation: str, seq: int) -> dict:
+        n = self._count
+        band_keys, band_clusters = self._table.items()
+        encoded = [e.encode("utf-8") for e in self._examples]
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        meta = {"format": FORMAT_VERSION, "params": self.params._asdict(), "generation": generation, "seq": seq}
+        return {
+            "signatures": self._signatures[:n],
+            "sizes": self._sizes[:n],
+            "ids": self._ids[:n],
+            "last_seen": self._last_seen[:n],
+            "band_keys": band_keys, "band_clusters": band_clusters,
+            "examples_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8), "examples_offsets": offsets,
+            "meta": np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+        }
+
+    def _read_snapshot(self, path: Path) -> Tuple[int, Optional[str]]:
+        """Fill this empty index from the .npz at `path`; returns its (seq, generation), (0, None) if unusable."""
+        if not path.exists():
+            return 0, None
+        with np.load(path) as z:
+            meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+            if meta.get("format") != FORMAT_VERSION or DedupParams(**meta["params"]) != self.params:
+                print(f"Ignoring duplicate index {path}: format {meta.get('format')}, params {meta['params']}")
+                return 0, None
+            self._signatures = z["signatures"].copy()
+            self._sizes = z["sizes"].copy()
+            self._ids = z["ids"].copy()
+            self._last_seen = z["last_seen"].copy()
+            self._count = self._synced = len(self._sizes)
+            self._position = dict(zip(self._ids.tolist(), range(self._count)))
+            blob, offsets = z["examples_blob"].tobytes(), z["examples_offsets"].tolist()
+            self._examples = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+            if len(z["band_keys"]):
+                self._table._runs = [(z["band_keys"].copy(), z["band_clusters"].copy())]
+        return meta["seq"], meta["generation"]
+
+    def _read_disk(self, path: Path, conn: Optional[sqlite3.Connection] = None) -> None:
+        """
+        Fill this empty index from the snapshot plus the log changes after it.
+        With `conn` (inside a write transaction nothing can compact under
+        us) one read is enough; otherwise a snapshot that does not match the
+        log is read again a few times, since a compaction may have replaced
+        it between the two reads.
+        """
+        log = self._log_for(path)
+        attempts = 1 if conn is not None else 5
+        for attempt in range(attempts):
+            fresh = DuplicateIndex(self.params, self.max_clusters, self.ttl_seconds)
+            seq, generation = fresh._read_snapshot(path)
+            if conn is not None:
+                state = _ClusterLog._state(conn)
+                rows = _ClusterLog._changes(conn, seq) if state is not None else []
+            else:
+                state, rows = log.read(seq)
+            if state is None or state.layout != self._layout():
+                # no log yet, or one written with other params: start empty
+                return
+            if generation is None and state.snapshot_seq == 0:
+                # nothing compacted yet: the log holds everything
+                pass
+            elif generation != state.generation:
+                if attempt + 1 < attempts:
+                    time.sleep(0.05)
+                    continue
+                # a snapshot the log does not know (its log was deleted): not used
+                print(f"Ignoring duplicate index {path}: not the snapshot its log expects")
+                fresh = DuplicateIndex(self.params, self.max_clusters, self.ttl_seconds)
+                rows = _ClusterLog._changes(conn, 0) if conn is not None else log.read(0)[1]
+            fresh._apply(rows)
+            fresh._applied_seq = state.head
+            fresh._log_generation = state.generation
+            fresh._snapshot_seq, fresh._snapshot_written = state.snapshot_seq, state.snapshot_written
+            self._take(fresh)
+            return
+
+    def _take(self, other: "DuplicateIndex") -> None:
+        # aliases handed out by this process stay valid across a reload
+        keep = {name: getattr(self, name) for name in ("_log", "_lock", "_aliases")}
+        self.__dict__.update(other.__dict__)
+        self.__dict__.update(keep)
+
+    @classmethod
+    def load(
+        cls, path: Union[str, Path], params: DedupParams = DedupParams(), max_clusters: int = 0, ttl_seconds: float = 0,
+    ) -> "DuplicateIndex":
+        """Index saved at `path` (snapshot plus log); an empty one if missing or built with other params."""
+        index = cls(params, max_clusters=max_clusters, ttl_seconds=ttl_seconds)
+        index._read_disk(Path(path))
+        return index
+
+    def _take_unsaved(self):
+        """Remove everything not on disk yet (new clusters, growth) and return it for _replay."""
+        n0, n = self._synced, self._count
+        growth = {int(self._ids[p]): w for p, w in self._dirty.items() if p < n0}
+        for p, w in self._dirty.items():
+            if p < n0:
+                self._sizes[p] -= w
+        new = (
+            self._signatures[n0:n].copy(), self._ids[n0:n].copy(), self._sizes[n0:n].copy(), self._examples[n0:n],
+        )
+        for cid in new[1].tolist():
+            del self._position[cid]
+        del self._examples[n0:]
+        self._count = n0
+        self._unsaved = _BucketTable()
+        self._dirty = {}
+        return new, growth
+
+    def _apply(self, rows: list) -> None:
+        """Append log changes (seq order) to the on-disk part of the index; nothing unsaved may be held."""
+        created = {}
+        grown = []
+        for seq, cid, grow, last_seen, signature, example in rows:
+            if signature is None:
+                grown.append((cid, grow, last_seen))
+            elif cid not in self._position and cid not in created:
+                created[cid] = (grow, last_seen, signature, example or "")
+        if created:
+            ids = np.fromiter(created, dtype=np.int64, count=len(created))
+            values = list(created.values())
+            sigs = np.frombuffer(b"".join(v[2] for v in values), dtype=np.uint32).reshape(len(values), -1)
+            positions = self._new_clusters(sigs, [v[3] for v in values], ids, 0.0)
+            self._sizes[positions] = [v[0] for v in values]
+            self._last_seen[positions] = [v[1] for v in values]
+            self._table.insert(self._band_keys(sigs).ravel(), np.repeat(positions, self.params.bands))
+        # growth of clusters pruned by a compaction is dropped
+        grown = [(self._position[cid], grow, last_seen) for cid, grow, last_seen in grown if cid in self._position]
+        if grown:
+            positions, grow, last_seen = (np.asarray(col) for col in zip(*grown))
+            np.add.at(self._sizes, positions, grow)
+            np.maximum.at(self._last_seen, positions, last_seen)
+        self._synced = self._count
+
+    def _replay(self, unsaved) -> Dict[int, int]:
+        """
+        Re-add what _take_unsaved removed on top of the disk state. Returns
+        {our id: id on disk} for clusters another process had created too;
+        those ids stay valid as aliases.
+        """
+        (sigs, ids, sizes, examples), growth = unsaved
+        now = time.time()
+        for cid, w in growth.items():
+            pos = self._position.get(cid)
+            if pos is not None:
+                self._sizes[pos] += w
+                self._last_seen[pos] = max(self._last_seen[pos], now)
+                self._dirty[pos] = self._dirty.get(pos, 0) + w
+        merged: Dict[int, int] = {}
+        if len(ids):
+            theirs = self.assign(sigs, sizes, examples, ids=ids)
+            merged = {a: b for a, b in zip(ids.tolist(), theirs) if a != b}
+        aliases = {a: merged.get(c, c) for a, c in self._aliases.items()}
+        aliases.update(merged)
+        self._aliases = {a: c for a, c in aliases.items() if c in self._position}
+        return merged
+
+    def _catch_up(self, path: Path, state: _LogState, rows: list, conn: Optional[sqlite3.Connection] = None) -> Dict[int, int]:
+        """Bring the on-disk part up to `state` (new rows, or a reload after a compaction) and replay our unsaved changes."""
+        unsaved = self._take_unsaved()
+        if state.generation != self._log_generation and not self._extends(state):
+            self._read_disk(path, conn)
+        else:
+            self._apply(rows)
+            self._applied_seq = state.head
+            self._log_generation = state.generation
+            self._snapshot_seq, self._snapshot_written = state.snapshot_seq, state.snapshot_written
+        return self._replay(unsaved)
+
+    def _extends(self, state: _LogState) -> bool:
+        # the new snapshot is ours plus changes we already applied (or the log
+        # is still empty and so is our on-disk part): nothing to reload
+        if state.head == 0:
+            return self._synced == 0
+        return state.previous is not None and state.previous == self._log_generation and (
+            self._applied_seq >= state.snapshot_seq
+        )
+
+    def refresh(self, path: Union[str, Path]) -> Dict[int, int]:
+        """
+        Pick up what other processes saved (keeps unsaved clusters and all
+        ids, see _replay): one small query when nothing changed, the new
+        log rows otherwise, a snapshot reload only after a compaction.
+        """
+        path = Path(path)
+        with self._lock:
+            state, rows = self._log_for(path).read(self._applied_seq)
+            if state is None or state.layout != self._layout():
+                return {}
+            if state.head <= self._applied_seq and (
+                state.generation == self._log_generation or self._extends(state)
+            ):
+                self._log_generation = state.generation
+                self._snapshot_seq, self._snapshot_written = state.snapshot_seq, state.snapshot_written
+                return {}
+            return self._catch_up(path, state, rows)
+
+    def save(self, path: Union[str, Path]) -> Dict[int, int]:
+        """
+        Append the clusters created or grown since the last save to the log,
+        after catching up with what other processes appended. Returns the
+        merged ids like _replay ({} when nothing was merged).
+        """
+        path = Path(path)
+        with self._lock:
+            if not self._dirty and self._count == self._synced:
+                return self.refresh(path)
+            layout = self._layout()
+            merged: Dict[int, int] = {}
+            with self._log_for(path).write(layout) as conn:
+                state = _ClusterLog._state(conn)
+                if state.layout != layout:
+                    # written with other params: start the log over with our clusters
+                    print(f"Duplicate index log {self._log.path} has another layout, starting it over")
+                    generation = uuid.uuid4().hex
+                    conn.execute("DELETE FROM changes")
+                    conn.execute(
+                        "UPDATE meta SET generation = ?, snapshot_seq = ?, snapshot_written = ?, layout = ?, previous = NULL",
+                        (generation, state.head, time.time(), layout),
+                    )
+                    self._dirty = {p: w for p, w in self._dirty.items() if p >= self._synced}
+                    self._synced = 0
+                    self._table, self._unsaved = _BucketTable(), self._all_buckets()
+                    state = _LogState(generation, state.head, time.time(), layout, None, state.head)
+                    self._log_generation, self._applied_seq = generation, state.head
+                elif state.head > self._applied_seq or (
+                    state.generation != self._log_generation and not self._extends(state)
+                ):
+                    merged = self._catch_up(
+                        path, state, _ClusterLog._changes(conn, self._applied_seq), conn,
+                    )
+                n0, n = self._synced, self._count
+                created = [
+                    (int(self._ids[p]), int(self._sizes[p]), float(self._last_seen[p]),
+                     self._signatures[p].tobytes(), self._examples[p])
+                    for p in range(n0, n)
+                ]
+                grown = [
+                    (int(self._ids[p]), w, float(self._last_seen[p]), None, None)
+                    for p, w in sorted(self._dirty.items()) if p < n0
+                ]
+                conn.executemany(
+                    "INSERT INTO changes (cluster_id, grow, last_seen, signature, example) VALUES (?, ?, ?, ?, ?)",
+                    created + grown,
+                )
+                head = _ClusterLog._state(conn).head
+            # committed: everything held is on disk now
+            keys, positions = self._unsaved.items()
+            self._table.insert(keys, positions)
+            self._unsaved = _BucketTable()
+            self._synced = self._count
+            self._dirty = {}
+            self._applied_seq, self._log_generation = head, state.generation
+            self._snapshot_seq, self._snapshot_written = state.snapshot_seq, state.snapshot_written
+        return merged
+
+    def _all_buckets(self) -> _BucketTable:
+        table = _BucketTable()
+        for source in (self._table, self._unsaved):
+            keys, positions = source.items()
+            table.insert(keys, positions)
+        return table
+
+    def needs_compaction(self) -> bool:
+        """True when the log has grown enough (or, with size bounds, aged enough) to fold into a snapshot."""
+        pending = self._applied_seq - self._snapshot_seq
+        if pending <= 0:
+            return False
+        if pending >= max(COMPACT_MIN_CHANGES, self._synced // 4):
+            return True
+        bounded = self.ttl_seconds or self.max_clusters
+        return bool(bounded) and time.time() - self._snapshot_written > COMPACT_MAX_AGE_SECONDS
+
+    def compact(self, path: Union[str, Path]) -> bool:
+        """
+        Write the on-disk state as a new snapshot, pruned to max_clusters /
+        ttl_seconds, and drop the log changes it contains. Meant for a
+        background thread: the index lock is only held to take references.
+        False if another process is compacting or already wrote a newer snapshot.
+        """
+        path = Path(path)
+        with _try_file_lock(path) as locked:
+            if not locked:
+                return False
+            with self._lock:
+                n, seq = self._synced, self._applied_seq
+                snap = DuplicateIndex(self.params, self.max_clusters, self.ttl_seconds)
+                # rows below _synced are never written in place, sizes / last_seen are
+                snap._signatures, snap._ids = self._signatures[:n], self._ids[:n]
+                snap._sizes, snap._last_seen = self._sizes[:n].copy(), self._last_seen[:n].copy()
+                for p, w in self._dirty.items():
+                    if p < n:
+                        snap._sizes[p] -= w
+                snap._examples = self._examples[:n]
+                snap._table._runs = list(self._table._runs)
+                generation = self._log_generation
+            state, _ = self._log_for(path).read(None)
+            if generation is None or state is None or state.generation != generation or state.snapshot_seq >= seq:
+                return False
+            snap._count = snap._synced = n
+            snap._position = dict(zip(snap._ids.tolist(), range(n)))
+            snap._prune(time.time())
+            pruned = snap._count < n
+
+            new_generation = uuid.uuid4().hex
+            tmp = path.with_name(f".{path.name}.{os.getpid()}")
+            with open(tmp, "wb") as f:
+                np.savez(f, **snap._state(new_generation, seq))
+            try:
+                with self._log_for(path).write(self._layout()) as conn:
+                    state = _ClusterLog._state(conn)
+                    if state.layout != self._layout() or state.generation != generation or state.snapshot_seq >= seq:
+                        return False
+                    os.replace(tmp, path)
+                    conn.execute(
+                        "UPDATE meta SET generation = ?, snapshot_seq = ?, snapshot_written = ?, previous = ?",
+                        (new_generation, seq, time.time(), None if pruned else generation),
+                    )
+                    conn.execute("DELETE FROM changes WHERE seq <= ?", (seq,))
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+        with self._lock:
+            if self._log_generation == generation:
+                # pruned: reloaded by the next refresh(); either way no second compaction meanwhile
+                self._snapshot_seq, self._snapshot_written = seq, time.time()
+                if not pruned:
+                    self._log_generation = new_generation
+        print(f"Compacted duplicate index {path}: {snap._count} clusters up to change {seq}")
+        return True
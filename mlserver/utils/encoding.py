@@ -0,0 +1,55 @@
+# mlserver/utils/encoding.py
+"""
+Response encodings for per-review results.
+
+ - rows (default): [{"text", "sentiment", "label", "probability", "keywords"}, ...]
+ - columnar: {"label": [...], "probability": [...], "sentiment": [...]}, one
+   array per requested field, so keys are not repeated for every row and
+   the review text is only echoed back when asked for
+ - MessagePack instead of JSON for either shape (msgpack is imported lazily)
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+RESULT_FIELDS = ("text", "label", "probability", "sentiment", "keywords", "cluster_id", "duplicate_count")
+DEFAULT_COLUMNS = ("label", "probability", "sentiment")
+MSGPACK_MIMETYPE = "application/x-msgpack"
+
+
+def parse_fields(value) -> List[str]:
+    """Columns to return from a list or comma-separated string; ValueError for unknown names."""
+    if value is None or value == "":
+        return list(DEFAULT_COLUMNS)
+    if isinstance(value, str):
+        fields = value.split(",")
+    elif isinstance(value, (list, tuple)) and all(isinstance(f, str) for f in value):
+        fields = list(value)
+    else:
+        raise ValueError("'fields' must be a comma-separated string or a list of field names")
+    fields = [f.strip() for f in fields if f.strip()]
+    unknown = [f for f in fields if f not in RESULT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown result fields {unknown}, expected some of {list(RESULT_FIELDS)}")
+    return fields
+
+
+def to_columnar(results: Iterable[dict], fields: Iterable[str] = DEFAULT_COLUMNS) -> Dict[str, list]:
+    results = list(results)
+    return {field: [r.get(field) for r in results] for field in fields}
+
+
+def pack_msgpack(payload) -> bytes:
+    import msgpack
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def wants_msgpack(encoding: Optional[str], accept: Optional[str]) -> bool:
+    """
+    True if the request asked for MessagePack (explicit "encoding" wins over
+    Accept); ValueError unless "encoding" is "json" or "msgpack".
+    """
+    if encoding is not None and encoding != "":
+        if not isinstance(encoding, str) or encoding.lower() not in ("json", "msgpack"):
+            raise ValueError("'encoding' must be \"json\" or \"msgpack\"")
+        return encoding.lower() == "msgpack"
+    return bool(accept) and MSGPACK_MIMETYPE in accept
@@ -0,0 +1,323 @@
+# mlserver/utils/jobs.py
+"""
+Asynchronous file-analysis jobs.
+
+ - JobStore: job state, progress and per-row results in a local SQLite file,
+   so jobs survive a worker restart without an external broker.
+ - JobRunner: a process pool with a bounded number of queued + running jobs.
+ - run_file_job: the worker entry point (runs in a pool process).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import List, Optional, Union
+
+
+class JobStore:
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                s3_key TEXT NOT NULL,
+                format TEXT,
+                kind TEXT NOT NULL DEFAULT 'job',
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                worker_pid INTEGER,
+                rows_done INTEGER NOT NULL DEFAULT 0,
+                bytes_done INTEGER NOT NULL DEFAULT 0,
+                bytes_total INTEGER,
+                model_version TEXT,
+                summary TEXT,
+                error TEXT
+            );
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            );
+            """
+        )
+        # files created before these columns existed
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "format" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN format TEXT")
+        if "kind" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN kind TEXT NOT NULL DEFAULT 'job'")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread (and per process after fork/spawn)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create(
+        self, s3_key: str, running: bool = False, fmt: Optional[str] = None, max_active: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        New queued job reading `s3_key` as `fmt` (None = detect); running=True
+        records a result set the calling process fills itself (synchronous
+        /analyze-file with "store": true).
+
+        With max_active, returns None instead of queueing when that many jobs
+        are already queued or running, counted over every process that
+        shares this file (the check and insert are one statement).
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._conn()
+        if running:
+            conn.execute(
+                "INSERT INTO jobs (id, status, s3_key, format, kind, created, started, worker_pid)"
+                " VALUES (?, 'running', ?, ?, 'results', ?, ?, ?)",
+                (job_id, s3_key, fmt, now, now, os.getpid()),
+            )
+        else:
+            cur = conn.execute(
+                "INSERT INTO jobs (id, status, s3_key, format, created) SELECT ?, 'queued', ?, ?, ?"
+                " WHERE ? IS NULL OR (SELECT COUNT(*) FROM jobs"
+                " WHERE kind = 'job' AND status IN ('queued', 'running')) < ?",
+                (job_id, s3_key, fmt, now, max_active, max_active),
+            )
+            if cur.rowcount != 1:
+                conn.commit()
+                return None
+        conn.commit()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def claim(self, job_id: str) -> bool:
+        """Mark a queued job as running by this process; False if someone else has it."""
+        conn = self._conn()
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'running', started = ?, worker_pid = ?, rows_done = 0, bytes_done = 0"
+            " WHERE id = ? AND status = 'queued'",
+            (time.time(), os.getpid(), job_id),
+        )
+        claimed = cur.rowcount == 1
+        if claimed:
+            # a re-run starts from scratch
+            conn.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+        conn.commit()
+        return claimed
+
+    def set_total_bytes(self, job_id: str, bytes_total: Optional[int], model_version: str) -> None:
+        conn = self._conn()
+        conn.execute(
+            "UPDATE jobs SET bytes_total = ?, model_version = ? WHERE id = ?",
+            (bytes_total, model_version, job_id),
+        )
+        conn.commit()
+
+    def append_results(self, job_id: str, results: List[dict], bytes_done: int) -> None:
+        """Store one analyzed chunk and advance progress in a single transaction."""
+        conn = self._conn()
+        start = conn.execute("SELECT rows_done FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        conn.executemany(
+            "INSERT INTO job_results (job_id, seq, data) VALUES (?, ?, ?)",
+            [(job_id, start + i, json.dumps(r)) for i, r in enumerate(results)],
+        )
+        conn.execute(
+            "UPDATE jobs SET rows_done = ?, bytes_done = ? WHERE id = ?",
+            (start + len(results), bytes_done, job_id),
+        )
+        conn.commit()
+
+    def finish(self, job_id: str, summary: dict) -> None:
+        conn = self._conn()
+        conn.execute(
+            "UPDATE jobs SET status = 'done', finished = ?, summary = ?, bytes_done = COALESCE(bytes_total, bytes_done)"
+            " WHERE id = ?",
+            (time.time(), json.dumps(summary), job_id),
+        )
+        conn.commit()
+
+    def fail(self, job_id: str, error: str) -> None:
+        conn = self._conn()
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', finished = ?, error = ? WHERE id = ?",
+            (time.time(), error, job_id),
+        )
+        conn.commit()
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[dict]:
+        rows = self._conn().execute(
+            "SELECT data FROM job_results WHERE job_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+            (job_id, offset, limit),
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def purge(self, older_than: float) -> int:
+        """Delete jobs (and their results) that finished before `older_than` (epoch seconds)."""
+        conn = self._conn()
+        old = [r[0] for r in conn.execute(
+            "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND finished < ?", (older_than,)
+        ).fetchall()]
+        for job_id in old:
+            conn.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        conn.commit()
+        return len(old)
+
+    def requeue_interrupted(self) -> List[str]:
+        """
+        Put jobs whose worker process is gone back in the queue (after a
+        restart or crash) and return every queued job id.
+        """
+        conn = self._conn()
+        for row in conn.execute("SELECT id, kind, worker_pid FROM jobs WHERE status = 'running'").fetchall():
+            if _pid_alive(row["worker_pid"]):
+                continue
+            if row["kind"] == "job":
+                conn.execute("UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE id = ?", (row["id"],))
+            else:
+                # a synchronous result set has no job to re-run
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished = ?, error = 'Server process exited' WHERE id = ?",
+                    (time.time(), row["id"]),
+                )
+        conn.commit()
+        return [r[0] for r in conn.execute(
+            "SELECT id FROM jobs WHERE status = 'queued' AND kind = 'job' ORDER BY created"
+        )]
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def progress(job: dict) -> dict:
+    """Public view of a job row: status, rows done, rows/sec and ETA."""
+    now = time.time()
+    started, finished = job.get("started"), job.get("finished")
+    elapsed = ((finished or now) - started) if started else 0.0
+    rows_done = job.get("rows_done") or 0
+    rows_per_sec = rows_done / elapsed if elapsed > 0 else 0.0
+
+    fraction = None
+    eta = None
+    if job["status"] == "done":
+        fraction, eta = 1.0, 0.0
+    elif job.get("bytes_total"):
+        # rows are unknown up front; estimate from the share of the file read
+        # (reads run ahead of parsing, so stay below 1.0 until the job is done)
+        fraction = min(0.99, (job.get("bytes_done") or 0) / job["bytes_total"])
+        if 0 < fraction < 1 and job["status"] == "running":
+            eta = elapsed * (1 - fraction) / fraction
+
+    view = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "s3_key": job["s3_key"],
+        "rows_done": rows_done,
+        "rows_per_sec": rows_per_sec,
+        "progress": fraction,
+        "eta_seconds": eta,
+        "elapsed_seconds": elapsed,
+        "model_version": job.get("model_version"),
+    }
+    if job.get("summary"):
+        view["summary"] = json.loads(job["summary"])
+    if job.get("error"):
+        view["error"] = job["error"]
+    return view
+
+
+class JobRunner:
+    """
+    Process pool for file jobs. At most `max_pending` jobs may be queued or
+    running in this process's pool; submit() returns False beyond that. The
+    bound across processes is JobStore.create(max_active=...).
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = 2, max_pending: int = 16, start_method: str = "spawn"):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._ctx = get_context(start_method)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._ctx)
+            return self._executor
+
+    def submit(self, job_id: str) -> bool:
+        if not self._slots.acquire(blocking=False):
+            return False
+        try:
+            future = self._pool().submit(run_file_job, str(self.store.path), job_id)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _f: self._slots.release())
+        return True
+
+    def resume(self) -> int:
+        """Resubmit queued/interrupted jobs (as many as the queue allows)."""
+        resumed = 0
+        for job_id in self.store.requeue_interrupted():
+            if not self.submit(job_id):
+                break
+            resumed += 1
+        if resumed:
+            print(f"Resumed {resumed} queued analysis job(s)")
+        return resumed
+
+
+def run_file_job(store_path: str, job_id: str) -> None:
+    """Pool worker: stream the S3 file through analyze_batch chunk by chunk."""
+    # imported here so the pool process loads the service (model, config) itself
+    import app
+
+    store = JobStore(store_path)
+    if not store.claim(job_id):
+        return
+    job = store.get(job_id)
+    try:
+        app.run_file_analysis(
+            job["s3_key"],
+            fmt=job["format"],
+            on_start=lambda total_bytes, version: store.set_total_bytes(job_id, total_bytes, version),
+            on_chunk=lambda results, bytes_done: store.append_results(job_id, results, bytes_done),
+            on_done=lambda summary: store.finish(job_id, summary),
+        )
+    except Exception as e:
+        print(f"Job {job_id} failed:", e)
+        store.fail(job_id, str(e))
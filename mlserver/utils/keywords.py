@@ -1,3 +1,20 @@
+"""
+Keyword extraction.
+
+With a model that exposes its vocabulary, keywords come from the tf-idf
+matrix already built for prediction (see app._score_texts): the top k terms
+per review, either by tf-idf weight or by contribution to the model's score,
+selected for the whole batch at once with NumPy. keywords_from_tokens is the
+fallback for models without term names (hashing vectorizer) or no model.
+"""
+
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+KEYWORD_MODES = ("tfidf", "contribution")
+
+
 def extract_keywords(text: str, min_len: int = 4):
     words = set()
     for w in text.split():
@@ -5,3 +22,87 @@ def extract_keywords(text: str, min_len: int = 4):
         if len(w) >= min_len:
             words.add(w)
     return list(words)
+
+
+def keywords_from_tokens(tokens: Iterable[str], min_len: int = 4, k: Optional[int] = None) -> List[str]:
+    """Distinct tokens of at least min_len chars, in first-seen order (tokens
+    come from utils.preprocess.process_text, so no re-splitting is needed).
+    At most k of them when k is given."""
+    words = list(dict.fromkeys(t for t in tokens if len(t) >= min_len))
+    return words if k is None else words[:k]
+
+
+class TermWeights(NamedTuple):
+    """
+    Non-zero entries of a batch's feature matrix in COO form: one
+    (row, col) per distinct term per review, with its l2-normalized tf-idf
+    value and its contribution to the decision function (tf-idf * coef,
+    towards the model's positive class).
+    """
+    rows: np.ndarray
+    cols: np.ndarray
+    tfidf: np.ndarray
+    contributions: np.ndarray
+    n_docs: int
+
+
+class KeywordVocab(NamedTuple):
+    """Term per feature column, and which columns may be reported as keywords."""
+    terms: np.ndarray
+    eligible: np.ndarray
+
+    @classmethod
+    def build(cls, terms: Sequence[str], min_len: int = 4) -> "KeywordVocab":
+        # same rule as keywords_from_tokens for unigrams (min_len chars); an
+        # n-gram needs one word that long and no 2-char filler ("not worth",
+        # not "it bought")
+        def keep(term: str) -> bool:
+            words = term.split(" ")
+            return max(map(len, words)) >= min_len and min(map(len, words)) > 2
+
+        eligible = np.fromiter((keep(term) for term in terms), dtype=bool, count=len(terms))
+        return cls(terms=np.asarray(terms, dtype=object), eligible=eligible)
+
+
+def top_terms(
+    weights: TermWeights,
+    vocab: KeywordVocab,
+    k: int,
+    mode: str = "tfidf",
+    direction: Optional[np.ndarray] = None,
+) -> List[List[str]]:
+    """
+    Top k keywords for every row of the batch, best first.
+
+    mode="tfidf" ranks a review's terms by tf-idf weight. mode="contribution"
+    ranks them by how much they push the score towards `direction` (per row,
+    +1 for the positive class, -1 for the other; default +1), so a review
+    labelled suspicious lists the terms that made it suspicious. Terms that
+    push the other way are never listed.
+    """
+    n_docs = weights.n_docs
+    if mode == "contribution":
+        scores = weights.contributions
+        if direction is not None:
+            scores = scores * np.asarray(direction, dtype=np.float64)[weights.rows]
+    elif mode == "tfidf":
+        scores = weights.tfidf
+    else:
+        raise ValueError(f"Unknown keyword mode {mode!r} (expected one of {', '.join(KEYWORD_MODES)})")
+
+    keep = (scores > 0) & vocab.eligible[weights.cols]
+    rows, cols, scores = weights.rows[keep], weights.cols[keep], scores[keep]
+
+    # by row, then descending score: 1 / (1 + score) lies in (0, 1), so one
+    # float key replaces a (much slower) lexsort; the stable sort keeps
+    # equal scores in column order
+    order = np.argsort(rows + 1.0 / (1.0 + scores), kind="stable")
+    rows, cols = rows[order], cols[order]
+    row_starts = np.searchsorted(rows, np.arange(n_docs + 1))
+    rank = np.arange(rows.size) - row_starts[rows]
+    top = rank < k
+    rows, cols = rows[top], cols[top]
+
+    names = vocab.terms[cols].tolist()
+    bounds = np.searchsorted(rows, np.arange(n_docs + 1)).tolist()
+    return [names[bounds[i]:bounds[i + 1]] for i in range(n_docs)]
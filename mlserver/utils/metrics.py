@@ -0,0 +1,237 @@
+# mlserver/utils/metrics.py
+"""
+Lightweight in-process metrics for the hot path.
+
+ - Counter / Histogram with label support, rendered in Prometheus text format
+ - stage(name): context manager feeding the stage latency histogram and, when
+   a request asked for it, the per-request timing breakdown
+ - SamplingProfiler: optional wall-clock stack sampler (ML_PROFILE=1)
+
+Metrics are per process; with several gunicorn workers each one exposes its
+own /metrics and the scraper aggregates.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter as _TallyCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# latency buckets in seconds (1ms .. 60s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def escape_label_value(value) -> str:
+    """Label value as it goes between the quotes of the exposition format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label_value(v)}"' for k, v in items) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', repr(bound))])} {cumulative}")
+                cumulative += counts[-1]
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total[0]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("mlserver_stage_duration_seconds", "Time spent per processing stage")
+REQUEST_SECONDS = Histogram("mlserver_http_request_duration_seconds", "HTTP request latency by endpoint")
+ROWS_ANALYZED = Counter("mlserver_rows_analyzed_total", "Reviews returned by analyze_batch")
+ROWS_SCORED = Counter("mlserver_rows_scored_total", "Distinct reviews actually scored (cache misses)")
+MODEL_FALLBACKS = Counter("mlserver_model_fallback_total", "Rows labelled by the sentiment fallback rule")
+PREDICT_RETRIES = Counter("mlserver_predict_chunk_retry_total", "Prediction chunks retried row by row")
+FILE_ROWS = Counter("mlserver_file_rows_total", "Rows read from uploaded files")
+BATCH_REVIEWS = Histogram(
+    "mlserver_microbatch_reviews", "Reviews per micro-batch (ASGI /analyze)",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+BATCH_REJECTED = Counter("mlserver_microbatch_rejected_total", "/analyze calls refused because the batch queue was full")
+
+METRICS = [
+    STAGE_SECONDS, REQUEST_SECONDS, ROWS_ANALYZED, ROWS_SCORED, MODEL_FALLBACKS, PREDICT_RETRIES, FILE_ROWS,
+    BATCH_REVIEWS, BATCH_REJECTED,
+]
+
+
+def after_fork() -> None:
+    """Fresh metric locks in a forked child: a parent thread may have held one at fork time."""
+    for metric in METRICS:
+        metric._lock = threading.Lock()
+
+# per-request stage breakdown, active only when the request asked for it
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def current_request_timings() -> Optional[Dict[str, float]]:
+    return _request_timings.get()
+
+
+def stop_request_timings() -> None:
+    # worker threads are reused across requests, so always clear
+    _request_timings.set(None)
+
+
+# seconds recorded per stage on this thread, so a stage can leave out nested ones
+_thread_stages = threading.local()
+
+
+def _thread_totals() -> Dict[str, float]:
+    totals = getattr(_thread_stages, "totals", None)
+    if totals is None:
+        totals = _thread_stages.totals = {}
+    return totals
+
+
+def record_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=name)
+    totals = _thread_totals()
+    totals[name] = totals.get(name, 0.0) + seconds
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str, exclude: Iterable[str] = ()):
+    """
+    Time a block as processing stage `name`. Time the block spends in the
+    `exclude` stages (recorded on the same thread) is left out, so the two
+    do not overlap in the breakdown.
+    """
+    exclude = tuple(exclude)
+    totals = _thread_totals()
+    nested = [totals.get(other, 0.0) for other in exclude]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        elapsed -= sum(totals.get(other, 0.0) - before for other, before in zip(exclude, nested))
+        record_stage(name, max(elapsed, 0.0))
+
+
+def render(extra_lines: Iterable[str] = ()) -> str:
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler: a daemon thread snapshots every thread's
+    stack each `interval` seconds and counts collapsed stacks
+    ("mod:func;mod:func ..."), the input format of flamegraph tools.
+    """
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self._stacks: _TallyCounter = _TallyCounter()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                self.samples += 1
+                for ident, frame in frames.items():
+                    if ident == own:
+                        continue
+                    stack = []
+                    while frame is not None and len(stack) < self.max_depth:
+                        code = frame.f_code
+                        stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                        frame = frame.f_back
+                    self._stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self, reset: bool = False) -> str:
+        with self._lock:
+            text = "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+            if reset:
+                self._stacks.clear()
+                self.samples = 0
+        return text + "\n"
@@ -1,7 +1,34 @@
 import re
+from typing import Iterable, List, NamedTuple
+
+_URL_RE = re.compile(r"http\S+")
+# one pass for r"[^a-z0-9\s]" -> " " followed by r"\s+" -> " ": every run of
+# characters outside [a-z0-9] ends up as a single space either way
+_NON_ALNUM_RUN_RE = re.compile(r"[^a-z0-9]+")
+
+
 def clean_text(text: str) -> str:
     text = str(text).lower()
-    text = re.sub(r"http\S+", " ", text)
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _URL_RE.sub(" ", text)
+    text = _NON_ALNUM_RUN_RE.sub(" ", text).strip()
     return text
+
+
+class ProcessedText(NamedTuple):
+    """A review normalized once: raw text, clean_text() output and its tokens."""
+    raw: str
+    cleaned: str
+    tokens: List[str]
+
+
+def process_text(text) -> ProcessedText:
+    raw = str(text)
+    cleaned = clean_text(raw)
+    # cleaned text is [a-z0-9]+ runs separated by single spaces
+    return ProcessedText(raw, cleaned, cleaned.split(" ") if cleaned else [])
+
+
+def process_batch(texts: Iterable) -> List[ProcessedText]:
+    """Normalize and tokenize a batch of reviews; the tokens are shared by
+    keyword extraction and the compiled scorer."""
+    return [process_text(t) for t in texts]
@@ -0,0 +1,259 @@
+# mlserver/utils/readers.py
+"""
+Review text readers for uploaded files.
+
+Supported formats: CSV and JSON Lines (plain, .gz or .zst), Parquet and
+Arrow/Feather (IPC file format). The text column is picked from the
+header/schema plus a small row sample, and then only that column is read:
+pandas gets usecols for CSV, and pyarrow reads one column for Parquet/Arrow. Wide exports therefore do
+not pay for parsing columns nobody uses.
+
+pandas, pyarrow (Parquet/Arrow) and zstandard (.zst) are imported on the
+first file that needs them, so importing this module stays cheap.
+
+A missing/null text value is read as "" in every format, so results do not
+depend on the file format.
+"""
+
+import gzip
+import io
+import json
+import shutil
+import tempfile
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+POSSIBLE_TEXT_COLS = ["text", "text_", "review", "review_text", "reviewText", "content", "body", "reviewBody"]
+FORMATS = ("csv", "csv.gz", "csv.zst", "jsonl", "jsonl.gz", "jsonl.zst", "parquet", "arrow")
+
+# rows used to guess the text column when no known name matches
+SAMPLE_ROWS = 200
+# CSV bytes read up front for the header + sample (grown if rows are long)
+SAMPLE_BYTES = 256 * 1024
+
+_EXTENSIONS = [
+    (".jsonl.gz", "jsonl.gz"), (".ndjson.gz", "jsonl.gz"), (".gz", "csv.gz"),
+    (".jsonl.zst", "jsonl.zst"), (".ndjson.zst", "jsonl.zst"), (".zst", "csv.zst"),
+    (".jsonl", "jsonl"), (".ndjson", "jsonl"),
+    (".parquet", "parquet"), (".pq", "parquet"),
+    (".feather", "arrow"), (".arrow", "arrow"), (".ipc", "arrow"),
+    (".csv", "csv"),
+]
+_MAGIC = [(b"PAR1", "parquet"), (b"ARROW1", "arrow"), (b"\x1f\x8b", "csv.gz"), (b"\x28\xb5\x2f\xfd", "csv.zst")]
+
+
+def format_from_name(name: str) -> Optional[str]:
+    """File format implied by the key's extension, or None."""
+    lowered = (name or "").lower()
+    return next((fmt for ext, fmt in _EXTENSIONS if lowered.endswith(ext)), None)
+
+
+def detect_format(name: str, head: bytes = b"") -> str:
+    """File format from the key's extension, else from the first bytes (default csv)."""
+    fmt = format_from_name(name)
+    if fmt is not None:
+        return fmt
+    for magic, fmt in _MAGIC:
+        if head.startswith(magic):
+            return fmt
+    if head.lstrip()[:1] == b"{":
+        return "jsonl"
+    return "csv"
+
+
+def needs_random_access(fmt: str) -> bool:
+    """Parquet/Arrow footers are at the end, so these need a seekable file."""
+    return fmt in ("parquet", "arrow")
+
+
+def to_seekable(fileobj, max_memory: int = 64 * 1024 * 1024):
+    """Copy a stream into a spooled temp file (in memory up to max_memory bytes)."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    shutil.copyfileobj(fileobj, spooled, 1 << 20)
+    spooled.seek(0)
+    return spooled
+
+
+def detect_text_column(columns: Sequence[str], sample: Optional["pd.DataFrame"] = None) -> Optional[str]:
+    """Pick the review text column by name, else the sampled object column with the largest avg length."""
+    text_col = next((c for c in POSSIBLE_TEXT_COLS if c in columns), None)
+    if text_col is None and sample is not None:
+        import pandas as pd
+
+        # object columns, or the dedicated string dtype of newer pandas
+        obj_cols = [c for c in sample.columns if pd.api.types.is_string_dtype(sample[c].dtype)]
+        if obj_cols:
+            avg_len = {c: sample[c].fillna("").astype(str).map(len).mean() for c in obj_cols}
+            text_col = max(avg_len, key=avg_len.get)
+            print(f"Fallback chosen text column: {text_col}")
+    return text_col
+
+
+def _missing_column_error() -> ValueError:
+    return ValueError("File must contain a text-like column (e.g. 'text' or 'text_')")
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Replays already-consumed bytes, then continues with the underlying stream."""
+
+    def __init__(self, head: bytes, stream):
+        self._head = memoryview(head)
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        if self._head.nbytes:
+            n = min(len(buf), self._head.nbytes)
+            buf[:n] = self._head[:n]
+            self._head = self._head[n:]
+            return n
+        data = self._stream.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+
+def _decompressed(fileobj, compression: str):
+    if compression == "gz":
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    if compression == "zst":
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True)
+    return fileobj
+
+
+def _iter_csv(stream, chunk_rows: int) -> Iterator[List[str]]:
+    import pandas as pd
+
+    # header + sample from the first bytes, then parse only the text column
+    head = stream.read(SAMPLE_BYTES)
+    while head.count(b"\n") <= SAMPLE_ROWS:
+        more = stream.read(SAMPLE_BYTES)
+        if not more:
+            break
+        head += more
+    complete = head[:head.rfind(b"\n") + 1] or head
+    try:
+        sample = pd.read_csv(io.BytesIO(complete), nrows=SAMPLE_ROWS, low_memory=False)
+    except pd.errors.EmptyDataError:
+        return
+    except Exception:
+        # e.g. a quoted field spanning the sample boundary: fall back to the header line
+        sample = pd.read_csv(io.BytesIO(complete.split(b"\n", 1)[0]), nrows=0)
+    text_col = detect_text_column(list(sample.columns), sample)
+    if text_col is None:
+        raise _missing_column_error()
+
+    source = io.BufferedReader(_PrefixedStream(head, stream))
+    # empty fields are "" (not NaN -> "nan"), and reviews reading "NA" or "null" stay text
+    chunks = pd.read_csv(source, usecols=[text_col], chunksize=chunk_rows, low_memory=False,
+                         keep_default_na=False, na_values=[])
+    for chunk in chunks:
+        yield chunk[text_col].fillna("").astype(str).tolist()
+
+
+def _iter_jsonl(stream, chunk_rows: int) -> Iterator[List[str]]:
+    lines = (line for line in io.TextIOWrapper(stream, encoding="utf-8") if line.strip())
+    sample_rows = []
+    for line in lines:
+        sample_rows.append(json.loads(line))
+        if len(sample_rows) >= SAMPLE_ROWS:
+            break
+    if not sample_rows:
+        return
+    import pandas as pd
+
+    sample = pd.DataFrame.from_records(sample_rows)
+    text_col = detect_text_column(list(sample.columns), sample)
+    if text_col is None:
+        raise _missing_column_error()
+
+    def value(row) -> str:
+        v = row.get(text_col) if isinstance(row, dict) else None
+        # null, and the NaN json.loads accepts, are "" like a null in any other format
+        return "" if v is None or v != v else str(v)
+
+    batch = [value(r) for r in sample_rows]
+    for line in lines:
+        if len(batch) >= chunk_rows:
+            yield batch
+            batch = []
+        batch.append(value(json.loads(line)))
+    if batch:
+        yield batch
+
+
+def _string_fields(schema) -> List[str]:
+    import pyarrow as pa
+    return [f.name for f in schema if pa.types.is_string(f.type) or pa.types.is_large_string(f.type)]
+
+
+def _arrow_strings(column) -> List[str]:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    return pc.fill_null(pc.cast(column, pa.string()), "").to_pylist()
+
+
+def _arrow_source(fileobj):
+    # in-memory downloads (BytesIO, utils.s3.MappedFile) are read zero-copy
+    if hasattr(fileobj, "getbuffer"):
+        import pyarrow as pa
+        return pa.BufferReader(pa.py_buffer(fileobj.getbuffer()))
+    return fileobj
+
+
+def _iter_parquet(fileobj, chunk_rows: int) -> Iterator[List[str]]:
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(_arrow_source(fileobj))
+    names = pf.schema_arrow.names
+    text_col = detect_text_column(names)
+    if text_col is None and pf.metadata.num_rows:
+        sample = next(pf.iter_batches(batch_size=SAMPLE_ROWS, columns=_string_fields(pf.schema_arrow)))
+        text_col = detect_text_column(names, sample.to_pandas())
+    if text_col is None:
+        raise _missing_column_error()
+    for batch in pf.iter_batches(batch_size=chunk_rows, columns=[text_col]):
+        yield _arrow_strings(batch.column(0))
+
+
+def _iter_arrow(fileobj, chunk_rows: int) -> Iterator[List[str]]:
+    import pyarrow.ipc as ipc
+
+    fileobj = _arrow_source(fileobj)
+    reader = ipc.open_file(fileobj)
+    names = reader.schema.names
+    text_col = detect_text_column(names)
+    if text_col is None and reader.num_record_batches:
+        sample = reader.get_batch(0).slice(0, SAMPLE_ROWS).select(_string_fields(reader.schema))
+        text_col = detect_text_column(names, sample.to_pandas())
+    if text_col is None:
+        raise _missing_column_error()
+    # reopen reading only the text column's buffers
+    reader = ipc.open_file(fileobj, options=ipc.IpcReadOptions(included_fields=[names.index(text_col)]))
+    for i in range(reader.num_record_batches):
+        column = reader.get_batch(i).column(0)
+        for start in range(0, len(column), chunk_rows):
+            yield _arrow_strings(column.slice(start, chunk_rows))
+
+
+def iter_text_chunks(fileobj, fmt: str, chunk_rows: int) -> Iterator[List[str]]:
+    """
+    Yield lists of review texts (at most chunk_rows each) from a binary file
+    object. Parquet/Arrow need a seekable file (see needs_random_access).
+    Raises ValueError if no text-like column is found.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported file format: {fmt}")
+    if fmt == "parquet":
+        return _iter_parquet(fileobj, chunk_rows)
+    if fmt == "arrow":
+        return _iter_arrow(fileobj, chunk_rows)
+    base, _, compression = fmt.partition(".")
+    stream = _decompressed(fileobj, compression)
+    if base == "jsonl":
+        return _iter_jsonl(stream, chunk_rows)
+    return _iter_csv(stream, chunk_rows)
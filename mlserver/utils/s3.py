@@ -0,0 +1,202 @@
+# mlserver/utils/s3.py
+"""
+Process-wide S3 access for uploads.
+
+ - one boto3 client per process with a sized connection pool, so requests
+   reuse TCP/TLS connections instead of handshaking every time
+ - download(): the object lands in a preallocated mmap (anonymous, or an
+   unlinked temp file above a size limit); objects above a threshold are
+   fetched with parallel byte-range GETs written straight into their slice
+ - AWS_S3_ENDPOINT_URL (e.g. MinIO/moto) or set_client() for local testing
+"""
+
+import io
+import mmap
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Optional
+
+READ_BLOCK = 1 << 20
+PART_ATTEMPTS = 3
+
+
+class MappedFile(io.RawIOBase):
+    """Read-only, seekable file over a downloaded object held in an mmap."""
+
+    def __init__(self, mm: Optional[mmap.mmap], size: int):
+        self._mm = mm
+        self.size = size
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        n = max(0, min(len(buf), self.size - self._pos))
+        if n:
+            with memoryview(self._mm) as view:
+                buf[:n] = view[self._pos:self._pos + n]
+            self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def getbuffer(self) -> memoryview:
+        """Zero-copy view of the whole object (e.g. for pyarrow)."""
+        return memoryview(self._mm) if self._mm is not None else memoryview(b"")
+
+    def close(self) -> None:
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # a consumer still holds a view; the mapping goes away with it
+                pass
+        super().close()
+
+
+class S3Accessor:
+    """
+    Shared S3 client plus download helpers. Thread-safe; the client and the
+    range-download pool are rebuilt after a fork, since neither survives one.
+    """
+
+    def __init__(
+        self,
+        region: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        max_pool_connections: int = 32,
+        parallel_threshold: int = 64 << 20,
+        part_size: int = 8 << 20,
+        max_workers: int = 8,
+        memory_limit: int = 256 << 20,
+        spool_dir: Optional[str] = None,
+    ):
+        self.region = region
+        self.endpoint_url = endpoint_url
+        self.max_pool_connections = max_pool_connections
+        self.parallel_threshold = parallel_threshold
+        self.part_size = max(1, part_size)
+        self.max_workers = max(1, max_workers)
+        self.memory_limit = memory_limit
+        self.spool_dir = spool_dir
+        self._client: Any = None
+        self._injected = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._executor = None
+            if not self._injected:
+                self._client = None
+
+    @property
+    def client(self):
+        with self._lock:
+            self._check_pid()
+            if self._client is None:
+                import boto3
+                from botocore.config import Config
+
+                self._client = boto3.client(
+                    "s3",
+                    region_name=self.region,
+                    endpoint_url=self.endpoint_url,
+                    config=Config(
+                        max_pool_connections=self.max_pool_connections,
+                        tcp_keepalive=True,
+                        retries={"max_attempts": 5, "mode": "adaptive"},
+                    ),
+                )
+            return self._client
+
+    def set_client(self, client) -> None:
+        """Use `client` (anything with get_object/head_object) instead of boto3, e.g. a local stub."""
+        with self._lock:
+            self._client = client
+            self._injected = client is not None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            self._check_pid()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="s3-range")
+            return self._executor
+
+    def get_object(self, bucket: str, key: str) -> dict:
+        """Plain streaming GET (the caller reads and closes obj["Body"])."""
+        return self.client.get_object(Bucket=bucket, Key=key)
+
+    def size(self, bucket: str, key: str) -> int:
+        return int(self.client.head_object(Bucket=bucket, Key=key)["ContentLength"])
+
+    def _allocate(self, size: int) -> mmap.mmap:
+        if size <= self.memory_limit:
+            return mmap.mmap(-1, size)
+        # big objects go to an unlinked temp file; the mapping keeps it alive
+        with tempfile.TemporaryFile(dir=self.spool_dir) as f:
+            f.truncate(size)
+            return mmap.mmap(f.fileno(), size)
+
+    def _fill(self, bucket: str, key: str, mm: mmap.mmap, start: int, end: int, ranged: bool) -> None:
+        """GET bytes [start, end) into mm[start:end], retrying the part on a broken stream."""
+        for attempt in range(PART_ATTEMPTS):
+            kwargs = {"Range": f"bytes={start}-{end - 1}"} if ranged else {}
+            body = self.client.get_object(Bucket=bucket, Key=key, **kwargs)["Body"]
+            pos = start
+            try:
+                while pos < end:
+                    data = body.read(min(READ_BLOCK, end - pos))
+                    if not data:
+                        raise IOError(f"Short read for s3://{bucket}/{key} at byte {pos}")
+                    mm[pos:pos + len(data)] = data
+                    pos += len(data)
+                return
+            except Exception:
+                if attempt == PART_ATTEMPTS - 1:
+                    raise
+            finally:
+                body.close()
+
+    def download(self, bucket: str, key: str) -> MappedFile:
+        """
+        Whole object as a seekable MappedFile. Objects of at least
+        parallel_threshold bytes are split into part_size ranges fetched
+        concurrently on the shared pool.
+        """
+        size = self.size(bucket, key)
+        if size == 0:
+            return MappedFile(None, 0)
+        mm = self._allocate(size)
+        try:
+            if size < self.parallel_threshold:
+                self._fill(bucket, key, mm, 0, size, ranged=False)
+            else:
+                parts = [(s, min(s + self.part_size, size)) for s in range(0, size, self.part_size)]
+                pool = self._pool()
+                futures = [pool.submit(self._fill, bucket, key, mm, s, e, True) for s, e in parts]
+                # let every part finish before the buffer can be closed
+                wait(futures)
+                for future in futures:
+                    future.result()
+        except Exception:
+            mm.close()
+            raise
+        return MappedFile(mm, size)
@@ -1,6 +1,274 @@
-from textblob import TextBlob
+"""
+Review sentiment (polarity in [-1, 1]).
+
+get_sentiment_score is the original per-review TextBlob call.
+get_sentiment_scores is a batched, TextBlob-free port of pattern's lexicon
+sentiment (what TextBlob uses): the en-sentiment.xml lexicon is compiled
+once into a word -> id table plus NumPy polarity/intensity arrays, and the
+same tokenizer, negation, intensifier, "!" and emoticon rules are applied.
+
+It is not vectorized end to end. Those rules carry state from token to
+token (a modifier or negation applies to the next word, "!" to the previous
+assessment), so tokenizing and scoring is still a plain Python loop per
+review; only the per-review averaging runs as one NumPy reduction over the
+batch. The speedup comes from skipping TextBlob's object construction,
+tagging and per-call lexicon lookups, not from array math.
+"""
+
+import importlib.util
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from xml.etree import ElementTree
+
+import numpy as np
+
+
 def get_sentiment_score(text: str) -> float:
     try:
+        from textblob import TextBlob
         return float(TextBlob(text).sentiment.polarity)
     except Exception:
         return 0.0
+
+
+# --- pattern tokenizer (textblob/_text.py find_tokens) ---------------------------
+
+_PUNCTUATION = ".,;:!?()[]{}`''\"@#$^&*+-|=~_"
+_PUNCT_NO_PERIOD = tuple(_PUNCTUATION.replace(".", ""))
+_PUNCT_WITH_PERIOD = _PUNCT_NO_PERIOD + (".",)
+_ABBREVIATIONS = {
+    "a.", "adj.", "adv.", "al.", "a.m.", "c.", "cf.", "comp.", "conf.", "def.",
+    "ed.", "e.g.", "esp.", "etc.", "ex.", "f.", "fig.", "gen.", "id.", "i.e.",
+    "int.", "l.", "m.", "Med.", "Mil.", "Mr.", "n.", "n.q.", "orig.", "pl.",
+    "pred.", "pres.", "p.m.", "ref.", "v.", "vs.", "w/",
+}
+_RE_ABBR1 = re.compile(r"^[A-Za-z]\.$")
+_RE_ABBR2 = re.compile(r"^([A-Za-z]\.)+$")
+_RE_ABBR3 = re.compile("^[A-Z][" + "|".join("bcdfghjklmnpqrstvwxz") + "]+.$")
+_CONTRACTIONS = ("'d", "'m", "'s", "'ll", "'re", "'ve", "n't")
+_RE_CONTRACTIONS = re.compile("|".join(re.escape(c) for c in _CONTRACTIONS))
+_RE_LINEBREAK = re.compile(r"\n{2,}")
+_RE_SPACES = re.compile(r"\s+")
+_QUOTES = str.maketrans({"“": " “ ", "”": " ” ", "‘": " ‘ ", "’": " ’ ", "'": " ' ", '"': ' " '})
+
+_EMOTICONS = {
+    +1.00: ("<3", "♥", ">:D", ":-D", ":D", "=-D", "=D", "X-D", "x-D", "XD", "xD", "8-D"),
+    +0.75: (">:P", ":-P", ":P", ":-p", ":p", ":-b", ":b", ":c)", ":o)", ":^)"),
+    +0.50: (">:)", ":-)", ":)", "=)", "=]", ":]", ":}", ":>", ":3", "8)", "8-)"),
+    +0.25: (">;]", ";-)", ";)", ";-]", ";]", ";D", ";^)", "*-)", "*)"),
+    +0.05: (">:o", ":-O", ":O", ":o", ":-o", "o_O", "o.O", "°O°", "°o°"),
+    -0.25: (">:/", ":-/", ":/", ":\\", ">:\\", ":-.", ":-s", ":s", ":S", ":-S", ">.>"),
+    -0.75: (">:[", ":-(", ":(", "=(", ":-[", ":[", ":{", ":-<", ":c", ":-c", "=/"),
+    -1.00: (":'(", ":'''(", ";'("),
+}
+# lowercased emoticon -> polarity, first match wins like pattern's dict scan
+_EMOTICON_POLARITY: Dict[str, float] = {}
+for _p, _faces in _EMOTICONS.items():
+    for _face in _faces:
+        _EMOTICON_POLARITY.setdefault(_face.lower(), _p)
+_RE_EMOTICONS = re.compile(
+    r"(%s)($|\s)" % "|".join(r" ?".join(re.escape(ch) for ch in face) for faces in _EMOTICONS.values() for face in faces)
+)
+_RE_SARCASM = re.compile(r"\( ?\! ?\)")
+
+_NEGATIONS = frozenset(("no", "not", "n't", "never"))
+
+
+def _is_abbreviation(t: str) -> bool:
+    return (
+        t in _ABBREVIATIONS
+        or _RE_ABBR1.match(t) is not None
+        or _RE_ABBR2.match(t) is not None
+        or _RE_ABBR3.match(t) is not None
+    )
+
+
+def tokenize_for_sentiment(text: str) -> List[str]:
+    """Lowercased token stream that pattern's Sentiment assesses for `text`."""
+    text = _RE_CONTRACTIONS.sub(lambda m: " " + m.group(0), text)
+    text = text.translate(_QUOTES).replace("\r\n", "\n")
+    text = _RE_LINEBREAK.sub(" ", text)
+    tokens: List[str] = []
+    for t in _RE_SPACES.sub(" ", text).split():
+        tail = []
+        while t.startswith(_PUNCT_NO_PERIOD) and t not in _CONTRACTIONS:
+            tokens.append(t[0])
+            t = t[1:]
+        while t.endswith(_PUNCT_WITH_PERIOD) and t not in _CONTRACTIONS:
+            if t.endswith(_PUNCT_NO_PERIOD):
+                tail.append(t[-1])
+                t = t[:-1]
+            if t.endswith("..."):
+                tail.append("...")
+                t = t[:-3].rstrip(".")
+            if t.endswith("."):
+                if _is_abbreviation(t):
+                    break
+                tail.append(t[-1])
+                t = t[:-1]
+        if t != "":
+            tokens.append(t)
+        tokens.extend(reversed(tail))
+    joined = _RE_SARCASM.sub("(!)", " ".join(tokens))
+    joined = _RE_EMOTICONS.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), joined)
+    return joined.lower().split()
+
+
+# --- compiled lexicon -------------------------------------------------------------
+
+class SentimentLexicon:
+    """pattern's en-sentiment.xml averaged per word (pos=None) into flat arrays."""
+
+    def __init__(self, words: Dict[str, int], polarity: np.ndarray, intensity: np.ndarray, modifier: np.ndarray):
+        self.words = words
+        self.polarity = polarity
+        self.intensity = intensity
+        self.modifier = modifier
+        # plain lists index faster than numpy scalars inside the per-token loop
+        self._polarity = polarity.tolist()
+        self._intensity = intensity.tolist()
+        self._modifier = modifier.tolist()
+
+    @classmethod
+    def from_xml(cls, path) -> "SentimentLexicon":
+        senses: Dict[str, Dict[Optional[str], list]] = {}
+        for node in ElementTree.parse(path).getroot().findall("word"):
+            form = node.attrib.get("form")
+            if not form:
+                continue
+            psi = (
+                float(node.attrib.get("polarity", 0.0)),
+                float(node.attrib.get("subjectivity", 0.0)),
+                float(node.attrib.get("intensity", 1.0)),
+            )
+            senses.setdefault(form, {}).setdefault(node.attrib.get("pos"), []).append(psi)
+
+        # average word senses per pos tag, then across pos tags
+        entries: Dict[str, Dict[Optional[str], list]] = {}
+        for form, by_pos in senses.items():
+            per_pos = {pos: [_avg(each) for each in zip(*psi)] for pos, psi in by_pos.items()}
+            per_pos[None] = [_avg(each) for each in zip(*per_pos.values())]
+            entries[form] = per_pos
+        # textblob maps adjectives to adverbs ("terrible" -> "terribly")
+        for form, per_pos in list(entries.items()):
+            if "JJ" in per_pos:
+                if form.endswith("y"):
+                    form = form[:-1] + "i"
+                if form.endswith("le"):
+                    form = form[:-2]
+                adverb = entries.setdefault(form + "ly", {})
+                adverb["RB"] = adverb[None] = tuple(per_pos["JJ"])
+
+        words = {form: idx for idx, form in enumerate(entries)}
+        polarity = np.array([entries[w][None][0] for w in words], dtype=np.float64)
+        intensity = np.array([entries[w][None][2] for w in words], dtype=np.float64)
+        modifier = np.array(["RB" in entries[w] for w in words], dtype=bool)
+        return cls(words, polarity, intensity, modifier)
+
+    def score_tokens(self, tokens: Iterable[str]) -> List[tuple]:
+        """(polarity, negated) per assessment, following pattern's Sentiment.assessments."""
+        get = self.words.get
+        pol, inten, is_mod = self._polarity, self._intensity, self._modifier
+        a_p: List[float] = []
+        a_i: List[float] = []
+        a_n: List[int] = []
+        m = None  # preceding modifier ("really good")
+        n = None  # preceding negation ("not good")
+        for w in tokens:
+            idx = get(w)
+            if idx is not None:
+                p, i = pol[idx], inten[idx]
+                if m is None:
+                    a_p.append(p)
+                    a_i.append(i)
+                    a_n.append(1)
+                else:
+                    a_p[-1] = max(-1.0, min(p * a_i[-1], +1.0))
+                    a_i[-1] = i
+                if n is not None:
+                    a_i[-1] = 1.0 / a_i[-1]
+                    a_n[-1] = -1
+                m = w if is_mod[idx] else None
+                n = w if w in _NEGATIONS else None
+            else:
+                if w in _NEGATIONS:
+                    n = w
+                elif n and len(w.strip("'")) > 1:
+                    n = None
+                if n is not None and m is not None and m.endswith("ly"):
+                    a_n[-1] = -1
+                    n = None
+                elif m and len(w) > 2:
+                    m = None
+                if w == "!" and a_p:
+                    a_p[-1] = max(-1.0, min(a_p[-1] * 1.25, +1.0))
+                if w == "(!)":
+                    a_p.append(0.0)
+                    a_i.append(1.0)
+                    a_n.append(1)
+                if w.isalpha() is False and len(w) <= 5 and w not in _PUNCTUATION:
+                    face = _EMOTICON_POLARITY.get(w)
+                    if face is not None:
+                        a_p.append(face)
+                        a_i.append(1.0)
+                        a_n.append(1)
+        return list(zip(a_p, a_n))
+
+
+def _avg(values) -> float:
+    values = list(values)
+    return sum(values) / float(len(values) or 1)
+
+
+def _default_lexicon_path() -> Optional[Path]:
+    override = os.getenv("SENTIMENT_LEXICON_PATH")
+    if override:
+        return Path(override)
+    # locate textblob's data file without importing textblob (and nltk)
+    spec = importlib.util.find_spec("textblob")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    return Path(list(spec.submodule_search_locations)[0]) / "en" / "en-sentiment.xml"
+
+
+@lru_cache(maxsize=1)
+def load_lexicon() -> Optional[SentimentLexicon]:
+    """Compile the sentiment lexicon once per process (None if it cannot be found)."""
+    path = _default_lexicon_path()
+    if path is None or not path.exists():
+        print("Sentiment lexicon not found - falling back to TextBlob per review")
+        return None
+    return SentimentLexicon.from_xml(path)
+
+
+def get_sentiment_scores(texts: Iterable[str]) -> np.ndarray:
+    """
+    Polarity for a batch of raw review texts, matching
+    TextBlob(text).sentiment.polarity without building TextBlob objects.
+    Each review is tokenized and scored in Python (score_tokens); the
+    assessments of the whole batch are then averaged per review with bincount.
+    """
+    texts = [str(t) for t in texts]
+    lexicon = load_lexicon()
+    if lexicon is None:
+        return np.array([get_sentiment_score(t) for t in texts], dtype=np.float64)
+
+    rows: List[int] = []
+    values: List[float] = []
+    for row, text in enumerate(texts):
+        try:
+            assessed = lexicon.score_tokens(tokenize_for_sentiment(text))
+        except Exception:
+            continue
+        for p, negated in assessed:
+            rows.append(row)
+            # "not good" = slightly bad, "not bad" = slightly good
+            values.append(p * -0.5 if negated < 0 else p)
+
+    row_ids = np.asarray(rows, dtype=np.int64)
+    totals = np.bincount(row_ids, weights=np.asarray(values, dtype=np.float64), minlength=len(texts))
+    counts = np.bincount(row_ids, minlength=len(texts))
+    return totals / np.maximum(counts, 1)
@@ -3,7 +3,7 @@ import multer from "multer";
 import { PutObjectCommand } from "@aws-sdk/client-s3";
 import s3Client from "../config/aws.js";
 import { config } from "../config/env.js";
-import { analyzeFileByS3Key } from "../services/mlService.js";
+import { analyzeFileByS3Key, submitFileJob, getFileJob, getFileJobResults, getResults } from "../services/mlService.js";
 
 const router = express.Router();
 const upload = multer({ storage: multer.memoryStorage() });
@@ -16,12 +16,52 @@ router.post("/file", upload.single("file"), async (req, res, next) => {
     const command = new PutObjectCommand({ Bucket: config.awsBucket, Key: key, Body: req.file.buffer, ContentType: req.file.mimetype });
     await s3Client.send(command);
 
-    // call Flask to analyze
+    // ?async=1: queue a background job and let the client poll /jobs/:id
+    if (req.query.async) {
+      let job = null;
+      try { job = await submitFileJob(key); } catch (e) { console.warn("ML job submit failed:", e.message); }
+      return res.status(job ? 202 : 200).json({ message: "File uploaded successfully", s3Key: key, job });
+    }
+
+    // call Flask to analyze; ?store=1 also keeps every row for GET /results/:id
+    // (otherwise only the first rows come back and nothing is stored)
+    const store = ["1", "true"].includes(String(req.query.store));
     let analysis = null;
-    try { analysis = await analyzeFileByS3Key(key); } catch (e) { console.warn("ML analyze failed:", e.message); }
+    try { analysis = await analyzeFileByS3Key(key, { store }); } catch (e) { console.warn("ML analyze failed:", e.message); }
 
     res.json({ message: "File uploaded successfully", s3Key: key, analysis });
   } catch (err) { next(err); }
 });
 
+router.get("/jobs/:id", async (req, res, next) => {
+  try {
+    res.json(await getFileJob(req.params.id));
+  } catch (err) {
+    if (err.response) return res.status(err.response.status).json(err.response.data);
+    next(err);
+  }
+});
+
+router.get("/jobs/:id/results", async (req, res, next) => {
+  try {
+    const { offset = 0, limit = 100 } = req.query;
+    res.json(await getFileJobResults(req.params.id, offset, limit));
+  } catch (err) {
+    if (err.response) return res.status(err.response.status).json(err.response.data);
+    next(err);
+  }
+});
+
+// every row of a synchronous analysis uploaded with ?store=1: follow next_cursor
+// until it is null (404 once the stored rows have been purged)
+router.get("/results/:id", async (req, res, next) => {
+  try {
+    const { cursor, limit = 100 } = req.query;
+    res.json(await getResults(req.params.id, cursor, limit));
+  } catch (err) {
+    if (err.response) return res.status(err.response.status).json(err.response.data);
+    next(err);
+  }
+});
+
 export default router;
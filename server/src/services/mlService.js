@@ -7,8 +7,36 @@ export async function analyzeReviews(reviews){
   return res.data;
 }
 
-export async function analyzeFileByS3Key(s3Key){
+export async function analyzeFileByS3Key(s3Key, { store = false } = {}){
   const url = `${config.flaskUrl}/analyze-file`;
+  // store (opt-in): keep every row, review text included, in the ML service's
+  // result store so the rest can be paged via getResults; rows are purged
+  // RESULTS_RETENTION_SECONDS (7 days by default) after the analysis finished
+  const body = store ? { s3_key: s3Key, store: true } : { s3_key: s3Key };
+  const res = await axios.post(url, body);
+  return res.data;
+}
+
+export async function submitFileJob(s3Key){
+  const url = `${config.flaskUrl}/jobs`;
   const res = await axios.post(url, { s3_key: s3Key });
   return res.data;
 }
+
+export async function getFileJob(jobId){
+  const url = `${config.flaskUrl}/jobs/${encodeURIComponent(jobId)}`;
+  const res = await axios.get(url);
+  return res.data;
+}
+
+export async function getFileJobResults(jobId, offset = 0, limit = 100){
+  const url = `${config.flaskUrl}/jobs/${encodeURIComponent(jobId)}/results`;
+  const res = await axios.get(url, { params: { offset, limit } });
+  return res.data;
+}
+
+export async function getResults(resultId, cursor, limit = 100){
+  const url = `${config.flaskUrl}/results/${encodeURIComponent(resultId)}`;
+  const res = await axios.get(url, { params: { cursor, limit } });
+  return res.data;
+}